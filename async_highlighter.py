@@ -1,48 +1,114 @@
 """Asynchronous syntax highlighting with debouncing."""
 import threading
-from typing import Callable, Optional, List, Tuple, Any
+import time
+from typing import Callable, Dict, Optional, List, Tuple, Any
+
 
 class AsyncHighlighter:
-    """Non-blocking syntax highlighter with debouncing."""
-    
+    """Non-blocking syntax highlighter with debouncing.
+
+    A single long-lived worker thread serves a latest-wins request slot: a
+    new request replaces any pending one, and every request carries a
+    generation number. Callbacks run on the worker thread and must pass
+    their generation to accept() on the UI thread before applying tokens.
+    """
+
     def __init__(self, delay_ms: int = 300) -> None:
         self.delay_ms: int = delay_ms
-        self.timer: Optional[threading.Timer] = None
-        
-    def highlight_async(self, text: str, filepath: str, callback: Callable[[List[Tuple[Any, str]]], None]) -> None:
-        """Schedule highlighting with debouncing."""
-        if self.timer:
-            self.timer.cancel()
-        
-        self.timer = threading.Timer(
-            self.delay_ms / 1000.0,
-            self._do_highlight,
-            args=(text, filepath, callback)
-        )
-        self.timer.start()
-    
-    def _do_highlight(self, text: str, filepath: str, callback: Callable) -> None:
-        """Execute highlighting in background thread."""
-        def worker() -> None:
+        self.generation: int = 0
+        self.stats: Dict[str, int] = {"requested": 0, "coalesced": 0, "dropped": 0, "completed": 0}
+        self._request: Optional[Tuple[int, float, str, str, Callable]] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed: bool = False
+
+    def highlight_async(self, text: str, filepath: str,
+                        callback: Callable[[List[Tuple[Any, str]], int], None]) -> int:
+        """Schedule highlighting with debouncing and return its generation."""
+        with self._condition:
+            self.generation += 1
+            self.stats["requested"] += 1
+            if self._request is not None:
+                self.stats["coalesced"] += 1
+
+            due = time.monotonic() + self.delay_ms / 1000.0
+            self._request = (self.generation, due, text, filepath, callback)
+            self._ensure_worker()
+            self._condition.notify()
+            return self.generation
+
+    def accept(self, generation: int, current: bool = True) -> bool:
+        """Check a result right before applying it and count the outcome.
+
+        Returns False if a newer request or a cancel happened since the
+        result's generation, or if the caller found it stale (current is
+        False, e.g. the buffer changed), in which case the result must be
+        discarded.
+        """
+        with self._condition:
+            if current and generation == self.generation:
+                self.stats["completed"] += 1
+                return True
+            self.stats["dropped"] += 1
+            return False
+
+    def cancel(self) -> None:
+        """Cancel pending highlighting and invalidate in-flight results."""
+        with self._condition:
+            self.generation += 1
+            if self._request is not None:
+                self.stats["dropped"] += 1
+                self._request = None
+
+    def shutdown(self) -> None:
+        """Stop the worker thread."""
+        with self._condition:
+            self._closed = True
+            self._request = None
+            self._condition.notify()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="highlighter", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Worker loop: wait for the debounce delay, then lex the latest request."""
+        while True:
+            with self._condition:
+                while self._request is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+
+                generation, due, text, filepath, callback = self._request
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    # A newer request may replace this one while waiting
+                    self._condition.wait(remaining)
+                    continue
+                self._request = None
+
+            tokens = self._lex(text, filepath)
+
+            with self._condition:
+                if tokens is None or generation != self.generation:
+                    self.stats["dropped"] += 1
+                    continue
+
             try:
-                from pygments import lex
-                from pygments.lexers import get_lexer_for_filename, TextLexer
-                
-                try:
-                    lexer = get_lexer_for_filename(filepath)
-                except Exception:
-                    lexer = TextLexer()
-                
-                tokens = list(lex(text, lexer))
-                callback(tokens)
+                callback(tokens, generation)
             except Exception:
                 pass
-        
-        thread = threading.Thread(target=worker, daemon=True)
-        thread.start()
-    
-    def cancel(self) -> None:
-        """Cancel pending highlighting."""
-        if self.timer:
-            self.timer.cancel()
-            self.timer = None
+
+    def _lex(self, text: str, filepath: str) -> Optional[List[Tuple[Any, str]]]:
+        """Execute highlighting in the worker thread."""
+        try:
+            from pygments import lex
+            from pygments.lexers import TextLexer
+            from lexer_registry import lexer_registry, LEXER_OPTIONS
+
+            lexer = lexer_registry.get_lexer(filepath, text) or TextLexer(**LEXER_OPTIONS)
+            return list(lex(text, lexer))
+        except Exception:
+            return None
@@ -0,0 +1,267 @@
+"""Benchmark editor latency on generated Python/JS files of 1k/10k/100k lines.
+
+Drives App.open_file, TabManager.switch_tab, CodeEditor and
+SyntaxHighlighter and records, per file:
+
+    open_ms             App.open_file until it returns and idle tasks ran
+    tab_switch_ms       switching back to the file from another tab (mean)
+    first_highlight_ms  highlight_text() until the visible lines are tagged
+    full_highlight_ms   until viewport chunk filling has finished
+    keystroke_ms        one inserted character, incremental re-highlight
+                        and repaint (mean)
+
+Usage:
+    xvfb-run python3 benchmarks/bench_editor.py --json bench.json
+    python3 benchmarks/bench_editor.py --sizes 1000 10000 --languages py
+
+The GUI metrics need a display (or Xvfb). Without one the headless metrics
+run the same document, lexing, tagging and incremental relex code against
+the recording stand-in widget, and the GUI-only metrics are written as null.
+Syntax highlighting uses a throwaway token cache so each run lexes cold.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import syntax_highlighter
+from bench_tag_application import RecordingText, generate_source
+from document import Document
+from incremental_highlighter import split_tokens_by_line, lex_tokens, relex
+from lexer_registry import lexer_registry
+from syntax_highlighter import SyntaxHighlighter
+from token_cache import TokenCache
+
+SIZES = (1000, 10000, 100000)
+LANGUAGES = ("py", "js")
+VISIBLE_LINES = 50
+
+
+def generate_js(lines):
+    """Generate a JavaScript module with roughly the given number of lines."""
+    block = [
+        "export class Widget{n} extends Base {{",
+        "  /* Generated widget {n}. */",
+        "  render(value = {n}) {{",
+        "    const items = [...Array(value).keys()].filter(x => x % 3); // comment",
+        "    return `${{this.name}}-{n}` + String(items.length);",
+        "  }}",
+        "}}",
+    ]
+    out = []
+    n = 0
+    while len(out) < lines:
+        out.extend(line.format(n=n) for line in block)
+        n += 1
+    return "\n".join(out[:lines])
+
+
+def write_files(directory, sizes, languages):
+    """Write one generated file per (language, size) and return their paths."""
+    generators = {"py": generate_source, "js": generate_js}
+    paths = []
+    for language in languages:
+        for size in sizes:
+            path = os.path.join(directory, f"bench_{size}.{language}")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(generators[language](size))
+            paths.append((language, size, path))
+    return paths
+
+
+def fresh_token_cache():
+    """Point highlighting at an empty cache so nothing is served warm; returns its directory."""
+    cache_dir = Path(tempfile.mkdtemp(prefix="bench-tokens-"))
+    syntax_highlighter.token_cache = TokenCache(cache_dir, memory_entries=0)
+    return cache_dir
+
+
+def check_highlighted(editor, stage):
+    """Fail loudly if a timed pass left no line states, i.e. highlighting errored and reset."""
+    if not editor.highlighter.line_states:
+        raise RuntimeError(f"Highlighting failed during {stage}, timings would be meaningless")
+
+
+def ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def run_gui(files, keystrokes, switches):
+    """Measure through the real App; raises TclError without a display."""
+    from editor_view_v3 import App
+
+    app = App()
+    app.update()
+    results = []
+
+    for language, size, path in files:
+        cache_dir = fresh_token_cache()
+        start = time.perf_counter()
+        app.open_file(path)
+        app.update_idletasks()
+        open_seconds = time.perf_counter() - start
+
+        manager = app.tab_manager
+        index = manager.current_tab_index
+        editor = manager.text_area
+
+        # Switch away to the first tab and back
+        switch_times = []
+        for _ in range(switches):
+            manager.switch_tab(0)
+            app.update_idletasks()
+            start = time.perf_counter()
+            manager.switch_tab(index)
+            app.update_idletasks()
+            switch_times.append(time.perf_counter() - start)
+
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        cache_dir = fresh_token_cache()
+        start = time.perf_counter()
+        editor.highlight_text()
+        app.update_idletasks()
+        first_seconds = time.perf_counter() - start
+        while not editor.highlighter.viewport.is_idle():
+            app.update()
+        full_seconds = time.perf_counter() - start
+        check_highlighted(editor, "the full highlight")
+
+        line = int(editor.index("@0,0").split(".")[0]) + VISIBLE_LINES // 2
+        editor.mark_set("insert", f"{line}.0")
+        key_times = []
+        for _ in range(keystrokes):
+            start = time.perf_counter()
+            editor.insert("insert", "x")
+            editor.incremental_highlighter.flush()
+            app.update_idletasks()
+            key_times.append(time.perf_counter() - start)
+        check_highlighted(editor, "keystrokes")
+
+        manager.close_tab(index)
+        app.update_idletasks()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        results.append({
+            "language": language, "lines": size, "bytes": os.path.getsize(path),
+            "open_ms": ms(open_seconds),
+            "tab_switch_ms": ms(statistics.mean(switch_times)) if switch_times else None,
+            "first_highlight_ms": ms(first_seconds),
+            "full_highlight_ms": ms(full_seconds),
+            "keystroke_ms": ms(statistics.mean(key_times)) if key_times else None,
+        })
+
+    app.destroy()
+    return results
+
+
+def run_headless(files, keystrokes):
+    """Measure the non-Tk half of each path against RecordingText."""
+    results = []
+    for language, size, path in files:
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            document = Document(f.read())
+        snapshot = document.snapshot()
+        load_seconds = time.perf_counter() - start
+
+        widget = RecordingText()
+        highlighter = SyntaxHighlighter(widget)
+        lexer = lexer_registry.get_lexer(path, snapshot.slice(0, 4096))
+
+        start = time.perf_counter()
+        visible = split_tokens_by_line(lex_tokens(lexer, snapshot.lines(1, VISIBLE_LINES)))
+        highlighter.apply_line_states(1, visible)
+        first_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        states = split_tokens_by_line(lex_tokens(lexer, snapshot.text()))
+        highlighter.apply_line_states(1, states)
+        full_seconds = time.perf_counter() - start
+
+        # Same splice + relex + tag path as IncrementalHighlighter.flush
+        line = min(size, VISIBLE_LINES // 2)
+        key_times = []
+        for _ in range(keystrokes):
+            start = time.perf_counter()
+            document.apply_edit(f"{line}.0", f"{line}.0", "x")
+            current = document.snapshot()
+            states[line - 1] = None
+            first, new_states = relex(lexer, current.lines, states, line, line)
+            states[first - 1:first - 1 + len(new_states)] = new_states
+            highlighter.apply_line_states(first, new_states)
+            key_times.append(time.perf_counter() - start)
+
+        results.append({
+            "language": language, "lines": size, "bytes": os.path.getsize(path),
+            "load_ms": ms(load_seconds),
+            "open_ms": None,
+            "tab_switch_ms": None,
+            "first_highlight_ms": ms(first_seconds),
+            "full_highlight_ms": ms(full_seconds),
+            "keystroke_ms": ms(statistics.mean(key_times)) if key_times else None,
+        })
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--languages", nargs="+", choices=LANGUAGES, default=list(LANGUAGES))
+    parser.add_argument("--keystrokes", type=int, default=20)
+    parser.add_argument("--switches", type=int, default=5)
+    parser.add_argument("--headless", action="store_true", help="Skip the GUI even with a display")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-files-") as directory:
+        files = write_files(directory, args.sizes, args.languages)
+        mode = "headless"
+        results = None
+        if not args.headless:
+            try:
+                results = run_gui(files, args.keystrokes, args.switches)
+                mode = "gui"
+            except tkinter.TclError as e:
+                print(f"No display ({e}), running headless metrics only")
+        if results is None:
+            results = run_headless(files, args.keystrokes)
+
+    columns = ("open_ms", "tab_switch_ms", "first_highlight_ms", "full_highlight_ms", "keystroke_ms")
+    print(f"mode: {mode}")
+    print(f"{'file':<14}" + "".join(f"{c:>20}" for c in columns))
+    for result in results:
+        name = f"{result['lines']}.{result['language']}"
+        cells = ("-" if result[c] is None else f"{result[c]:.2f}" for c in columns)
+        print(f"{name:<14}" + "".join(f"{cell:>20}" for cell in cells))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "mode": mode,
+                "keystrokes": args.keystrokes,
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
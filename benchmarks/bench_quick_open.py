@@ -0,0 +1,105 @@
+"""Benchmark Quick Open ranking on a generated index of 500k paths.
+
+Loads PathIndex with synthetic workspace paths and types each query one
+character at a time, as the palette does, recording per query:
+
+    keystroke_ms        mean time to rank a keystroke
+    max_keystroke_ms    slowest keystroke
+    top                 best match for the full query
+
+Usage:
+    python3 benchmarks/bench_quick_open.py --json quick_open.json
+    python3 benchmarks/bench_quick_open.py --paths 100000 --queries edsrv search_index
+
+The index is loaded from a list, so the file system walk is not timed.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quick_open import PathIndex
+
+QUERIES = ("edsrv", "search_index", "ctrlwid.py", "utils/conf", "SeIn", "zzq")
+WORDS = ("src lib core utils test tests docs api models views controllers components widgets "
+         "editor search index file tree server client handler config").split()
+EXTENSIONS = (".py", ".js", ".ts", ".md", ".json", ".css", ".html")
+
+
+def generate_paths(count, seed=1):
+    """Generate count distinct relative paths, 1-6 folders deep."""
+    rng = random.Random(seed)
+    paths = set()
+    while len(paths) < count:
+        folders = [rng.choice(WORDS) + ("" if rng.random() < 0.5 else str(rng.randint(0, 99)))
+                   for _ in range(rng.randint(1, 6))]
+        name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}{rng.randint(0, 999)}{rng.choice(EXTENSIONS)}"
+        paths.add("/".join(folders + [name]))
+    return sorted(paths)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=500000)
+    parser.add_argument("--queries", nargs="+", default=list(QUERIES))
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    paths = generate_paths(args.paths)
+    index = PathIndex("/workspace")
+    start = time.perf_counter()
+    index.load(paths)
+    load_ms = (time.perf_counter() - start) * 1000
+    gc.collect()  # Don't charge the first keystroke for collecting the generated paths
+
+    results = []
+    for query in args.queries:
+        times = []
+        matches = []
+        for end in range(1, len(query) + 1):
+            start = time.perf_counter()
+            matches = index.search(query[:end])
+            times.append((time.perf_counter() - start) * 1000)
+        results.append({
+            "query": query,
+            "keystroke_ms": statistics.mean(times),
+            "max_keystroke_ms": max(times),
+            "top": matches[0].relative if matches else None,
+        })
+
+    print(f"{len(paths)} paths, loaded in {load_ms:.0f} ms")
+    print(f"{'query':<16}{'keystroke_ms':>16}{'max_keystroke_ms':>20}  top")
+    for result in results:
+        print(f"{result['query']:<16}{result['keystroke_ms']:>16.2f}"
+              f"{result['max_keystroke_ms']:>20.2f}  {result['top']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "paths": len(paths),
+                "load_ms": load_ms,
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
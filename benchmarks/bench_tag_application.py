@@ -0,0 +1,144 @@
+"""Benchmark Tk tag application: per-token marks vs batched tag ranges.
+
+Compares the old highlighting loop (mark_set + tag_add + mark_set for every
+token) with SyntaxHighlighter.apply_tokens, which groups ranges by tag and
+issues one tag_add per tag.
+
+Usage:
+    python3 benchmarks/bench_tag_application.py --lines 5000
+
+With a display (or under Xvfb) the calls are counted on a real Tk text
+widget; without one a recording stand-in counts the calls each strategy
+makes and the timings only cover the Python side.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tkinter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pygments import lex
+from pygments.lexers import PythonLexer
+from syntax_highlighter import SyntaxHighlighter
+
+
+def generate_source(lines):
+    """Generate a Python module with roughly the given number of lines."""
+    block = [
+        "class Model{n}(Base):",
+        "    \"\"\"Generated model {n}.\"\"\"",
+        "    def method_{n}(self, value: int = {n}) -> str:",
+        "        result = [x * 2 for x in range(value) if x % 3]  # comment",
+        "        return f\"{{self.name}}-{n}\" + str(len(result))",
+        "",
+    ]
+    out = []
+    n = 0
+    while len(out) < lines:
+        out.extend(line.format(n=n) for line in block)
+        n += 1
+    return "\n".join(out[:lines])
+
+
+class TclCallCounter:
+    """Count every Tcl command sent to a real Tk widget."""
+
+    def __init__(self, widget):
+        self.count = 0
+        self.widget = widget
+        self.orig = widget._w + "_bench_orig"
+        widget.tk.call("rename", widget._w, self.orig)
+        widget.tk.createcommand(widget._w, self._dispatch)
+
+    def _dispatch(self, *args):
+        self.count += 1
+        return self.widget.tk.call((self.orig,) + args)
+
+
+class RecordingText:
+    """Headless stand-in that counts the widget calls each strategy makes."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _record(self, *args, **kwargs):
+        self.count += 1
+
+    mark_set = tag_add = tag_remove = tag_config = _record
+
+    def after(self, *args):
+        return None
+
+
+def legacy_apply(widget, tokens):
+    """The per-token loop SyntaxHighlighter used before batching."""
+    widget.mark_set("range_start", "1.0")
+    for token, content in tokens:
+        if not content:
+            continue
+        widget.mark_set("range_end", f"range_start + {len(content)}c")
+        widget.tag_add(str(token), "range_start", "range_end")
+        widget.mark_set("range_start", "range_end")
+
+
+def make_widget(source):
+    """Return (widget, counter, root) using Tk when a display is available."""
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        widget = RecordingText()
+        return widget, widget, None
+
+    root.withdraw()
+    widget = tkinter.Text(root)
+    widget.insert("1.0", source)
+    counter = TclCallCounter(widget)
+    return widget, counter, root
+
+
+def measure(strategy, source, tokens):
+    widget, counter, root = make_widget(source)
+    highlighter = SyntaxHighlighter(widget)
+    counter.count = 0
+
+    start = time.perf_counter()
+    if strategy == "legacy":
+        legacy_apply(widget, tokens)
+    else:
+        highlighter.apply_tokens(tokens)
+    if root is not None:
+        root.update_idletasks()
+    elapsed = time.perf_counter() - start
+
+    calls = counter.count
+    if root is not None:
+        root.destroy()
+    return {"strategy": strategy, "tcl_calls": calls, "seconds": round(elapsed, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    source = generate_source(args.lines)
+    tokens = list(lex(source, PythonLexer(stripnl=False, ensurenl=False)))
+
+    results = [measure("legacy", source, tokens), measure("batched", source, tokens)]
+
+    print(f"{args.lines} lines, {len(tokens)} tokens")
+    print(f"{'strategy':<10} {'tcl calls':>10} {'seconds':>10}")
+    for result in results:
+        print(f"{result['strategy']:<10} {result['tcl_calls']:>10} {result['seconds']:>10.4f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"lines": args.lines, "tokens": len(tokens), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
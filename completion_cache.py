@@ -0,0 +1,85 @@
+"""The last completion set, filtered and ranked locally while typing."""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from fuzzy import fuzzy_match
+
+# Extra score for names that start with the typed text exactly (case included)
+BONUS_PREFIX = 10.0
+
+_WORD = re.compile(r"\w*")
+
+
+class CompletionCache:
+    """Completions computed at one trigger position, re-ranked per keystroke.
+
+    Completions are requested at the start of the word being typed, so
+    one set covers every prefix typed after it. `trigger` is that
+    (line, column) and `version` the buffer version the set is valid
+    for: on_edit moves it forward while edits stay inside the word and
+    drops the set on any other edit. Filtering a prefix that extends the
+    previous one only re-scores the previous matches.
+    """
+
+    def __init__(self) -> None:
+        self.stats: Dict[str, int] = {"filters": 0, "narrowed": 0}
+        self.clear()
+
+    def clear(self) -> None:
+        self.trigger: Optional[Tuple[int, int]] = None
+        self.version: Optional[int] = None
+        self.completions: List[Any] = []
+        self._lowered: List[str] = []
+        self._last: Optional[Tuple[str, List[int]]] = None  # (query, matching indices)
+
+    def start(self, trigger: Tuple[int, int], version: int) -> None:
+        """Begin an empty set for completions requested at trigger."""
+        self.clear()
+        self.trigger = trigger
+        self.version = version
+
+    def add(self, completions: List[Any]) -> None:
+        """Append completions as they arrive from the worker."""
+        self.completions.extend(completions)
+        self._lowered.extend(completion.name.lower() for completion in completions)
+        self._last = None
+
+    def covers(self, trigger: Tuple[int, int], version: int) -> bool:
+        return self.trigger == trigger and self.version == version
+
+    def on_edit(self, start: str, end: str, text: str, version: int) -> None:
+        """Keep the set across edits to the word after the trigger, drop it otherwise."""
+        if self.trigger is None:
+            return
+        line, column = self.trigger
+        start_line, start_column = map(int, start.split("."))
+        end_line = int(end.split(".")[0])
+        if start_line == end_line == line and start_column >= column and _WORD.fullmatch(text):
+            self.version = version
+        else:
+            self.clear()
+
+    def filter(self, prefix: str) -> List[Any]:
+        """Completions matching prefix, best first; all of them, in order, for no prefix."""
+        self.stats["filters"] += 1
+        if not prefix:
+            self._last = ("", list(range(len(self.completions))))
+            return list(self.completions)
+
+        query = prefix.lower()
+        if self._last is not None and query.startswith(self._last[0]):
+            candidates = self._last[1]
+            self.stats["narrowed"] += 1
+        else:
+            candidates = range(len(self.completions))
+
+        scored = []
+        for i in candidates:
+            name = self.completions[i].name
+            match = fuzzy_match(query, name, self._lowered[i], 0)
+            if match is not None:
+                score = match[0] + (BONUS_PREFIX if name.startswith(prefix) else 0.0)
+                scored.append((-score, i))
+        scored.sort()
+        self._last = (query, [i for _, i in scored])
+        return [self.completions[i] for _, i in scored]
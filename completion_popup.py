@@ -1,39 +1,98 @@
 import customtkinter
 import tkinter
+import tkinter.font
+
+# Docstrings are cut to this many lines in the detail pane
+MAX_DOC_LINES = 12
+
+
+def format_detail(detail):
+    """Text for the detail pane: type, signature, then the docstring."""
+    lines = [line for line in (detail.type, detail.signature) if line]
+    doc = detail.docstring.strip().splitlines()
+    if doc:
+        if lines:
+            lines.append("")
+        lines.extend(doc[:MAX_DOC_LINES])
+        if len(doc) > MAX_DOC_LINES:
+            lines.append("…")
+    return "\n".join(lines)
 
 
 class CompletionPopup(customtkinter.CTkToplevel):
-    def __init__(self, master, text_widget, completions, **kwargs):
+    """Completion list that draws only the visible rows, with details of the selection.
+
+    Rows are a recycled pool of canvas items, as in ResultsView, so
+    opening or re-filtering the popup costs the same for ten completions
+    or ten thousand. Type, signature and docstring are slow to infer, so
+    they are requested through `fetch_detail(completion, callback)` for
+    the selected item only and shown in the detail pane when they arrive.
+    """
+
+    ROWS = 10
+    LIST_WIDTH = 280
+    DETAIL_WIDTH = 360
+
+    def __init__(self, master, text_widget, completions, word_start=None, fetch_detail=None, **kwargs):
         super().__init__(master, **kwargs)
         self.text_widget = text_widget
-        self.completions = completions
+        self.completions = list(completions)
+        self.word_start = word_start  # Index where the completed word begins
+        self.fetch_detail = fetch_detail
+        self.visible = False
+        self.selected = 0
+        self.top = 0
+        self._items = []  # (background, text) canvas items per row
+        self._details = {}  # id(completion) -> (completion, detail)
         self.overrideredirect(True)  # Remove window decorations
 
         # Use hardcoded, generally acceptable colors for compatibility
-        bg_color = "gray20" if customtkinter.get_appearance_mode() == "Dark" else "gray90"
-        fg_color = "white" if customtkinter.get_appearance_mode() == "Dark" else "black"
-        select_bg_color = "#3B8ED0"  # A common blue for selection
-        select_fg_color = "white"
-
-        self.listbox = tkinter.Listbox(self,
-                                       bg=bg_color,
-                                       fg=fg_color,
-                                       selectbackground=select_bg_color,
-                                       selectforeground=select_fg_color,
-                                       highlightthickness=0,
-                                       borderwidth=0)
-        self.listbox.pack(fill="both", expand=True)
-
-        for comp in self.completions:
-            self.listbox.insert("end", comp.name)
-
-        self.listbox.bind("<Return>", self.handle_key_event)
-        self.listbox.bind("<Up>", self.handle_key_event)
-        self.listbox.bind("<Down>", self.handle_key_event)
-        self.listbox.bind("<Escape>", self.handle_key_event)
+        dark = customtkinter.get_appearance_mode() == "Dark"
+        self.colors = {
+            "background": "gray20" if dark else "gray90",
+            "text": "white" if dark else "black",
+            "detail": "gray16" if dark else "gray96",
+            "selected": "#3B8ED0",  # A common blue for selection
+            "selected_text": "white",
+        }
+
+        self.font = tkinter.font.Font(family="monospace", size=11)
+        self.row_height = self.font.metrics("linespace") + 4
+
+        self.canvas = tkinter.Canvas(self, width=self.LIST_WIDTH, bg=self.colors["background"],
+                                     highlightthickness=0, borderwidth=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = customtkinter.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.detail = tkinter.Label(self, justify="left", anchor="nw", wraplength=self.DETAIL_WIDTH,
+                                    bg=self.colors["detail"], fg=self.colors["text"],
+                                    font=("monospace", 10), padx=6, pady=4)
+        self.detail.grid(row=0, column=2, sticky="nsew")
+        self.detail.grid_remove()
+
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Double-Button-1>", lambda event: self.select_completion())
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll(-int(event.delta / 120) * 3))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll(3))
 
         self.transient(master)  # Make it appear on top of the main window
         self.withdraw()  # Hide it initially
+        self.redraw()
+
+    def set_completions(self, completions):
+        """Replace the list in place, hiding the popup while nothing matches."""
+        self.completions = list(completions)
+        self.selected = 0
+        self.top = 0
+        if not self.completions:
+            self.hide()
+            return
+        self.redraw()
+        if not self.visible:
+            self.show()
+        else:
+            self._request_detail()
 
     def show(self):
         if not self.completions:
@@ -49,30 +108,78 @@ class CompletionPopup(customtkinter.CTkToplevel):
 
         self.geometry(f"+{x}+{y}")
         self.deiconify()  # Show the window
-        self.listbox.focus_set()
-        self.listbox.selection_set(0)  # Select first item
+        # Focus stays in the editor so typing keeps filtering the list
+        self.visible = True
+        self._request_detail()
 
     def hide(self, event=None):  # Hide the window
         self.withdraw()  # Hide the window
+        self.visible = False
 
-    def select_completion(self):
-        if not self.listbox.curselection():
+    def redraw(self):
+        """Draw the rows from self.top; only ROWS canvas items exist whatever the list size."""
+        total = len(self.completions)
+        count = min(self.ROWS, total)
+        self.top = max(0, min(self.top, total - count))
+        try:
+            self.canvas.configure(height=max(count, 1) * self.row_height)
+        except tkinter.TclError:
             return
 
+        while len(self._items) < self.ROWS:
+            y = len(self._items) * self.row_height
+            background = self.canvas.create_rectangle(0, y, self.LIST_WIDTH, y + self.row_height,
+                                                      width=0, fill="")
+            text = self.canvas.create_text(4, y + 2, anchor="nw", font=self.font, text="")
+            self._items.append((background, text))
+
+        for i, (background, text) in enumerate(self._items):
+            index = self.top + i
+            if i >= count:
+                self.canvas.itemconfigure(text, text="")
+                self.canvas.itemconfigure(background, fill="")
+                continue
+            selected = index == self.selected
+            self.canvas.itemconfigure(text, text=self.completions[index].name,
+                                      fill=self.colors["selected_text" if selected else "text"])
+            self.canvas.itemconfigure(background, fill=self.colors["selected"] if selected else "")
+
+        if total > self.ROWS:
+            self.scrollbar.grid()
+            self.scrollbar.set(self.top / total, (self.top + count) / total)
+        else:
+            self.scrollbar.grid_remove()
+
+    def yview(self, *args):
+        """Scrollbar protocol: moveto fraction / scroll n units|pages."""
+        if args and args[0] == "moveto":
+            self.set_top(int(float(args[1]) * len(self.completions)))
+        elif args and args[0] == "scroll":
+            step = int(args[1])
+            self.scroll(step * (self.ROWS - 1) if args[2] == "pages" else step)
+
+    def scroll(self, rows):
+        self.set_top(self.top + rows)
+
+    def set_top(self, top):
+        top = max(0, min(top, len(self.completions) - self.ROWS))
+        if top != self.top:
+            self.top = top
+            self.redraw()
+
+    def select_completion(self):
         try:
-            selected_index = self.listbox.curselection()[0]
-            
-            if selected_index >= len(self.completions):
+            if not 0 <= self.selected < len(self.completions):
                 return
-            
-            selected_completion = self.completions[selected_index].name
-            
+
+            selected_completion = self.completions[self.selected].name
+
             cursor_index = self.text_widget.index(customtkinter.INSERT)
             line, col = map(int, cursor_index.split('.'))
-            
-            word_start = self.text_widget.index(f"{line}.{col} wordstart")
+
+            word_start = self.word_start or self.text_widget.index(f"{line}.{col} wordstart")
             word_end = self.text_widget.index(customtkinter.INSERT)
-            
+
             self.text_widget.delete(word_start, word_end)
             self.text_widget.insert(customtkinter.INSERT, selected_completion)
             self.hide()
@@ -82,34 +189,72 @@ class CompletionPopup(customtkinter.CTkToplevel):
             self.hide()
 
     def _move_selection(self, direction):
-        """Move listbox selection up (-1) or down (1)."""
-        self.listbox.selection_clear(0, "end")
-        current_selection = self.listbox.curselection()
-        list_size = self.listbox.size()
-        
-        if not list_size:
+        """Move the selection up (-1) or down (1), scrolling to keep it visible."""
+        if not self.completions:
             return
-        
-        if current_selection:
-            current_index = current_selection[0]
-            new_index = current_index + direction
-            new_index = max(0, min(list_size - 1, new_index))
+        self.selected = max(0, min(len(self.completions) - 1, self.selected + direction))
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + self.ROWS:
+            self.top = self.selected - self.ROWS + 1
+        self.redraw()
+        self._request_detail()
+
+    def _on_click(self, event):
+        index = self.top + event.y // self.row_height
+        if 0 <= index < len(self.completions):
+            self.selected = index
+            self.redraw()
+            self._request_detail()
+
+    def _request_detail(self):
+        """Show the selected item's details, fetching them in the background once."""
+        if self.fetch_detail is None or not self.completions:
+            return
+        completion = self.completions[self.selected]
+        known = self._details.get(id(completion))
+        if known is not None:
+            self._show_detail(known[1])
+            return
+        self._show_detail(None)
+
+        def deliver(completion, detail):
+            # Worker thread: hand over to Tk
+            try:
+                self.after(0, lambda: self._on_detail(completion, detail))
+            except (tkinter.TclError, RuntimeError):
+                pass
+
+        self.fetch_detail(completion, deliver)
+
+    def _on_detail(self, completion, detail):
+        self._details[id(completion)] = (completion, detail)
+        try:
+            if self.completions and self.completions[self.selected] is completion:
+                self._show_detail(detail)
+        except tkinter.TclError:
+            pass
+
+    def _show_detail(self, detail):
+        text = format_detail(detail) if detail is not None else ""
+        if text:
+            self.detail.configure(text=text)
+            self.detail.grid()
         else:
-            new_index = 0 if direction > 0 else list_size - 1
-        
-        self.listbox.selection_set(new_index)
-        self.listbox.see(new_index)
-    
+            self.detail.grid_remove()
+
     def handle_key_event(self, event):
         key_actions = {
             "Up": lambda: self._move_selection(-1),
             "Down": lambda: self._move_selection(1),
+            "Prior": lambda: self._move_selection(-(self.ROWS - 1)),
+            "Next": lambda: self._move_selection(self.ROWS - 1),
             "Return": self.select_completion,
             "Escape": self.hide
         }
-        
+
         action = key_actions.get(event.keysym)
         if action:
             action()
-        
+
         return "break"
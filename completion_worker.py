@@ -0,0 +1,182 @@
+"""Code completion on a background thread, latest request wins."""
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from language_service import service_for
+from logger import logger
+from lsp_client import LspCompletion, LspError, client_for
+
+# Completions handed to the UI per callback, so the popup fills in as they arrive
+CHUNK_SIZE = 200
+
+
+class CompletionDetail(NamedTuple):
+    type: str
+    signature: str
+    docstring: str
+
+
+class CompletionWorker:
+    """Run completion requests off the Tk thread.
+
+    Works like AsyncHighlighter: one long-lived worker serves a single
+    request slot, a new request replaces a pending one, and every request
+    carries a generation. Jedi can't be interrupted, so a superseded
+    request still finishes computing, but its results are never
+    delivered. Results go to `callback(chunk, generation, done)` on the
+    worker thread, CHUNK_SIZE at a time; the UI thread must check
+    is_current(generation) before using them.
+    """
+
+    def __init__(self, complete: Optional[Callable[..., List[Any]]] = None) -> None:
+        self.complete = complete or complete_at
+        self.generation: int = 0
+        self.stats: Dict[str, int] = {"requested": 0, "superseded": 0, "delivered": 0, "failed": 0}
+        self._request: Optional[Tuple[int, str, int, int, Optional[str], Optional[int], Callable]] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed: bool = False
+
+    def request(self, code: str, line: int, column: int, path: Optional[str],
+                callback: Callable[[List[Any], int, bool], None], edit_version: Optional[int] = None) -> int:
+        """Schedule completions at line/column and return the request's generation.
+
+        edit_version is the editor's version of code, so a language server
+        that already has newer edits keeps them.
+        """
+        with self._condition:
+            self.generation += 1
+            self.stats["requested"] += 1
+            if self._request is not None:
+                self.stats["superseded"] += 1
+            self._request = (self.generation, code, line, column, path, edit_version, callback)
+            self._ensure_worker()
+            self._condition.notify()
+            return self.generation
+
+    def is_current(self, generation: int) -> bool:
+        """False once a newer request or a cancel happened."""
+        with self._condition:
+            return generation == self.generation
+
+    def cancel(self) -> None:
+        """Drop the pending request and invalidate the one being computed."""
+        with self._condition:
+            self.generation += 1
+            if self._request is not None:
+                self.stats["superseded"] += 1
+                self._request = None
+
+    def shutdown(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._request = None
+            self._condition.notify()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="completions", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._request is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                generation, code, line, column, path, edit_version, callback = self._request
+                self._request = None
+
+            try:
+                completions = self.complete(code, line, column, path, edit_version)
+            except Exception as e:
+                logger.debug(f"Completion failed: {e}")
+                self.stats["failed"] += 1
+                completions = []
+
+            for start in range(0, max(len(completions), 1), CHUNK_SIZE):
+                if not self.is_current(generation):
+                    self.stats["superseded"] += 1
+                    break
+                done = start + CHUNK_SIZE >= len(completions)
+                try:
+                    callback(completions[start:start + CHUNK_SIZE], generation, done)
+                except Exception:
+                    break
+            else:
+                self.stats["delivered"] += 1
+
+
+def complete_at(code: str, line: int, column: int, path: Optional[str],
+                edit_version: Optional[int] = None) -> List[Any]:
+    """Completions from the file's language server, else from Jedi in-process."""
+    client = client_for(path)
+    if client is not None:
+        try:
+            return client.complete(path, code, line, column, edit_version)
+        except LspError as e:
+            logger.debug(f"Language server completion failed, using Jedi: {e}")
+    return service_for(path).complete(code, line, column, path)
+
+
+def describe_completion(completion: Any, path: Optional[str]) -> CompletionDetail:
+    """Type, signature and docstring of a completion; slow for Jedi's, which infer them."""
+    if isinstance(completion, LspCompletion):
+        return CompletionDetail(completion.type, completion.detail, completion.documentation)
+    return CompletionDetail(*service_for(path).describe(completion))
+
+
+class DetailWorker:
+    """Describe one completion at a time, off the Tk thread.
+
+    Only the latest request is kept, so moving quickly through the list
+    describes the item the selection stops on rather than every item it
+    passed. `callback(completion, detail)` runs on the worker thread.
+    """
+
+    def __init__(self, describe: Optional[Callable[[Any, Optional[str]], CompletionDetail]] = None) -> None:
+        self.describe = describe or describe_completion
+        self.stats: Dict[str, int] = {"requested": 0, "described": 0, "failed": 0}
+        self._request: Optional[Tuple[Any, Optional[str], Callable]] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed: bool = False
+
+    def request(self, completion: Any, path: Optional[str],
+                callback: Callable[[Any, CompletionDetail], None]) -> None:
+        with self._condition:
+            self.stats["requested"] += 1
+            self._request = (completion, path, callback)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="completion-details", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def shutdown(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._request = None
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._request is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                completion, path, callback = self._request
+                self._request = None
+
+            try:
+                detail = self.describe(completion, path)
+                self.stats["described"] += 1
+            except Exception as e:
+                logger.debug(f"Describing completion failed: {e}")
+                self.stats["failed"] += 1
+                detail = CompletionDetail("", "", "")
+            try:
+                callback(completion, detail)
+            except Exception:
+                pass
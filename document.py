@@ -0,0 +1,231 @@
+"""Piece-table document model kept in sync with the editor widget."""
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import List, Optional, Tuple
+
+# Flatten the piece list once edits have fragmented it this much
+MAX_PIECES = 1024
+
+
+class _Buffer:
+    """An immutable text buffer with the offsets of its newlines."""
+
+    __slots__ = ("text", "newlines")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        newlines = []
+        find = text.find
+        pos = find("\n")
+        while pos != -1:
+            newlines.append(pos)
+            pos = find("\n", pos + 1)
+        self.newlines = newlines
+
+
+class _Piece:
+    """A span [start, start + length) of a buffer."""
+
+    __slots__ = ("buffer", "start", "length", "nl_lo", "nl_hi")
+
+    def __init__(self, buffer: _Buffer, start: int, length: int) -> None:
+        self.buffer = buffer
+        self.start = start
+        self.length = length
+        # Range of buffer.newlines that fall inside this piece
+        self.nl_lo = bisect_left(buffer.newlines, start)
+        self.nl_hi = bisect_left(buffer.newlines, start + length)
+
+    def text(self) -> str:
+        return self.buffer.text[self.start:self.start + self.length]
+
+    def split(self, offset: int) -> Tuple[Optional["_Piece"], Optional["_Piece"]]:
+        left = _Piece(self.buffer, self.start, offset) if offset > 0 else None
+        right = (_Piece(self.buffer, self.start + offset, self.length - offset)
+                 if offset < self.length else None)
+        return left, right
+
+
+class Snapshot:
+    """Immutable view of a document at one version.
+
+    Taking a snapshot copies the piece list, not the text. Offset and
+    line/column lookups are O(log n); the full string is only built when
+    text() is called, and then cached.
+    """
+
+    def __init__(self, pieces: Tuple[_Piece, ...], version: int) -> None:
+        self.version = version
+        self._pieces = pieces
+        self._starts = [0] + list(accumulate(p.length for p in pieces))
+        self._line_starts = [0] + list(accumulate(p.nl_hi - p.nl_lo for p in pieces))
+        self._text: Optional[str] = None
+
+    def __len__(self) -> int:
+        return self._starts[-1]
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, counting the last (possibly empty) line."""
+        return self._line_starts[-1] + 1
+
+    def text(self) -> str:
+        """Return the whole document as a string."""
+        if self._text is None:
+            self._text = "".join(p.text() for p in self._pieces)
+        return self._text
+
+    def slice(self, start: int, end: int) -> str:
+        """Return the text between two offsets without building the whole string."""
+        if self._text is not None:
+            return self._text[start:end]
+        start = max(0, start)
+        end = min(len(self), end)
+        if start >= end:
+            return ""
+
+        parts = []
+        i = max(0, bisect_right(self._starts, start) - 1)
+        while i < len(self._pieces) and self._starts[i] < end:
+            piece = self._pieces[i]
+            lo = max(start - self._starts[i], 0)
+            hi = min(end - self._starts[i], piece.length)
+            parts.append(piece.buffer.text[piece.start + lo:piece.start + hi])
+            i += 1
+        return "".join(parts)
+
+    def line_start(self, line: int) -> int:
+        """Return the offset where 1-based line begins."""
+        if line <= 1:
+            return 0
+        if line > self.line_count:
+            return len(self)
+
+        target = line - 1  # Number of newlines before the line
+        i = bisect_left(self._line_starts, target) - 1
+        piece = self._pieces[i]
+        newline = piece.buffer.newlines[piece.nl_lo + target - self._line_starts[i] - 1]
+        return self._starts[i] + newline - piece.start + 1
+
+    def lines(self, first: int, last: int) -> str:
+        """Return lines first..last inclusive, without the final newline."""
+        start = self.line_start(first)
+        end = self.line_start(last + 1)
+        if last + 1 <= self.line_count:
+            end -= 1
+        return self.slice(start, end)
+
+    def offset_to_position(self, offset: int) -> Tuple[int, int]:
+        """Map a character offset to a (1-based line, 0-based column)."""
+        offset = max(0, min(offset, len(self)))
+        i = bisect_right(self._starts, offset) - 1
+        if i >= len(self._pieces):
+            i = len(self._pieces) - 1
+        if i < 0:
+            return 1, offset
+
+        piece = self._pieces[i]
+        local = piece.start + offset - self._starts[i]
+        newlines_before = bisect_left(piece.buffer.newlines, local, piece.nl_lo, piece.nl_hi) - piece.nl_lo
+        line = self._line_starts[i] + newlines_before + 1
+        return line, offset - self.line_start(line)
+
+    def position_to_offset(self, line: int, column: int) -> int:
+        """Map a (1-based line, 0-based column) to a character offset."""
+        start = self.line_start(line)
+        end = self.line_start(line + 1) - 1 if line < self.line_count else len(self)
+        return min(start + max(0, column), end)
+
+    def index_to_offset(self, index: str) -> int:
+        """Map a Tk "line.col" index to a character offset."""
+        line, column = index.split(".")
+        return self.position_to_offset(int(line), int(column))
+
+
+class Document:
+    """Piece-table text model that owns the contents of an editor tab."""
+
+    def __init__(self, text: str = "") -> None:
+        self.version: int = 0
+        self._pieces: List[_Piece] = []
+        self._snapshot: Optional[Snapshot] = None
+        self.set_text(text)
+
+    def set_text(self, text: str) -> None:
+        """Replace the whole contents."""
+        self._pieces = [_Piece(_Buffer(text), 0, len(text))] if text else []
+        self._changed()
+
+    def snapshot(self) -> Snapshot:
+        """Return an immutable snapshot of the current version."""
+        if self._snapshot is None:
+            self._snapshot = Snapshot(tuple(self._pieces), self.version)
+        return self._snapshot
+
+    def text(self) -> str:
+        """Return the whole document as a string (cached per version)."""
+        return self.snapshot().text()
+
+    def __len__(self) -> int:
+        return len(self.snapshot())
+
+    @property
+    def line_count(self) -> int:
+        return self.snapshot().line_count
+
+    def offset_to_position(self, offset: int) -> Tuple[int, int]:
+        return self.snapshot().offset_to_position(offset)
+
+    def position_to_offset(self, line: int, column: int) -> int:
+        return self.snapshot().position_to_offset(line, column)
+
+    def apply_edit(self, start: str, end: str, text: str) -> None:
+        """Apply a widget edit: replace Tk indices start..end with text."""
+        snapshot = self.snapshot()
+        start_offset = snapshot.index_to_offset(start)
+        end_offset = snapshot.index_to_offset(end)
+        self.replace(start_offset, end_offset, text)
+
+    def replace(self, start: int, end: int, text: str) -> None:
+        """Replace offsets start..end with text."""
+        if end > start:
+            self._delete(start, end)
+        if text:
+            self._insert(start, text)
+        if end > start or text:
+            self._changed()
+
+    def insert(self, offset: int, text: str) -> None:
+        self.replace(offset, offset, text)
+
+    def delete(self, start: int, end: int) -> None:
+        self.replace(start, end, "")
+
+    def _split_at(self, offset: int) -> int:
+        """Split pieces so a boundary falls on offset; return the piece index there."""
+        position = 0
+        for i, piece in enumerate(self._pieces):
+            if offset == position:
+                return i
+            if offset < position + piece.length:
+                left, right = piece.split(offset - position)
+                self._pieces[i:i + 1] = [left, right]
+                return i + 1
+            position += piece.length
+        return len(self._pieces)
+
+    def _insert(self, offset: int, text: str) -> None:
+        index = self._split_at(offset)
+        self._pieces.insert(index, _Piece(_Buffer(text), 0, len(text)))
+
+    def _delete(self, start: int, end: int) -> None:
+        first = self._split_at(start)
+        last = self._split_at(end)
+        del self._pieces[first:last]
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._snapshot = None
+        if len(self._pieces) > MAX_PIECES:
+            text = "".join(p.text() for p in self._pieces)
+            self._pieces = [_Piece(_Buffer(text), 0, len(text))]
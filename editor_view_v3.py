@@ -15,8 +15,17 @@ from ai_assistant import AIAssistant
 from ai_menu import AIActionDialog, AIResultDialog
 from ai_file_operations import AIFileOperations
 from project_search import ProjectSearchWindow
+from quick_open import QuickOpenWindow, get_path_index
+from symbol_index import SymbolPickerWindow, get_symbol_index
 from goto_definition import GotoDefinition, setup_goto_definition_bindings
+from language_service import get_language_service
+from lsp_client import EditorSync
+from file_watcher import FileWatcher
+from search_index import get_index
+from event_bus import event_bus, Events
+from config import config
 import os
+import sqlite3
 import shlex
 import shutil
 from typing import Optional, Callable
@@ -35,6 +44,7 @@ class ModernMenuBar(ctk.CTkFrame):
             ("File", [
                 ("New Tab", lambda: app.tab_manager.new_tab()),
                 ("Open", app.open_file),
+                ("Go to File...", app.open_quick_open),
                 ("Save", app.save_file),
                 ("Save As", app.save_file_as),
                 None,
@@ -46,6 +56,7 @@ class ModernMenuBar(ctk.CTkFrame):
                 ("Find & Replace", app.open_find_replace_window),
                 ("Search in Project", app.open_project_search),
                 None,
+                ("Go to Symbol in Workspace...", app.open_symbol_picker),
                 ("Goto Definition", app.handle_goto_definition),
                 ("Find References", app.find_references)
             ]),
@@ -172,6 +183,8 @@ class App(ctk.CTk):
         
         self.file_tree = VSCodeFileTree(self.explorer_panel, self)
         self.file_tree.grid(row=0, column=0, sticky="nsew")
+        self.workspace_watcher = None
+        self.watch_workspace(self.file_tree.current_path)
         
         self.sections = VSCodeSections(self.explorer_panel)
         self.sections.grid(row=1, column=0, sticky="ew")
@@ -216,19 +229,15 @@ class App(ctk.CTk):
             self.tab_manager.text_area,
             self.open_file_at_line
         )
-        setup_goto_definition_bindings(
-            self.tab_manager.text_area,
-            self.handle_goto_definition
-        )
+        # Each tab may own its editor, bind every one of them
+        self.tab_manager.add_editor_listener(self._bind_editor)
         
         self.update_status_bar()
         
-        # Bindings
-        self.tab_manager.text_area.bind("<KeyRelease>", self.update_status_bar)
-        self.tab_manager.text_area.bind("<Button-1>", self.update_status_bar)
-        
         # Shortcuts
         self.bind("<Control-o>", lambda e: self.open_file())
+        self.bind("<Control-p>", lambda e: self.open_quick_open())
+        self.bind("<Control-t>", lambda e: self.open_symbol_picker())
         self.bind("<Control-s>", lambda e: self.save_file())
         self.bind("<Control-n>", lambda e: self.tab_manager.new_tab())
         self.bind("<Control-w>", lambda e: self.tab_manager.close_tab(self.tab_manager.current_tab_index))
@@ -394,6 +403,7 @@ class App(ctk.CTk):
             self.status_bar.set_file_path(file_path)
             self.terminal.set_working_directory(os.path.dirname(file_path))
             self.file_tree.load_directory(os.path.dirname(file_path))
+            self.watch_workspace(os.path.dirname(file_path))
             logger.info(f"Opened: {file_path}")
             self.feedback.show_success(f"Opened: {os.path.basename(file_path)}")
         except UnicodeDecodeError:
@@ -423,7 +433,7 @@ class App(ctk.CTk):
             return
         
         try:
-            content = self.tab_manager.text_area.get("1.0", "end-1c")
+            content = self.tab_manager.text_area.get_text()
             
             # Create backup before saving
             if os.path.exists(tab.file_path):
@@ -438,6 +448,7 @@ class App(ctk.CTk):
             
             tab.modified = False
             tab.content = content
+            self.tab_manager.text_area.highlighter.remember(content)
             self.tab_manager.update_tab_title()
             self.status_bar.set_file_path(f"Saved: {tab.file_path}")
             logger.info(f"Saved: {tab.file_path}")
@@ -466,6 +477,11 @@ class App(ctk.CTk):
             cursor_pos = self.tab_manager.text_area.index(ctk.INSERT)
             line, col = cursor_pos.split('.')
             self.status_bar.set_line_col(line, int(col) + 1)
+            sync = getattr(self.tab_manager.text_area, "lsp_sync", None)
+            message = sync.message_at(cursor_pos) if sync else ""
+            if message or sync and sync.diagnostics:
+                tab = self.tab_manager.get_current_tab()
+                self.status_bar.set_file_path(message or (tab.file_path if tab else ""))
         except (tk.TclError, ValueError, AttributeError):
             pass
 
@@ -510,10 +526,12 @@ class App(ctk.CTk):
         
 Ctrl+N - New Tab
 Ctrl+O - Open File
+Ctrl+P - Go to File
 Ctrl+S - Save File
 Ctrl+W - Close Tab
 Ctrl+F - Find & Replace
 Ctrl+Shift+F - Search in Project
+Ctrl+T - Go to Symbol in Workspace
 F12 - Goto Definition
 Ctrl+Click - Goto Definition"""
         messagebox.showinfo("Shortcuts", shortcuts)
@@ -522,7 +540,7 @@ Ctrl+Click - Goto Definition"""
         try:
             return self.tab_manager.text_area.get("sel.first", "sel.last")
         except tk.TclError:
-            return self.tab_manager.text_area.get("1.0", "end-1c")
+            return self.tab_manager.text_area.get_text()
 
     def _insert_text_at_cursor(self, text: str) -> None:
         try:
@@ -539,13 +557,72 @@ Ctrl+Click - Goto Definition"""
         self.feedback.show_success("AI completed")
         self._show_ai_result(title, result, allow_insert)
 
-    def open_project_search(self):
+    def watch_workspace(self, path):
+        """Watch the explorer root so the tree and search index stay fresh."""
+        if path:
+            get_language_service(path).start_preload()
+        if not path or not config.get_bool('WATCHER_ENABLED', True):
+            return
+        path = os.path.abspath(path)
+        if self.workspace_watcher and self.workspace_watcher.root == path:
+            return
+        if self.workspace_watcher:
+            self.workspace_watcher.stop()
+            get_index(self.workspace_watcher.root).watched = False
+            get_symbol_index(self.workspace_watcher.root).watched = False
+        
+        index = get_index(path)
+        paths = get_path_index(path)
+        symbols = get_symbol_index(path)
+        
+        def on_changes(changes):
+            # Watcher thread: index updates read files, keep them off the UI thread
+            try:
+                index.apply_changes(changes)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Search index update failed: {e}")
+            try:
+                paths.apply_changes(changes)
+            except OSError as e:
+                logger.warning(f"Quick open index update failed: {e}")
+            try:
+                symbols.apply_changes(changes)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Symbol index update failed: {e}")
+            self.after(0, lambda: event_bus.emit(Events.FILES_CHANGED, changes))
+        
+        self.workspace_watcher = FileWatcher(
+            path, on_changes,
+            debounce_ms=config.get_int('WATCHER_DEBOUNCE_MS', 200),
+            poll_interval=config.get_int('WATCHER_POLL_S', 2)
+        )
+        self.workspace_watcher.start()
+        index.watched = True
+        symbols.watched = True
+
+    def open_project_search(self, **options):
+        """Open the project search window; options prefill and run a query."""
         tab = self.tab_manager.get_current_tab()
         if tab and tab.file_path:
             workspace = os.path.dirname(tab.file_path)
         else:
             workspace = os.getcwd()
-        ProjectSearchWindow(self, workspace, self.open_file_at_line).grab_set()
+        ProjectSearchWindow(self, workspace, self.open_file_at_line, **options).grab_set()
+
+    def workspace_root(self):
+        """The explorer's folder, else the current file's folder."""
+        if self.file_tree.current_path:
+            return self.file_tree.current_path
+        tab = self.tab_manager.get_current_tab()
+        return os.path.dirname(tab.file_path) if tab and tab.file_path else os.getcwd()
+
+    def open_quick_open(self):
+        """Open the Ctrl+P file finder for the workspace."""
+        QuickOpenWindow(self, self.workspace_root(), self.open_file).grab_set()
+
+    def open_symbol_picker(self):
+        """Open the Ctrl+T symbol finder for the workspace."""
+        SymbolPickerWindow(self, self.workspace_root(), self.open_file_at_line).grab_set()
 
     def open_file_at_line(self, file_path, line_num=1):
         self.open_file(file_path)
@@ -559,11 +636,34 @@ Ctrl+Click - Goto Definition"""
         except (tk.TclError, AttributeError):
             pass
 
+    def _bind_editor(self, editor):
+        setup_goto_definition_bindings(editor, self.handle_goto_definition)
+        # Keep the file open in its language server for diagnostics
+        editor.lsp_sync = EditorSync(editor)
+        # Text's own Ctrl+P (line up) and Ctrl+T (transpose) would run first
+        editor.bind("<Control-p>", lambda e: self.open_quick_open() or "break")
+        editor.bind("<Control-t>", lambda e: self.open_symbol_picker() or "break")
+        editor.bind("<KeyRelease>", self.update_status_bar)
+        editor.bind("<Button-1>", self.update_status_bar)
+
     def handle_goto_definition(self):
-        if not self.goto_def.goto_definition():
+        self.goto_def.text_widget = self.tab_manager.text_area
+        if self.goto_def.goto_definition():
+            return
+        # Jedi only sees this buffer and its imports; try the workspace symbols
+        try:
+            word = self.tab_manager.text_area.get("insert wordstart", "insert wordend").strip()
+            index = get_symbol_index(self.workspace_root())
+            symbols = index.lookup(word) if word and index.built else []
+        except (tk.TclError, sqlite3.Error, OSError):
+            symbols = []
+        if symbols:
+            self.open_file_at_line(symbols[0].path, symbols[0].line)
+        else:
             self.status_bar.set_file_path("No definition found")
 
     def find_references(self):
+        self.goto_def.text_widget = self.tab_manager.text_area
         references = self.goto_def.find_symbol_references()
         if references:
             result = f"Found {len(references)} references:\n\n"
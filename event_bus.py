@@ -34,6 +34,8 @@ class Events:
     FILE_OPENED = "file_opened"
     FILE_SAVED = "file_saved"
     FILE_CLOSED = "file_closed"
+    # Batched workspace changes from the file watcher: {path: kind}
+    FILES_CHANGED = "files_changed"
     
     # Tab events
     TAB_CHANGED = "tab_changed"
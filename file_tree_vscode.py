@@ -3,7 +3,10 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk
 import os
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+from event_bus import event_bus, Events
+from file_watcher import RESCAN
+from workspace_files import get_workspace_files
 
 
 class VSCodeFileTree(ctk.CTkFrame):
@@ -96,6 +99,8 @@ class VSCodeFileTree(ctk.CTkFrame):
         self.tree.bind("<Double-1>", self.on_double_click)
         self.tree.bind("<Button-1>", self.on_click)
         
+        event_bus.subscribe(Events.FILES_CHANGED, self.apply_changes)
+        
         # Load default path
         try:
             default_path = os.getcwd()
@@ -176,41 +181,79 @@ class VSCodeFileTree(ctk.CTkFrame):
         
         self._populate_tree("", path)
     
+    def _list_directory(self, path: str) -> List[Tuple[str, str]]:
+        """Return (name, kind) entries in display order: folders, then files."""
+        entries = get_workspace_files(self.current_path or path).list_dir(path, hidden=False)
+        return [(entry.name, "folder" if entry.is_dir else "file") for entry in entries]
+    
+    def _insert_node(self, parent: str, path: str, name: str, kind: str, index="end") -> None:
+        """Insert one node; the item id is the path so watcher updates can find it."""
+        if kind == "folder":
+            icon = self.icons["folder"]
+            node = self.tree.insert(
+                parent, index, iid=path,
+                text=f"  {icon} {name}",
+                values=[path, "folder"],
+                open=False
+            )
+            # Add dummy child for lazy loading
+            self.tree.insert(node, "end", text="")
+        else:
+            ext = os.path.splitext(name)[1]
+            icon = self.icons.get(ext, self.icons["file"])
+            self.tree.insert(
+                parent, index, iid=path,
+                text=f"  {icon} {name}",
+                values=[path, "file"]
+            )
+    
     def _populate_tree(self, parent: str, path: str) -> None:
         """Populate tree with files and folders."""
         try:
-            items = sorted(os.listdir(path))
-            
-            # Separate folders and files
-            folders = [i for i in items if os.path.isdir(os.path.join(path, i)) and not i.startswith(".")]
-            files = [i for i in items if os.path.isfile(os.path.join(path, i)) and not i.startswith(".")]
-            
-            # Add folders first
-            for item in folders:
-                item_path = os.path.join(path, item)
-                icon = self.icons["folder"]
-                node = self.tree.insert(
-                    parent, "end",
-                    text=f"  {icon} {item}",
-                    values=[item_path, "folder"],
-                    open=False
-                )
-                # Add dummy child for lazy loading
-                self.tree.insert(node, "end", text="")
-            
-            # Add files
-            for item in files:
-                item_path = os.path.join(path, item)
-                ext = os.path.splitext(item)[1]
-                icon = self.icons.get(ext, self.icons["file"])
-                self.tree.insert(
-                    parent, "end",
-                    text=f"  {icon} {item}",
-                    values=[item_path, "file"]
-                )
+            for name, kind in self._list_directory(path):
+                self._insert_node(parent, os.path.join(path, name), name, kind)
         except (PermissionError, OSError):
             pass
     
+    def apply_changes(self, changes: Dict[str, str]) -> None:
+        """Update only the loaded directories touched by a batch of file changes."""
+        if not self.current_path or not changes:
+            return
+        if RESCAN in changes.values():
+            self.refresh()
+            return
+        
+        root = os.path.abspath(self.current_path)
+        directories = set()
+        for path, kind in changes.items():
+            if kind != "modified":
+                directories.add(os.path.dirname(path))
+        
+        for directory in directories:
+            if directory == root:
+                self._sync_directory("", directory)
+            elif self.tree.exists(directory):
+                children = self.tree.get_children(directory)
+                # Unexpanded folders still hold the lazy-loading dummy
+                if not (len(children) == 1 and not self.tree.item(children[0], "text")):
+                    self._sync_directory(directory, directory)
+    
+    def _sync_directory(self, parent: str, path: str) -> None:
+        """Insert and delete child nodes so parent matches the directory on disk."""
+        try:
+            entries = self._list_directory(path)
+        except OSError:
+            entries = []
+        wanted = {os.path.join(path, name) for name, _ in entries}
+        
+        for child in self.tree.get_children(parent):
+            if child not in wanted:
+                self.tree.delete(child)
+        for index, (name, kind) in enumerate(entries):
+            child = os.path.join(path, name)
+            if not self.tree.exists(child):
+                self._insert_node(parent, child, name, kind, index)
+    
     def on_open(self, event: tk.Event) -> None:
         """Handle folder expansion."""
         try:
@@ -0,0 +1,257 @@
+"""Workspace file watcher: inotify on Linux, mtime/size polling elsewhere."""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from logger import logger
+from workspace_files import WorkspaceFiles, get_workspace_files
+
+# Change kinds
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+RESCAN = "rescan"  # Events were lost, consumers should rescan the root
+
+# inotify flags, see inotify(7)
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+_EVENT = struct.Struct("iIII")
+
+
+def merge_change(previous: Optional[str], kind: str) -> str:
+    """Combine two changes to the same path inside one batch."""
+    if previous is None or kind == RESCAN:
+        return kind
+    if previous == CREATED:
+        return DELETED if kind == DELETED else CREATED
+    if previous == DELETED and kind == CREATED:
+        return MODIFIED
+    return kind
+
+
+def scan_tree(root: str, files: Optional[WorkspaceFiles] = None) -> Dict[str, Tuple[float, int]]:
+    """Return {path: (mtime, size)} for every file and directory in the workspace."""
+    files = files or get_workspace_files(root)
+    found = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = files.list_dir(directory)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir:
+                stack.append(entry.path)
+                found[entry.path] = (0.0, -1)
+                continue
+            try:
+                stat = os.stat(entry.path)
+            except OSError:
+                continue
+            found[entry.path] = (stat.st_mtime, stat.st_size)
+    return found
+
+
+def diff_scans(old: Dict[str, Tuple[float, int]], new: Dict[str, Tuple[float, int]]) -> Dict[str, str]:
+    """Return the changes between two scan_tree() results."""
+    changes = {path: DELETED for path in old.keys() - new.keys()}
+    for path, signature in new.items():
+        previous = old.get(path)
+        if previous is None:
+            changes[path] = CREATED
+        elif previous != signature:
+            changes[path] = MODIFIED
+    return changes
+
+
+class _Inotify:
+    """Minimal ctypes binding for inotify, watching a directory tree."""
+
+    def __init__(self, files: WorkspaceFiles) -> None:
+        self.files = files
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+
+    def watch_tree(self, root: str) -> None:
+        """Watch root and every directory below it."""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, "inotify watch limit reached")
+                continue
+            self.watches[wd] = directory
+            try:
+                stack.extend(entry.path for entry in self.files.list_dir(directory) if entry.is_dir)
+            except OSError:
+                continue
+
+    def read(self):
+        """Yield (path, mask) for every pending event."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            directory = self.watches.get(wd)
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            if mask & IN_Q_OVERFLOW or directory is None:
+                yield None, mask
+                continue
+            yield (os.path.join(directory, os.fsdecode(name)) if name else directory), mask
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Watch a workspace and report batched, debounced changes.
+
+    `callback(changes)` runs on the watcher thread with a {path: kind} dict,
+    once events have been quiet for debounce_ms (or after max_latency_ms
+    of continuous events). Callers that touch Tk must marshal with after().
+    """
+
+    def __init__(self, root: str, callback: Callable[[Dict[str, str]], None],
+                 debounce_ms: int = 200, max_latency_ms: int = 1000,
+                 poll_interval: float = 2.0, use_inotify: bool = True) -> None:
+        self.root = os.path.abspath(root)
+        self.callback = callback
+        self.debounce = debounce_ms / 1000.0
+        self.max_latency = max_latency_ms / 1000.0
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.backend: Optional[str] = None
+        self.files = get_workspace_files(self.root)
+        self._pending: Dict[str, str] = {}
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start watching on a background thread (watch setup included)."""
+        self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify(self.files)
+                inotify.watch_tree(self.root)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable, polling {self.root}: {e}")
+                if inotify is not None:
+                    inotify.close()
+                inotify = None
+
+        self.backend = "inotify" if inotify else "polling"
+        logger.info(f"Watching {self.root} ({self.backend})")
+        if inotify:
+            self._run_inotify(inotify)
+        else:
+            self._run_polling()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _add(self, path: str, kind: str) -> None:
+        now = time.monotonic()
+        if not self._pending:
+            self._first_event = now
+        self._last_event = now
+        self._pending[path] = merge_change(self._pending.get(path), kind)
+
+    def _due(self) -> bool:
+        now = time.monotonic()
+        return bool(self._pending) and (now - self._last_event >= self.debounce
+                                        or now - self._first_event >= self.max_latency)
+
+    def _flush(self) -> None:
+        changes, self._pending = self._pending, {}
+        try:
+            self.callback(changes)
+        except Exception as e:
+            logger.error(f"File watcher callback error: {e}")
+
+    def _run_inotify(self, inotify: _Inotify) -> None:
+        try:
+            while not self._stop.is_set():
+                timeout = self.debounce if self._pending else 0.5
+                ready, _, _ = select.select([inotify.fd], [], [], timeout)
+                if ready:
+                    for path, mask in inotify.read():
+                        self._on_inotify(inotify, path, mask)
+                if self._due():
+                    self._flush()
+        finally:
+            inotify.close()
+
+    def _on_inotify(self, inotify: _Inotify, path: Optional[str], mask: int) -> None:
+        if path is None:
+            self._add(self.root, RESCAN)
+        elif self.files.is_ignored(path, bool(mask & IN_ISDIR)):
+            return
+        elif mask & (IN_CREATE | IN_MOVED_TO):
+            if mask & IN_ISDIR:
+                try:
+                    inotify.watch_tree(path)
+                except OSError:
+                    self._add(self.root, RESCAN)
+            self._add(path, CREATED)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self._add(path, DELETED)
+        elif mask & IN_DELETE_SELF:
+            if path == self.root:
+                self._add(path, DELETED)
+        elif not mask & IN_ISDIR:
+            self._add(path, MODIFIED)
+
+    def _run_polling(self) -> None:
+        snapshot = scan_tree(self.root, self.files)
+        while not self._stop.wait(self.poll_interval):
+            current = scan_tree(self.root, self.files)
+            for path, kind in diff_scans(snapshot, current).items():
+                self._add(path, kind)
+            snapshot = current
+            if self._pending:
+                self._flush()
@@ -1,5 +1,8 @@
 import customtkinter
 
+from project_replace import plan_text, apply_to_widget
+from search_engine import SearchQuery
+
 
 class FindReplaceWindow(customtkinter.CTkToplevel):
     def __init__(self, master, text_widget, **kwargs):
@@ -68,7 +71,8 @@ class FindReplaceWindow(customtkinter.CTkToplevel):
         if not find_text:
             return
         
-        content = self.text_widget.get("1.0", "end")
-        new_content = content.replace(find_text, replace_text)
-        self.text_widget.delete("1.0", "end")
-        self.text_widget.insert("1.0", new_content)
+        # Replace only the matched ranges so undo, marks and highlighting survive
+        content = self.text_widget.get("1.0", "end-1c")
+        plan = plan_text(SearchQuery(find_text, case_sensitive=True), replace_text, content)
+        if plan is not None:
+            apply_to_widget(self.text_widget, plan)
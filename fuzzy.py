@@ -0,0 +1,332 @@
+"""Fuzzy matching: subsequence scoring with word-boundary bonuses."""
+import heapq
+import re
+from bisect import bisect_right
+import string
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+SCORE_MATCH = 1.0
+BONUS_CONSECUTIVE = 5.0
+BONUS_BOUNDARY = 8.0
+BONUS_NAME = 2.0        # Per character matched in the last segment (file or symbol name)
+BONUS_NAME_START = 6.0  # First character of the last segment
+PENALTY_GAP = 0.2       # Per skipped character between matches, capped per gap
+MAX_GAP_PENALTY = 3.0
+PENALTY_LENGTH = 0.01   # Per character of the candidate, so shorter ones win ties
+
+SEPARATORS = "/\\_-. :"
+
+
+def name_start(text: str) -> int:
+    """Offset of the last path segment."""
+    return max(text.rfind("/"), text.rfind("\\")) + 1
+
+
+def is_boundary(text: str, i: int) -> bool:
+    """Whether text[i] starts a word: after a separator or at a camelCase hump."""
+    if i == 0:
+        return True
+    previous = text[i - 1]
+    if previous in SEPARATORS:
+        return True
+    current = text[i]
+    return (previous.islower() and current.isupper()) or (previous.isalpha() and current.isdigit())
+
+
+def score_positions(text: str, positions: List[int], start: int) -> float:
+    """Score matched positions in text; start is where the name segment begins."""
+    score = 0.0
+    previous = -2
+    run_bonus = 0.0  # A run of consecutive matches keeps the bonus of its first character
+    for i in positions:
+        score += SCORE_MATCH
+        if i == previous + 1:
+            score += max(BONUS_CONSECUTIVE, run_bonus)
+        else:
+            run_bonus = BONUS_BOUNDARY if is_boundary(text, i) else 0.0
+            score += run_bonus
+        if previous >= 0 and i > previous + 1:
+            score -= min((i - previous - 1) * PENALTY_GAP, MAX_GAP_PENALTY)
+        if i >= start:
+            score += BONUS_NAME
+            if i == start:
+                score += BONUS_NAME_START
+        previous = i
+    return score - len(text) * PENALTY_LENGTH
+
+
+def _forward(query: str, lower: str, begin: int) -> Optional[List[int]]:
+    positions = []
+    find = lower.find
+    i = begin - 1
+    for char in query:
+        i = find(char, i + 1)
+        if i < 0:
+            return None
+        positions.append(i)
+    return positions
+
+
+def _backward(query: str, lower: str) -> Optional[List[int]]:
+    positions = []
+    rfind = lower.rfind
+    i = len(lower)
+    for char in reversed(query):
+        i = rfind(char, 0, i)
+        if i < 0:
+            return None
+        positions.append(i)
+    positions.reverse()
+    return positions
+
+
+def fuzzy_match(query: str, text: str, lower: Optional[str] = None,
+                start: Optional[int] = None) -> Optional[Tuple[float, List[int]]]:
+    """Score text against a lowercase query; None unless query is a subsequence.
+
+    A few cheap alignments are scored and the best one kept: the query as
+    a substring, a left-to-right match inside the name segment, and the
+    leftmost and rightmost subsequences of the whole text. This is not
+    the optimal alignment, but it finds the ones people type for.
+    """
+    if lower is None:
+        lower = text.lower()
+    if start is None:
+        start = name_start(text)
+    forward = _forward(query, lower, 0)
+    if forward is None:
+        return None
+
+    alignments = [forward]
+    contiguous = lower.rfind(query)
+    if contiguous >= 0:
+        alignments.append(list(range(contiguous, contiguous + len(query))))
+    if start and forward[0] < start:
+        in_name = _forward(query, lower, start)
+        if in_name is not None:
+            alignments.append(in_name)
+        backward = _backward(query, lower)
+        if backward is not None and backward != forward:
+            alignments.append(backward)
+
+    best = None
+    for positions in alignments:
+        score = score_positions(text, positions, start)
+        if best is None or score > best[0]:
+            best = (score, positions)
+    return best
+
+
+# Candidates scored per query when the character filter leaves more
+MAX_CANDIDATES = 2500
+# Substring hits looked at for a capped query before falling back to the rest
+MAX_SUBSTRING_HITS = MAX_CANDIDATES
+
+# Characters whose bitsets are computed on load rather than on first use
+PREWARM_CHARS = string.ascii_lowercase + string.digits + "._-/"
+
+# Bit offsets set in each byte value, for walking a bitset a byte at a time
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+def iter_bits(bits: int, size: int) -> Iterator[int]:
+    """Yield the offsets of the set bits, lowest first."""
+    data = bits.to_bytes((size + 7) // 8, "little")
+    for match in _NONZERO.finditer(data):
+        base = match.start() * 8
+        for bit in _BYTE_BITS[data[match.start()]]:
+            yield base + bit
+
+
+class _LastSearch(NamedTuple):
+    query: str
+    generation: int
+    matched: Optional[List[int]]  # Every matching slot, or None if candidates were capped
+
+
+class FuzzyIndex:
+    """Strings searchable with fuzzy_match at interactive speed.
+
+    Each string keeps a slot. For every query character the index caches
+    a bitset of the slots whose string contains it, so one AND per
+    character narrows hundreds of thousands of strings to the ones worth
+    scoring. When a query only extends the previous one and that search
+    scored every candidate, the new search re-ranks the previous matches
+    instead. When more than MAX_CANDIDATES remain, strings containing the
+    query as a substring are scored first, found with one scan of all the
+    lowercased strings joined together and, like matches, narrowed rather
+    than rescanned while the query grows. Not thread-safe; owners lock
+    around it.
+    """
+
+    def __init__(self, name_start: Callable[[str], int] = name_start) -> None:
+        self.name_start = name_start
+        self.load([])
+
+    def load(self, texts: Iterable[str]) -> None:
+        """Replace the contents; texts get slots 0, 1, ... in order."""
+        self.texts: List[Optional[str]] = list(texts)
+        self._lower = [text.lower() for text in self.texts]
+        self._starts = [self.name_start(text) for text in self.texts]
+        self._alive = (1 << len(self.texts)) - 1
+        self._count = len(self.texts)
+        self._contains: Dict[str, int] = {}
+        self._generation = 0
+        self._last: Optional[_LastSearch] = None
+        self._joined: Optional[str] = None  # Lowercased texts, one per line
+        self._offsets: List[int] = []
+        # (query, generation, hits, offset to resume the scan at or None if it finished)
+        self._last_hits: Optional[Tuple[str, int, List[int], Optional[int]]] = None
+
+        # Slots whose name segment starts with each character, in one pass
+        size = (len(self.texts) + 7) // 8
+        arrays: Dict[str, bytearray] = {}
+        for slot, (lower, start) in enumerate(zip(self._lower, self._starts)):
+            char = lower[start:start + 1]
+            array = arrays.get(char)
+            if array is None:
+                array = arrays[char] = bytearray(size)
+            array[slot >> 3] |= 1 << (slot & 7)
+        self._name_first = {char: int.from_bytes(array, "little") for char, array in arrays.items()}
+        for char in PREWARM_CHARS:
+            self._chars(char)
+        if len(self.texts) > MAX_CANDIDATES:
+            self._join()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size(self) -> int:
+        """Slots in use, including removed ones."""
+        return len(self.texts)
+
+    def add(self, text: str) -> int:
+        """Add text and return its slot."""
+        slot = len(self.texts)
+        lower = text.lower()
+        start = self.name_start(text)
+        self.texts.append(text)
+        self._lower.append(lower)
+        self._starts.append(start)
+        bit = 1 << slot
+        self._alive |= bit
+        for char in self._contains:
+            if char in lower:
+                self._contains[char] |= bit
+        char = lower[start:start + 1]
+        self._name_first[char] = self._name_first.get(char, 0) | bit
+        self._count += 1
+        self._generation += 1
+        return slot
+
+    def remove(self, slot: int) -> None:
+        if self.texts[slot] is None:
+            return
+        self.texts[slot] = None
+        self._alive &= ~(1 << slot)  # Cached bitsets are always ANDed with _alive
+        self._count -= 1
+        self._generation += 1
+
+    def _chars(self, char: str) -> int:
+        bits = self._contains.get(char)
+        if bits is None:
+            bits = int("".join("1" if char in lower else "0" for lower in reversed(self._lower)) or "0", 2)
+            self._contains[char] = bits
+        return bits
+
+    def _join(self) -> None:
+        self._joined = "\n".join(self._lower) + "\n"
+        self._offsets = []
+        offset = 0
+        for lower in self._lower:
+            self._offsets.append(offset)
+            offset += len(lower) + 1
+
+    def _substring_hits(self, query: str) -> List[int]:
+        """Slots whose string contains query, in order: all of them, or the first MAX_SUBSTRING_HITS.
+
+        A query extending the previous one filters its hits and, if that
+        scan stopped early, resumes it where it stopped.
+        """
+        if self._joined is None or len(self._lower) - len(self._offsets) > MAX_CANDIDATES:
+            self._join()
+            self._last_hits = None
+        last = self._last_hits
+        if last and last[1] == self._generation and query.startswith(last[0]):
+            lowers = self._lower
+            hits = [slot for slot in last[2] if query in lowers[slot]]
+            resume = last[3]
+        else:
+            hits, resume = [], 0
+
+        offsets, texts = self._offsets, self.texts
+        find = self._joined.find
+        while resume is not None and len(hits) < MAX_SUBSTRING_HITS:
+            i = find(query, resume)
+            if i < 0:
+                resume = None
+                break
+            slot = bisect_right(offsets, i) - 1
+            if texts[slot] is not None:
+                hits.append(slot)
+            resume = offsets[slot + 1] if slot + 1 < len(offsets) else None
+        self._last_hits = (query, self._generation, hits, resume)
+        if resume is None:
+            # Strings added since the join was built
+            hits = hits + [slot for slot in range(len(offsets), len(self._lower))
+                           if texts[slot] is not None and query in self._lower[slot]]
+        return hits
+
+    def _candidates(self, query: str) -> Tuple[List[int], bool]:
+        """Return (slots to score, whether that is every possible match)."""
+        last = self._last
+        if (last and last.matched is not None and last.generation == self._generation
+                and query.startswith(last.query)):
+            return last.matched, True
+
+        bits = self._alive
+        for char in set(query):
+            bits &= self._chars(char)
+        if bits.bit_count() <= MAX_CANDIDATES:
+            return list(iter_bits(bits, self.size)), True
+
+        # Too many to score. Contiguous matches score best, so take substring
+        # hits first, those in the name segment ahead of the rest; then names
+        # starting with the first character, then anything
+        lowers, starts = self._lower, self._starts
+        in_name, elsewhere = [], []
+        for slot in self._substring_hits(query):
+            (in_name if lowers[slot].rfind(query) >= starts[slot] else elsewhere).append(slot)
+        candidates = (in_name + elsewhere)[:MAX_CANDIDATES]
+        if len(candidates) >= MAX_CANDIDATES:
+            return candidates, False
+        taken = bytearray((self.size + 7) // 8)
+        for slot in candidates:
+            taken[slot >> 3] |= 1 << (slot & 7)
+        bits &= ~int.from_bytes(taken, "little")
+        preferred = bits & self._name_first.get(query[0], 0)
+        for group in (preferred, bits & ~preferred):
+            for slot in iter_bits(group, self.size):
+                candidates.append(slot)
+                if len(candidates) >= MAX_CANDIDATES:
+                    return candidates, False
+        return candidates, False
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[float, int, List[int]]]:
+        """Return (score, slot, positions) for the best matches of a lowercase query."""
+        if not query:
+            return []
+        candidates, complete = self._candidates(query)
+        texts, lowers, starts = self.texts, self._lower, self._starts
+        scored = []
+        matched = []
+        for slot in candidates:
+            result = fuzzy_match(query, texts[slot], lowers[slot], starts[slot])
+            if result is not None:
+                matched.append(slot)
+                scored.append((result[0], -slot, result[1]))
+        self._last = _LastSearch(query, self._generation, matched if complete else None)
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], item[1]))
+        return [(score, -negative, positions) for score, negative, positions in best]
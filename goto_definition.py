@@ -1,7 +1,9 @@
 """Goto definition functionality using Jedi."""
-import jedi
 import customtkinter
 import tkinter
+from language_service import service_for
+from logger import logger
+from lsp_client import LspError, client_for
 
 
 class GotoDefinition:
@@ -15,23 +17,24 @@ class GotoDefinition:
         """Jump to definition of symbol under cursor."""
         try:
             # Get code and cursor position
-            code = self.text_widget.get("1.0", "end-1c")
+            code = self.text_widget.get_text()
             cursor_pos = self.text_widget.index(customtkinter.INSERT)
             line, col = map(int, cursor_pos.split('.'))
             
-            # Use Jedi to find definition
-            script = jedi.Script(code)
-            definitions = script.goto(line=line, column=col)
+            # The file's language server, else the workspace's Jedi project
+            path = getattr(self.text_widget, "file_path", None)
+            version = getattr(self.text_widget, "edit_version", None)
+            definitions = self._query("definition", "goto", code, line, col, path, version)
             
             if not definitions:
                 # Try to find references if no definition
-                definitions = script.get_references(line=line, column=col)
+                definitions = self._query("references", "references", code, line, col, path, version)
             
             if definitions:
                 definition = definitions[0]
                 
                 # Check if definition is in another file
-                if definition.module_path:
+                if definition.module_path and str(definition.module_path) != str(path):
                     file_path = str(definition.module_path)
                     line_num = definition.line
                     
@@ -47,9 +50,27 @@ class GotoDefinition:
                 return False
                 
         except Exception as e:
-            print(f"Goto definition error: {e}")
+            logger.warning(f"Goto definition error: {e}")
             return False
     
+    @staticmethod
+    def _query(lsp_method, jedi_method, code, line, col, path, version=None):
+        """Ask the file's language server, falling back to Jedi when it can't answer.
+
+        This runs on the Tk thread, so a server that isn't ready yet is
+        started for next time rather than waited for.
+        """
+        client = client_for(path)
+        if client is not None:
+            if client.ready.is_set():
+                try:
+                    return getattr(client, lsp_method)(path, code, line, col, version)
+                except LspError as e:
+                    logger.warning(f"Language server {lsp_method} failed, using Jedi: {e}")
+            else:
+                client.start()
+        return getattr(service_for(path), jedi_method)(code, line, col, path)
+    
     def jump_to_line(self, line_num):
         """Jump to specific line in current file."""
         try:
@@ -69,12 +90,13 @@ class GotoDefinition:
     def find_symbol_references(self):
         """Find all references to symbol under cursor."""
         try:
-            code = self.text_widget.get("1.0", "end-1c")
+            code = self.text_widget.get_text()
             cursor_pos = self.text_widget.index(customtkinter.INSERT)
             line, col = map(int, cursor_pos.split('.'))
             
-            script = jedi.Script(code)
-            references = script.get_references(line=line, column=col)
+            path = getattr(self.text_widget, "file_path", None)
+            version = getattr(self.text_widget, "edit_version", None)
+            references = self._query("references", "references", code, line, col, path, version)
             
             return references
         except Exception:
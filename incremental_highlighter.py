@@ -0,0 +1,212 @@
+"""Incremental, dirty-region syntax highlighting."""
+import tkinter
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from pygments.token import Comment, String, Text
+
+# (start_col, end_col, token_type) for every token piece on a line
+LineTokens = List[Tuple[int, int, Any]]
+# Tokens of a line plus whether lexing can safely restart at its start
+LineState = Tuple[Tuple[Tuple[int, int, Any], ...], bool]
+
+# Token types that usually span lines, so a line starting with them may be
+# in the middle of a construct rather than in the lexer's root state.
+_UNSTABLE_TYPES = (String, Comment.Multiline)
+
+
+def _is_sync_token(ttype) -> bool:
+    """Return True if a line starting with this token is a safe restart point."""
+    if ttype in Text:
+        return False
+    return not any(ttype in unstable for unstable in _UNSTABLE_TYPES)
+
+
+def iter_line_states(tokens: Iterable[Tuple[Any, str]]) -> Iterator[LineState]:
+    """Yield the state of each line of a (token_type, value) stream as soon as it ends.
+
+    A line is marked stable when a non-whitespace, non-string token starts
+    exactly at column 0, i.e. no token carries over from the previous line.
+    Consuming the states lazily lexes only as far as they are needed.
+    """
+    line: LineTokens = []
+    col = 0
+    continued = False
+
+    def closed() -> LineState:
+        stable = (not continued and bool(line) and line[0][0] == 0
+                  and _is_sync_token(line[0][2]))
+        return tuple(line), stable
+
+    for ttype, value in tokens:
+        if not value:
+            continue
+        parts = value.split("\n")
+        for i, part in enumerate(parts):
+            if i > 0:
+                yield closed()
+                line = []
+                col = 0
+                continued = i < len(parts) - 1 or bool(part)
+            if part:
+                line.append((col, col + len(part), ttype))
+                col += len(part)
+
+    yield closed()
+
+
+def split_tokens_by_line(tokens: Iterable[Tuple[Any, str]]) -> List[LineState]:
+    """Split a (token_type, value) stream into per-line token states, one per line."""
+    return list(iter_line_states(tokens))
+
+
+def lex_tokens(lexer, text: str) -> Iterable[Tuple[Any, str]]:
+    """Lex text without Pygments' newline/tab preprocessing."""
+    for _, ttype, value in lexer.get_tokens_unprocessed(text):
+        yield ttype, value
+
+
+def find_restart_line(cache: List[Optional[LineState]], dirty_start: int,
+                      max_lookback: Optional[int] = None) -> int:
+    """Return the nearest line before dirty_start whose lexer state is known.
+
+    With `max_lookback`, give up after that many lines and return the line
+    where the search stopped, so lexing warms up on the preceding context.
+    """
+    stop = 0 if max_lookback is None else max(0, dirty_start - 1 - max_lookback)
+    for line in range(dirty_start - 1, stop, -1):
+        state = cache[line - 1]
+        if state is not None and state[1]:
+            return line
+    return max(1, stop)
+
+
+def relex(lexer, read: Callable[[int, int], str], cache: List[Optional[LineState]],
+          dirty_start: int, dirty_end: int, window: int = 200,
+          max_lookback: Optional[int] = None) -> Tuple[int, List[LineState]]:
+    """Re-lex a dirty line range until the token stream re-converges.
+
+    `cache` holds one entry per current document line (None for edited or
+    not yet lexed lines) and `read(first, last)` returns the text of lines
+    first..last inclusive. Returns the first re-lexed line and the new
+    states starting at that line. Lexing also stops at the first unknown
+    line after the dirty range, since there is nothing to converge with.
+
+    Lines are lexed lazily and compared as they complete, so an edit that
+    converges right after the dirty range costs a few lines, not `window`;
+    the window only bounds the text read and grows when it is exhausted.
+    """
+    line_count = len(cache)
+    start = find_restart_line(cache, dirty_start, max_lookback)
+    end = min(line_count, dirty_end + window)
+    first_checked = max(dirty_end + 1, start + 1)
+
+    while True:
+        # The last line of a partial window may lack lookahead, skip it
+        last_checked = end if end >= line_count else end - 1
+        states: List[LineState] = []
+        for state in iter_line_states(lex_tokens(lexer, read(start, end))):
+            line = start + len(states)
+            if first_checked <= line <= last_checked:
+                cached = cache[line - 1]
+                if cached is None or (cached[1] and state == cached):
+                    return start, states
+            states.append(state)
+
+        if end >= line_count:
+            return start, states[:line_count - start + 1]
+        end = min(line_count, end + 2 * (end - start + 1))
+
+
+class IncrementalHighlighter:
+    """Track edited lines and re-highlight only the region that changed."""
+
+    def __init__(self, text_widget, highlighter, delay_ms: int = 30) -> None:
+        self.text_widget = text_widget
+        self.highlighter = highlighter
+        self.delay_ms: int = delay_ms
+        self.dirty: Optional[Tuple[int, int]] = None
+        self._after_id = None
+
+    @property
+    def has_baseline(self) -> bool:
+        """True once a full highlight pass has populated the line cache."""
+        return self.highlighter.line_states is not None and self.highlighter.lexer is not None
+
+    def on_edit(self, start: str, end: str, text: str) -> None:
+        """Splice the line cache for an edit and schedule a re-highlight.
+
+        `start` and `end` are the edited range before the change and `text`
+        is what replaced it.
+        """
+        cache = self.highlighter.line_states
+        if cache is None:
+            return
+
+        first = int(start.split(".")[0])
+        old_last = int(end.split(".")[0])
+        new_last = first + text.count("\n")
+        delta = new_last - old_last
+
+        cache[first - 1:old_last] = [None] * (new_last - first + 1)
+
+        if self.dirty is None:
+            self.dirty = (first, new_last)
+        else:
+            dirty_start, dirty_end = self.dirty
+            if dirty_end >= old_last:
+                dirty_end += delta
+            self.dirty = (min(dirty_start, first), max(dirty_end, new_last))
+        self.schedule()
+
+    def schedule(self) -> None:
+        """Coalesce pending edits into a single update."""
+        if self._after_id is None:
+            try:
+                self._after_id = self.text_widget.after(self.delay_ms, self.flush)
+            except tkinter.TclError:
+                self._after_id = None
+
+    def cancel(self) -> None:
+        """Drop pending dirty state, e.g. before a full highlight pass."""
+        if self._after_id is not None:
+            try:
+                self.text_widget.after_cancel(self._after_id)
+            except tkinter.TclError:
+                pass
+            self._after_id = None
+        self.dirty = None
+
+    def flush(self) -> None:
+        """Re-lex and re-tag the dirty region."""
+        self._after_id = None
+        if self.dirty is None or not self.has_baseline:
+            return
+
+        cache = self.highlighter.line_states
+        dirty_start, dirty_end = self.dirty
+        self.dirty = None
+        dirty_start = max(1, min(dirty_start, len(cache)))
+        dirty_end = max(dirty_start, min(dirty_end, len(cache)))
+
+        def read(first: int, last: int) -> str:
+            return self.text_widget.get(f"{first}.0", f"{last}.end")
+
+        # Partially cached large files may have no stable line nearby
+        viewport = self.highlighter.viewport
+        max_lookback = viewport.lookback if viewport.active else None
+
+        try:
+            first, states = relex(self.highlighter.lexer, read, cache, dirty_start, dirty_end,
+                                  max_lookback=max_lookback)
+        except tkinter.TclError:
+            return
+        except Exception:
+            self.highlighter.line_states = None
+            return
+
+        cache[first - 1:first - 1 + len(states)] = states
+        self.highlighter.apply_line_states(first, states)
+
+        next_line = first + len(states)
+        if next_line <= len(cache) and cache[next_line - 1] is None:
+            self.highlighter.viewport.requeue(next_line)
@@ -0,0 +1,161 @@
+"""Long-lived Jedi state per workspace for completions and navigation."""
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import jedi
+
+from config import config
+from logger import logger
+
+# Imported so often that loading them at startup beats the first completion
+DEFAULT_PRELOAD = "os,sys,re,json,typing,collections,pathlib,itertools,functools,subprocess,threading,datetime"
+
+# Virtualenv folders looked for in the workspace when JEDI_ENVIRONMENT isn't set
+VENV_DIRS = (".venv", "venv", "env")
+
+
+def find_environment(workspace_path: str) -> Optional[str]:
+    """Return the Python environment to analyse the workspace with, None for the default.
+
+    JEDI_ENVIRONMENT (a virtualenv folder or interpreter) wins; otherwise
+    a virtualenv inside the workspace. With neither, Jedi uses $VIRTUAL_ENV
+    or the interpreter running the editor.
+    """
+    configured = config.get('JEDI_ENVIRONMENT', '')
+    if configured:
+        return os.path.expanduser(configured)
+    for name in VENV_DIRS:
+        candidate = os.path.join(workspace_path, name)
+        if os.path.exists(os.path.join(candidate, "pyvenv.cfg")):
+            return candidate
+    return None
+
+
+class LanguageService:
+    """A jedi.Project for one workspace and the Script for the latest buffer.
+
+    Jedi keeps its inference state on a Script, so asking the same buffer
+    for completions, definitions and references reuses it. Scripts for
+    edited buffers share the project's environment (no new interpreter
+    subprocess) and carry the file path, so parso diff-parses small edits
+    against its cached tree instead of parsing from scratch. Jedi isn't
+    thread-safe, so every call goes through one lock.
+    """
+
+    def __init__(self, workspace_path) -> None:
+        self.workspace_path = os.path.abspath(str(workspace_path))
+        self._lock = threading.RLock()
+        self._project: Optional[jedi.Project] = None
+        self._script: Optional[jedi.Script] = None
+        self._script_source = (None, None)  # (path, code) of _script
+        self._preload_started = False
+        self.preloaded = threading.Event()
+        self.stats = {"scripts": 0, "reused": 0}
+
+    @property
+    def project(self) -> jedi.Project:
+        with self._lock:
+            if self._project is None:
+                added = [os.path.join(self.workspace_path, name) for name in ("src", "lib")
+                         if os.path.isdir(os.path.join(self.workspace_path, name))]
+                environment = find_environment(self.workspace_path)
+                try:
+                    self._project = jedi.Project(self.workspace_path, environment_path=environment,
+                                                 added_sys_path=added)
+                    self._project.get_environment()
+                except jedi.InvalidPythonEnvironment as e:
+                    logger.warning(f"Python environment {environment} unusable, using the default: {e}")
+                    self._project = jedi.Project(self.workspace_path, added_sys_path=added)
+            return self._project
+
+    def script(self, code: str, path=None) -> jedi.Script:
+        """Return a Script for code, reusing the last one if the buffer is unchanged."""
+        path = str(path) if path else None
+        with self._lock:
+            if self._script is not None and self._script_source == (path, code):
+                self.stats["reused"] += 1
+                return self._script
+            self._script = jedi.Script(code, path=path, project=self.project)
+            self._script_source = (path, code)
+            self.stats["scripts"] += 1
+            return self._script
+
+    def complete(self, code: str, line: int, column: int, path=None) -> list:
+        with self._lock:
+            return self.script(code, path).complete(line=line, column=column)
+
+    def goto(self, code: str, line: int, column: int, path=None) -> list:
+        """Definitions of the name at line/column, following imports."""
+        with self._lock:
+            return self.script(code, path).goto(line=line, column=column, follow_imports=True)
+
+    def references(self, code: str, line: int, column: int, path=None) -> list:
+        with self._lock:
+            return self.script(code, path).get_references(line=line, column=column)
+
+    def describe(self, completion) -> Tuple[str, str, str]:
+        """(type, signature, docstring) of a completion from this service.
+
+        Jedi infers these on demand, which can take long for names from
+        big libraries, so callers fetch them for one item at a time.
+        """
+        with self._lock:
+            signatures = completion.get_signatures()
+            signature = signatures[0].to_string() if signatures else ""
+            return completion.type, signature, completion.docstring(raw=True)
+
+    def preload(self, modules: Optional[List[str]] = None) -> None:
+        """Load modules into Jedi's caches now instead of on the first completion."""
+        if modules is None:
+            modules = [m.strip() for m in config.get('JEDI_PRELOAD_MODULES', DEFAULT_PRELOAD).split(",")]
+        for module in filter(None, modules):
+            code = f"import {module} as x; x."
+            try:
+                with self._lock:
+                    jedi.Script(code, project=self.project).complete(1, len(code))
+            except Exception as e:
+                logger.debug(f"Preloading {module} failed: {e}")
+        self.preloaded.set()
+
+    def start_preload(self) -> None:
+        """Preload on a background thread, once."""
+        if not self._preload_started and config.get_bool('JEDI_PRELOAD', True):
+            self._preload_started = True
+            threading.Thread(target=self.preload, name="jedi-preload", daemon=True).start()
+
+
+_services: Dict[str, LanguageService] = {}
+_services_lock = threading.Lock()
+
+
+def get_language_service(workspace_path) -> LanguageService:
+    """Return the shared language service for a workspace."""
+    key = os.path.abspath(str(workspace_path))
+    with _services_lock:
+        if key not in _services:
+            _services[key] = LanguageService(key)
+        return _services[key]
+
+
+def workspace_for(file_path=None) -> str:
+    """The workspace holding file_path: the innermost known one.
+
+    Files outside every known workspace belong to the project Jedi
+    detects around them (setup.py, .git, ...); unsaved buffers to the
+    latest workspace, else the working directory.
+    """
+    with _services_lock:
+        known = list(_services)
+    if not file_path:
+        return known[-1] if known else os.getcwd()
+    path = os.path.abspath(str(file_path))
+    inside = [root for root in known if path.startswith(root.rstrip(os.sep) + os.sep)]
+    if inside:
+        return max(inside, key=len)
+    return str(jedi.get_default_project(os.path.dirname(path)).path)
+
+
+def service_for(file_path=None) -> LanguageService:
+    """The service for the workspace holding file_path, see workspace_for."""
+    return get_language_service(workspace_for(file_path))
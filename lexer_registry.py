@@ -0,0 +1,152 @@
+"""Shared lexer resolution with cached lexer instances."""
+import fnmatch
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from pygments.lexers import get_all_lexers, get_lexer_by_name, get_lexer_for_filename, guess_lexer
+from pygments.modeline import get_filetype_from_buffer
+from pygments.util import ClassNotFound
+
+from logger import logger
+
+# Keep token offsets aligned with the text widget
+LEXER_OPTIONS = {"stripnl": False, "ensurenl": False}
+
+_SHEBANG = re.compile(r'^#!\s*(\S+)(?:\s+(\S+))?')
+
+# Filename patterns like "*.py" that only look at the extension
+_EXTENSION_PATTERN = re.compile(r'\*\.[^*.]+')
+_name_patterns: Optional[re.Pattern] = None
+
+
+def shebang_interpreter(text: str) -> str:
+    """Return the interpreter named by a shebang line, e.g. 'python3'."""
+    if not text.startswith("#!"):
+        return ""
+    match = _SHEBANG.match(text[:text.find("\n")] if "\n" in text else text)
+    if not match:
+        return ""
+    program = os.path.basename(match.group(1))
+    if program == "env" and match.group(2):
+        program = os.path.basename(match.group(2))
+    return program
+
+
+def modeline_filetype(text: str) -> str:
+    """Return the filetype declared by a vim modeline in the first or last lines."""
+    if "vi" not in text[:2000] and "vi" not in text[-2000:]:
+        return ""
+    return get_filetype_from_buffer(text[:2000] + "\n" + text[-2000:]) or ""
+
+
+@lru_cache(maxsize=1024)
+def has_name_pattern(name: str) -> bool:
+    """Whether a Pygments filename pattern matches more than name's extension.
+
+    CMakeLists.txt, Makefile.am or Dockerfile.dev pick a lexer by their
+    whole name, so they can't share a cache key with other files that
+    have the same extension.
+    """
+    global _name_patterns
+    if _name_patterns is None:
+        # Built-in lexers only: scanning plugin entry points takes ~0.5s
+        patterns = {pattern for _, _, filenames, _ in get_all_lexers(plugins=False)
+                    for pattern in filenames if not _EXTENSION_PATTERN.fullmatch(pattern)}
+        _name_patterns = re.compile("|".join(fnmatch.translate(pattern) for pattern in sorted(patterns)))
+    return _name_patterns.match(name) is not None
+
+
+class LexerRegistry:
+    """Resolve a lexer once per (extension, shebang, modeline) and reuse it.
+
+    Files that Pygments recognises by more than their extension are keyed
+    by their whole name instead.
+
+    Lookup goes modeline, file name, shebang; content sniffing over all
+    lexers is only a one-time fallback for keys nothing else resolves.
+    """
+
+    def __init__(self) -> None:
+        self._lexers: Dict[Tuple[str, str, str], object] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {"lookups": 0, "hits": 0, "seconds": 0.0, "last_ms": 0.0}
+
+    @staticmethod
+    def key(file_path: Optional[str], text: str = "") -> Tuple[str, str, str]:
+        """Return the cache key for a file: extension (or name), shebang, modeline."""
+        name = os.path.basename(file_path or "")
+        # Pygments matches file names case-sensitively: .C is C++, .c is C
+        if not has_name_pattern(name):
+            name = os.path.splitext(name)[1] or name
+        return name, shebang_interpreter(text), modeline_filetype(text)
+
+    def get_lexer(self, file_path: Optional[str], text: str = ""):
+        """Return a shared lexer instance for file_path, or None if unknown."""
+        start = time.perf_counter()
+        key = self.key(file_path, text)
+
+        with self._lock:
+            found = key in self._lexers
+            lexer = self._lexers.get(key)
+
+        if not found:
+            lexer = self._resolve(file_path, text, key)
+            # An empty buffer can't be sniffed yet, retry once it has content
+            if lexer is not None or text.strip():
+                with self._lock:
+                    self._lexers[key] = lexer
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.stats["lookups"] += 1
+            self.stats["hits"] += 1 if found else 0
+            self.stats["seconds"] += elapsed
+            self.stats["last_ms"] = elapsed * 1000
+        if not found:
+            name = type(lexer).__name__ if lexer else "none"
+            logger.debug(f"Lexer for {key}: {name} ({elapsed * 1000:.1f}ms)")
+        return lexer
+
+    def clear(self) -> None:
+        """Forget resolved lexers."""
+        with self._lock:
+            self._lexers.clear()
+
+    def _resolve(self, file_path: Optional[str], text: str, key: Tuple[str, str, str]):
+        _, interpreter, filetype = key
+
+        if filetype:
+            try:
+                return get_lexer_by_name(filetype, **LEXER_OPTIONS)
+            except ClassNotFound:
+                pass
+
+        if file_path:
+            try:
+                return get_lexer_for_filename(file_path, **LEXER_OPTIONS)
+            except ClassNotFound:
+                pass
+
+        if interpreter:
+            for alias in (interpreter, interpreter.rstrip("0123456789.")):
+                try:
+                    return get_lexer_by_name(alias, **LEXER_OPTIONS)
+                except ClassNotFound:
+                    continue
+
+        if text.strip():
+            try:
+                lexer = guess_lexer(text[:10000], **LEXER_OPTIONS)
+            except ClassNotFound:
+                return None
+            if lexer.name != "Text only":
+                return lexer
+        return None
+
+
+# Global lexer registry instance
+lexer_registry = LexerRegistry()
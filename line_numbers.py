@@ -1,18 +1,38 @@
 import customtkinter
 import tkinter
+import tkinter.font
 
 
 class LineNumbers(customtkinter.CTkCanvas):
+    """Line number gutter drawn from a recycled pool of canvas text items.
+
+    Items are created once per visible row and only have their text or
+    y-offset changed on redraw; the canvas is left alone entirely when
+    the visible lines, their offsets and the line count are unchanged.
+    Every visible offset is compared, so an edit that changes how a line
+    wraps still moves the numbers below it.
+    """
+
+    PADDING = 8
+    MIN_DIGITS = 4
+
     def __init__(self, master, text_widget, **kwargs):
         super().__init__(master, **kwargs)
         self.text_widget = text_widget
-        self.configure(width=40)
+        self._items = []
+        self._shown = []  # (text, y) per item, None when hidden, False when stale
+        self._last_key = None
+        self._digits = 0
+        self._char_width = None
+        self.stats = {"redraws": 0, "skipped": 0, "created": 0, "updated": 0}
+        self._set_digits(self.MIN_DIGITS)
         self.bind("<MouseWheel>", self.on_scroll)
+        self.bind("<Configure>", lambda event: self.redraw(force=True))
 
     def on_scroll(self, event):
         if not self.text_widget:
             return
-        
+
         try:
             delta = getattr(event, 'delta', 0)
             if delta != 0:
@@ -22,32 +42,75 @@ class LineNumbers(customtkinter.CTkCanvas):
         except (tkinter.TclError, AttributeError, ZeroDivisionError):
             pass
 
-    def redraw(self, *args):
+    def _measure_digit(self):
+        return tkinter.font.nametofont("TkDefaultFont").measure("0")
+
+    def _set_digits(self, digits):
+        """Resize the gutter to fit line numbers with this many digits."""
+        if digits == self._digits:
+            return False
+        if self._char_width is None:
+            try:
+                self._char_width = self._measure_digit()
+            except (tkinter.TclError, RuntimeError):
+                self._char_width = 8
+        self._digits = digits
+        self.configure(width=digits * self._char_width + self.PADDING)
+        return True
+
+    def _gutter_width(self):
+        return self._digits * self._char_width + self.PADDING
+
+    def redraw(self, *args, force=False):
         if not self.text_widget:
             return
-        
+
         try:
-            self.delete("all")
-            self.text_widget.update_idletasks()
-            
-            i = self.text_widget.index("@0,0")
-            max_iterations = 1000  # Prevent infinite loop
-            iteration = 0
-            
-            while iteration < max_iterations:
-                iteration += 1
-                
-                dline = self.text_widget.dlineinfo(i)
-                if dline is None:
-                    break
-                
-                try:
-                    y = dline[1]
-                    linenum = str(i).split(".")[0]
-                    self.create_text(38, y, anchor="ne", text=linenum, fill="gray")
-                    i = self.text_widget.index(f"{i}+1line")
-                except (IndexError, ValueError, tkinter.TclError):
-                    break
-                    
-        except (tkinter.TclError, AttributeError):
+            widget = self.text_widget
+            first_line = int(widget.index("@0,0").split(".")[0])
+            line_count = int(widget.index("end-1c").split(".")[0])
+            offsets = []
+            line = first_line
+            dline = widget.dlineinfo(f"{first_line}.0")
+            while dline is not None and line <= line_count:
+                offsets.append(dline[1])
+                line += 1
+                dline = widget.dlineinfo(f"{line}.0") if line <= line_count else None
+            key = (first_line, tuple(offsets), line_count)
+
+            resized = self._set_digits(max(self.MIN_DIGITS, len(str(line_count))))
+            if key == self._last_key and not (force or resized):
+                self.stats["skipped"] += 1
+                return
+            self._last_key = key
+            self.stats["redraws"] += 1
+            if resized or force:
+                # Item x depends on the width, mark every item stale (not hidden)
+                self._shown = [False] * len(self._shown)
+
+            x = self._gutter_width() - self.PADDING // 2
+            for row, y in enumerate(offsets):
+                self._show(row, str(first_line + row), x, y)
+
+            # Hide pooled items below the last visible line
+            for spare in range(len(offsets), len(self._items)):
+                if self._shown[spare] is not None:
+                    self.itemconfigure(self._items[spare], state="hidden")
+                    self._shown[spare] = None
+        except (tkinter.TclError, AttributeError, ValueError):
             pass
+
+    def _show(self, row, text, x, y):
+        if row == len(self._items):
+            self._items.append(self.create_text(x, y, anchor="ne", text=text, fill="gray"))
+            self._shown.append((text, y))
+            self.stats["created"] += 1
+            return
+
+        if self._shown[row] == (text, y):
+            return
+        item = self._items[row]
+        self.coords(item, x, y)
+        self.itemconfigure(item, text=text, state="normal")
+        self._shown[row] = (text, y)
+        self.stats["updated"] += 1
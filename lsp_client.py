@@ -0,0 +1,852 @@
+"""Language servers over stdio (LSP) for completions, navigation and diagnostics."""
+import atexit
+import json
+import os
+import queue
+import re
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from config import config
+from document import Document
+from language_service import workspace_for
+from logger import logger
+
+# File extension -> (LSP languageId, server that handles it)
+LANGUAGES = {
+    ".py": ("python", "python"),
+    ".pyi": ("python", "python"),
+    ".js": ("javascript", "typescript"),
+    ".jsx": ("javascriptreact", "typescript"),
+    ".ts": ("typescript", "typescript"),
+    ".tsx": ("typescriptreact", "typescript"),
+    ".go": ("go", "go"),
+    ".rs": ("rust", "rust"),
+    ".c": ("c", "c"),
+    ".h": ("c", "c"),
+    ".cc": ("cpp", "c"),
+    ".cpp": ("cpp", "c"),
+    ".hpp": ("cpp", "c"),
+}
+
+# Commands tried in order for each server, comma-separated; LSP_SERVER_<NAME> overrides them
+DEFAULT_SERVERS = {
+    "python": "pylsp,jedi-language-server",
+    "typescript": "typescript-language-server --stdio",
+    "go": "gopls",
+    "rust": "rust-analyzer",
+    "c": "clangd",
+}
+
+# Crashes tolerated per RESTART_WINDOW_S before a server is given up on
+RESTART_LIMIT = 5
+RESTART_WINDOW_S = 300
+# First restart delay, doubled per recent crash up to MAX_RESTART_DELAY_S
+RESTART_DELAY_S = 0.5
+MAX_RESTART_DELAY_S = 30
+
+# Servers get longer to start than to answer a request
+INITIALIZE_TIMEOUT_S = 30
+
+SEVERITIES = {1: "error", 2: "warning", 3: "info", 4: "hint"}
+
+COMPLETION_KINDS = {
+    1: "text", 2: "method", 3: "function", 4: "constructor", 5: "field",
+    6: "variable", 7: "class", 8: "interface", 9: "module", 10: "property",
+    11: "unit", 12: "value", 13: "enum", 14: "keyword", 15: "snippet",
+    16: "color", 17: "file", 18: "reference", 19: "folder", 20: "enummember",
+    21: "constant", 22: "struct", 23: "event", 24: "operator", 25: "typeparameter",
+}
+
+_WORD = re.compile(r"\w+")
+
+
+class LspError(Exception):
+    """A request failed, timed out, or the server isn't running."""
+
+
+class LspCompletion(NamedTuple):
+    """A completion item, with the attributes the editor reads from Jedi's."""
+    name: str                # Text inserted for the item
+    type: str                # Kind, named like Jedi's types ("function", "class", ...)
+    detail: str              # Signature or type shown next to the name
+    documentation: str
+
+
+class Location(NamedTuple):
+    """A definition or reference, named like Jedi's Name attributes."""
+    module_path: str
+    line: int                # 1-based
+    column: int              # 0-based, in characters
+    name: str
+
+
+class Diagnostic(NamedTuple):
+    line: int                # 1-based lines, 0-based character columns, like Tk indices
+    column: int
+    end_line: int
+    end_column: int
+    severity: str            # "error", "warning", "info" or "hint"
+    message: str
+    source: str
+
+
+def encode_message(payload: dict) -> bytes:
+    """Frame a JSON-RPC message with its Content-Length header."""
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return b"Content-Length: %d\r\n\r\n" % len(body) + body
+
+
+def read_message(stream) -> Optional[dict]:
+    """Read one framed message from a binary stream; None at end of stream."""
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            if length is not None:
+                break
+            continue
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value.strip())
+    body = stream.read(length)
+    if len(body) < length:
+        return None
+    return json.loads(body.decode("utf-8"))
+
+
+def utf16_column(line: str, column: int) -> int:
+    """Convert a character column on line to UTF-16 code units, LSP's default."""
+    prefix = line[:column]
+    if prefix.isascii():
+        return len(prefix)
+    return len(prefix.encode("utf-16-le")) // 2
+
+
+def char_column(line: str, units: int) -> int:
+    """Convert a UTF-16 column on line back to characters."""
+    if line.isascii():
+        return min(units, len(line))
+    count = 0
+    for i, char in enumerate(line):
+        if count >= units:
+            return i
+        count += 2 if ord(char) > 0xFFFF else 1
+    return len(line)
+
+
+def path_to_uri(path) -> str:
+    return Path(os.path.abspath(str(path))).as_uri()
+
+
+def uri_to_path(uri: str) -> str:
+    return url2pathname(urlparse(uri).path)
+
+
+def language_of(path) -> Tuple[Optional[str], Optional[str]]:
+    """Return (languageId, server name) for a file, (None, None) if no server handles it."""
+    return LANGUAGES.get(os.path.splitext(str(path))[1].lower(), (None, None))
+
+
+class LanguageServer:
+    """One language server process, spoken to with JSON-RPC over stdio.
+
+    A writer thread sends queued messages so callers never block on a
+    full pipe. A reader thread resolves pending requests, answers the
+    server's own requests and passes notifications to on_notification.
+    on_exit(server) runs once, on the reader thread, when the process
+    ends for any reason.
+    """
+
+    def __init__(self, command: List[str], root: str,
+                 on_notification: Optional[Callable[[str, Any], None]] = None,
+                 on_exit: Optional[Callable[["LanguageServer"], None]] = None) -> None:
+        self.command = command
+        self.root = root
+        self.on_notification = on_notification
+        self.on_exit = on_exit
+        self.capabilities: Dict[str, Any] = {}
+        self.position_encoding = "utf-16"
+        self.alive = False
+        self._process: Optional[subprocess.Popen] = None
+        self._pending: Dict[int, Future] = {}
+        self._next_id = 0
+        self._outbox: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.command[0])
+
+    @property
+    def sync_kind(self) -> int:
+        """0 no change events, 1 full text, 2 incremental range edits."""
+        sync = self.capabilities.get("textDocumentSync", 0)
+        if isinstance(sync, dict):
+            return sync.get("change", 0) or 0
+        return sync or 0
+
+    def start(self, timeout: float = INITIALIZE_TIMEOUT_S) -> None:
+        """Launch the process and complete the initialize handshake."""
+        self._process = subprocess.Popen(self.command, cwd=self.root, stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.alive = True
+        for target, role in ((self._read, "reader"), (self._write, "writer"), (self._log_stderr, "stderr")):
+            threading.Thread(target=target, name=f"lsp-{self.name}-{role}", daemon=True).start()
+
+        result = self.request("initialize", {
+            "processId": os.getpid(),
+            "clientInfo": {"name": "NanoEditor"},
+            "rootUri": path_to_uri(self.root),
+            "rootPath": self.root,
+            "workspaceFolders": [{"uri": path_to_uri(self.root), "name": os.path.basename(self.root)}],
+            "capabilities": {
+                # Tk and Jedi count columns in characters, UTF-32 avoids converting
+                "general": {"positionEncodings": ["utf-32", "utf-16"]},
+                "textDocument": {
+                    "synchronization": {"dynamicRegistration": False, "didSave": False},
+                    "completion": {"completionItem": {"snippetSupport": False,
+                                                      "documentationFormat": ["plaintext"]}},
+                    "definition": {"linkSupport": True},
+                    "references": {},
+                    "publishDiagnostics": {"relatedInformation": False},
+                },
+                "workspace": {"workspaceFolders": True},
+            },
+        }, timeout) or {}
+        self.capabilities = result.get("capabilities") or {}
+        self.position_encoding = self.capabilities.get("positionEncoding", "utf-16")
+        self.notify("initialized", {})
+
+    def request(self, method: str, params: Any, timeout: Optional[float] = None) -> Any:
+        """Send a request and wait for its result; raises LspError."""
+        future: Future = Future()
+        with self._lock:
+            if not self.alive:
+                raise LspError(f"{self.name} is not running")
+            self._next_id += 1
+            request_id = self._next_id
+            self._pending[request_id] = future
+        self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            self.notify("$/cancelRequest", {"id": request_id})
+            raise LspError(f"{method} timed out after {timeout}s")
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def notify(self, method: str, params: Any) -> None:
+        self._send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Ask the server to shut down, killing it if it doesn't."""
+        if self.alive:
+            try:
+                self.request("shutdown", None, timeout)
+                self.notify("exit", None)
+            except LspError:
+                pass
+        self.kill(timeout)
+
+    def kill(self, timeout: float = 0) -> None:
+        self._outbox.put(None)
+        if self._process is None:
+            return
+        try:
+            self._process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+
+    def _send(self, payload: dict) -> None:
+        self._outbox.put(encode_message(payload))
+
+    def _write(self) -> None:
+        stdin = self._process.stdin
+        while True:
+            data = self._outbox.get()
+            if data is None:
+                break
+            try:
+                stdin.write(data)
+                stdin.flush()
+            except (OSError, ValueError):
+                break  # The reader sees the process end
+        try:
+            stdin.close()
+        except OSError:
+            pass
+
+    def _read(self) -> None:
+        try:
+            while True:
+                message = read_message(self._process.stdout)
+                if message is None:
+                    break
+                self._dispatch(message)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Language server {self.name} sent an unreadable message: {e}")
+        finally:
+            self._exited()
+
+    def _dispatch(self, message: dict) -> None:
+        method = message.get("method")
+        if method is not None:
+            if "id" in message:
+                # Requests from the server; nothing to configure, acknowledge them
+                params = message.get("params") or {}
+                result = [None] * len(params.get("items", [])) if method == "workspace/configuration" else None
+                self._send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+            elif self.on_notification:
+                try:
+                    self.on_notification(method, message.get("params"))
+                except Exception as e:
+                    logger.warning(f"Handling {method} failed: {e}")
+            return
+
+        with self._lock:
+            future = self._pending.get(message.get("id"))
+        if future is None:
+            return
+        if "error" in message:
+            future.set_exception(LspError((message["error"] or {}).get("message", "request failed")))
+        else:
+            future.set_result(message.get("result"))
+
+    def _exited(self) -> None:
+        with self._lock:
+            self.alive = False
+            pending = list(self._pending.values())
+        for future in pending:
+            if not future.done():
+                future.set_exception(LspError(f"{self.name} exited"))
+        self._outbox.put(None)
+        try:
+            self._process.wait(5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        if self.on_exit:
+            self.on_exit(self)
+
+    def _log_stderr(self) -> None:
+        try:
+            for line in self._process.stderr:
+                logger.debug(f"{self.name}: {line.decode('utf-8', 'replace').rstrip()}")
+        except (OSError, ValueError):
+            pass
+
+
+class _OpenFile:
+    """The client's copy of a file open in the server."""
+
+    def __init__(self, language_id: str, text: str, edit_version: Optional[int] = None) -> None:
+        self.language_id = language_id
+        self.document = Document(text)
+        self.version = 0
+        self.edit_version = edit_version  # The editor's edit_version the copy reflects
+
+    def is_newer(self, edit_version: Optional[int]) -> bool:
+        """Whether the copy has edits made after edit_version, so text from then is stale."""
+        return None not in (edit_version, self.edit_version) and self.edit_version > edit_version
+
+
+class LanguageClient:
+    """A language server for one workspace, kept running and in sync with open files.
+
+    The server starts on first use, on a background thread. Open files
+    are mirrored in Documents: edits go out as range changes (didChange),
+    positions are converted to the server's encoding against the mirror,
+    and a restarted server gets every file reopened. A crashed server is
+    restarted with backoff, up to RESTART_LIMIT times per RESTART_WINDOW_S;
+    after that it stays down until restart() is called.
+
+    Editors pass their edit_version with text and edits, so text captured
+    for a background request never replaces a copy with newer edits.
+    """
+
+    def __init__(self, workspace_path, name: str, commands: List[List[str]],
+                 timeout: Optional[float] = None) -> None:
+        self.workspace_path = os.path.abspath(str(workspace_path))
+        self.name = name
+        self.commands = commands
+        self.timeout = timeout or config.get_int('LSP_TIMEOUT_S', 5)
+        self.restart_delay = RESTART_DELAY_S
+        self.server: Optional[LanguageServer] = None
+        self.ready = threading.Event()
+        self.diagnostics: Dict[str, List[Diagnostic]] = {}
+        self.diagnostics_listeners: List[Callable[[str, List[Diagnostic]], None]] = []
+        self.stats = {"starts": 0, "restarts": 0, "changes": 0, "resyncs": 0, "stale": 0}
+        self._files: Dict[str, _OpenFile] = {}
+        self._crashes: List[float] = []
+        self._starting = False
+        self._given_up = False
+        self._closed = False
+        self._lock = threading.RLock()
+
+    @property
+    def given_up(self) -> bool:
+        """True once the server crashed too often to be restarted automatically."""
+        return self._given_up
+
+    def start(self) -> None:
+        """Start the server in the background unless it's running, starting or given up on."""
+        with self._lock:
+            if self._closed or self._given_up or self._starting or self.server is not None:
+                return
+            self._starting = True
+        threading.Thread(target=self._start, name=f"lsp-{self.name}", daemon=True).start()
+
+    def restart(self, commands: Optional[List[List[str]]] = None) -> None:
+        """Restart the server now, e.g. from a command or with new commands, forgetting past crashes."""
+        with self._lock:
+            if commands is not None:
+                self.commands = commands
+            self._crashes = []
+            self._given_up = False
+            server, self.server = self.server, None
+            self.ready.clear()
+        if server is not None:
+            server.stop()
+        self.start()
+
+    def _start(self) -> None:
+        server = None
+        for command in self.commands:
+            candidate = LanguageServer(command, self.workspace_path, self._on_notification, self._on_exit)
+            try:
+                candidate.start()
+            except (OSError, LspError) as e:
+                logger.warning(f"Language server {command[0]} failed to start: {e}")
+                candidate.kill()
+                continue
+            server = candidate
+            break
+
+        with self._lock:
+            self._starting = False
+            if server is None:
+                return
+            if self._closed:
+                server.stop()
+                return
+            self.server = server
+            self.stats["starts"] += 1
+            for path, open_file in self._files.items():
+                self._send_open(path, open_file)
+            self.ready.set()
+        logger.info(f"Language server {server.name} started for {self.workspace_path}")
+
+    def _on_exit(self, server: LanguageServer) -> None:
+        with self._lock:
+            if server is not self.server:
+                return
+            self.server = None
+            self.ready.clear()
+            if self._closed:
+                return
+            now = time.monotonic()
+            self._crashes = [t for t in self._crashes if now - t < RESTART_WINDOW_S] + [now]
+            if len(self._crashes) > RESTART_LIMIT:
+                self._given_up = True
+                logger.error(f"Language server {server.name} keeps crashing, not restarting it")
+                return
+            delay = min(self.restart_delay * 2 ** (len(self._crashes) - 1), MAX_RESTART_DELAY_S)
+            self.stats["restarts"] += 1
+        logger.warning(f"Language server {server.name} exited, restarting in {delay:g}s")
+        timer = threading.Timer(delay, self.start)
+        timer.daemon = True
+        timer.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._closed = True
+            server, self.server = self.server, None
+            self.ready.clear()
+        if server is not None:
+            server.stop()
+
+    def _running(self) -> Optional[LanguageServer]:
+        """The server if it's initialized and files were replayed to it."""
+        return self.server if self.ready.is_set() else None
+
+    def _server(self) -> LanguageServer:
+        """Wait for the server to be ready; raises LspError."""
+        if self._given_up:
+            raise LspError(f"{self.name} language server keeps crashing")
+        self.start()
+        self.ready.wait(self.timeout)
+        server = self._running()
+        if server is None or not server.alive:
+            raise LspError(f"{self.name} language server is not running")
+        return server
+
+    # Documents
+
+    def open_document(self, path, text: str, edit_version: Optional[int] = None) -> None:
+        path = os.path.abspath(str(path))
+        with self._lock:
+            open_file = _OpenFile(language_of(path)[0] or self.name, text, edit_version)
+            self._files[path] = open_file
+            if self._running():
+                self._send_open(path, open_file)
+        self.start()
+
+    def close_document(self, path) -> None:
+        path = os.path.abspath(str(path))
+        with self._lock:
+            self.diagnostics.pop(path, None)
+            if self._files.pop(path, None) is not None and self._running():
+                self.server.notify("textDocument/didClose", {"textDocument": {"uri": path_to_uri(path)}})
+
+    def is_open(self, path) -> bool:
+        with self._lock:
+            return os.path.abspath(str(path)) in self._files
+
+    def change_document(self, path, edits: List[Tuple[str, str, str]],
+                        edit_version: Optional[int] = None) -> None:
+        """Apply widget edits, (start, end, text) in Tk indices, and send them as range changes."""
+        path = os.path.abspath(str(path))
+        with self._lock:
+            open_file = self._files.get(path)
+            if open_file is None:
+                return
+            if edit_version is not None:
+                open_file.edit_version = edit_version
+            server = self._running()
+            incremental = server is not None and server.sync_kind == 2
+            changes = []
+            for start, end, text in edits:
+                if incremental:
+                    snapshot = open_file.document.snapshot()
+                    changes.append({"range": {"start": self._to_lsp(server, snapshot, start),
+                                              "end": self._to_lsp(server, snapshot, end)},
+                                    "text": text})
+                open_file.document.apply_edit(start, end, text)
+            # Without a server the mirror is enough: files are reopened on start
+            if server is None or server.sync_kind == 0:
+                return
+            if not incremental:
+                changes = [{"text": open_file.document.text()}]
+            self._send_change(server, path, open_file, changes)
+
+    def sync(self, path, text: str, edit_version: Optional[int] = None) -> None:
+        """Make the server's copy of path equal text: open it, or resend it if it drifted.
+
+        Text older than the copy (a lower edit_version) is ignored.
+        """
+        path = os.path.abspath(str(path))
+        with self._lock:
+            open_file = self._files.get(path)
+            if open_file is None:
+                self.open_document(path, text, edit_version)
+                return
+            if open_file.is_newer(edit_version):
+                self.stats["stale"] += 1
+                return
+            if edit_version is not None:
+                open_file.edit_version = edit_version
+            if open_file.document.text() == text:
+                return
+            open_file.document.set_text(text)
+            self.stats["resyncs"] += 1
+            server = self._running()
+            if server is not None and server.sync_kind:
+                self._send_change(server, path, open_file, [{"text": text}])
+
+    def text(self, path) -> Optional[str]:
+        """The client's copy of an open file."""
+        with self._lock:
+            open_file = self._files.get(os.path.abspath(str(path)))
+            return open_file.document.text() if open_file else None
+
+    def _send_open(self, path: str, open_file: _OpenFile) -> None:
+        open_file.version += 1
+        self.server.notify("textDocument/didOpen", {"textDocument": {
+            "uri": path_to_uri(path), "languageId": open_file.language_id,
+            "version": open_file.version, "text": open_file.document.text()}})
+
+    def _send_change(self, server: LanguageServer, path: str, open_file: _OpenFile, changes: list) -> None:
+        open_file.version += 1
+        self.stats["changes"] += 1
+        server.notify("textDocument/didChange", {
+            "textDocument": {"uri": path_to_uri(path), "version": open_file.version},
+            "contentChanges": changes})
+
+    # Positions
+
+    @staticmethod
+    def _to_lsp(server: LanguageServer, snapshot, index: str) -> dict:
+        line, column = map(int, str(index).split("."))
+        if server.position_encoding != "utf-32":
+            column = utf16_column(snapshot.lines(line, line), column)
+        return {"line": line - 1, "character": column}
+
+    def _from_lsp(self, server: Optional[LanguageServer], path: str, position: dict) -> Tuple[int, int]:
+        """Server position to (1-based line, character column); exact for open files."""
+        line = position.get("line", 0) + 1
+        column = position.get("character", 0)
+        if server is None or server.position_encoding != "utf-32":
+            with self._lock:
+                open_file = self._files.get(path)
+                if open_file is not None:
+                    column = char_column(open_file.document.snapshot().lines(line, line), column)
+        return line, column
+
+    # Requests
+
+    def _request_at(self, method: str, path, code: str, line: int, column: int,
+                    edit_version: Optional[int] = None, **params) -> Tuple[Any, str]:
+        """Sync code, then send a request at line/column; returns (result, word at the position)."""
+        path = os.path.abspath(str(path))
+        self.sync(path, code, edit_version)
+        server = self._server()
+        with self._lock:
+            open_file = self._files.get(path)
+            if open_file is None:
+                raise LspError(f"{path} was closed")
+            snapshot = open_file.document.snapshot()
+            position = self._to_lsp(server, snapshot, f"{line}.{column}")
+            word = next((m.group() for m in _WORD.finditer(snapshot.lines(line, line))
+                         if m.start() <= column <= m.end()), "")
+        result = server.request(method, dict(params, textDocument={"uri": path_to_uri(path)},
+                                             position=position), self.timeout)
+        return result, word
+
+    def complete(self, path, code: str, line: int, column: int,
+                 edit_version: Optional[int] = None) -> List[LspCompletion]:
+        result, _ = self._request_at("textDocument/completion", path, code, line, column, edit_version)
+        items = result.get("items", []) if isinstance(result, dict) else (result or [])
+        items.sort(key=lambda item: item.get("sortText") or item.get("label", ""))
+        completions = []
+        for item in items:
+            edit = item.get("textEdit") or {}
+            documentation = item.get("documentation") or ""
+            if isinstance(documentation, dict):
+                documentation = documentation.get("value", "")
+            completions.append(LspCompletion(
+                name=edit.get("newText") or item.get("insertText") or item.get("label", ""),
+                type=COMPLETION_KINDS.get(item.get("kind"), ""),
+                detail=item.get("detail") or "",
+                documentation=documentation,
+            ))
+        return completions
+
+    def definition(self, path, code: str, line: int, column: int,
+                   edit_version: Optional[int] = None) -> List[Location]:
+        result, word = self._request_at("textDocument/definition", path, code, line, column, edit_version)
+        return self._locations(result, word)
+
+    def references(self, path, code: str, line: int, column: int,
+                   edit_version: Optional[int] = None) -> List[Location]:
+        result, word = self._request_at("textDocument/references", path, code, line, column, edit_version,
+                                        context={"includeDeclaration": True})
+        return self._locations(result, word)
+
+    def _locations(self, result: Any, name: str) -> List[Location]:
+        if isinstance(result, dict):
+            result = [result]
+        server = self.server
+        locations = []
+        for item in result or []:
+            uri = item.get("uri") or item.get("targetUri")
+            span = item.get("range") or item.get("targetSelectionRange") or item.get("targetRange")
+            if not uri or not span:
+                continue
+            path = uri_to_path(uri)
+            line, column = self._from_lsp(server, path, span["start"])
+            locations.append(Location(path, line, column, name))
+        return locations
+
+    def _on_notification(self, method: str, params: Any) -> None:
+        if method != "textDocument/publishDiagnostics" or not params:
+            return
+        path = uri_to_path(params.get("uri", ""))
+        server = self.server
+        diagnostics = []
+        for item in params.get("diagnostics", []):
+            span = item.get("range") or {}
+            line, column = self._from_lsp(server, path, span.get("start", {}))
+            end_line, end_column = self._from_lsp(server, path, span.get("end", {}))
+            diagnostics.append(Diagnostic(line, column, end_line, end_column,
+                                          SEVERITIES.get(item.get("severity"), "error"),
+                                          item.get("message", ""), item.get("source") or ""))
+        with self._lock:
+            self.diagnostics[path] = diagnostics
+            listeners = list(self.diagnostics_listeners)
+        for listener in listeners:
+            try:
+                listener(path, diagnostics)
+            except Exception as e:
+                logger.warning(f"Diagnostics listener failed: {e}")
+
+
+_clients: Dict[Tuple[str, str], Optional[LanguageClient]] = {}
+_clients_lock = threading.Lock()
+
+
+def server_commands(name: str) -> List[List[str]]:
+    """Installed commands for a server, in order of preference."""
+    configured = config.get(f'LSP_SERVER_{name.upper()}', DEFAULT_SERVERS.get(name, ""))
+    commands = []
+    for alternative in configured.split(","):
+        command = shlex.split(alternative)
+        if command and shutil.which(command[0]):
+            commands.append(command)
+    return commands
+
+
+def get_language_client(workspace_path, name: str) -> Optional[LanguageClient]:
+    """Return the shared client for a workspace and server, None if it isn't installed.
+
+    A client that gave up after repeated crashes is restarted once its
+    configured commands change.
+    """
+    key = (os.path.abspath(str(workspace_path)), name)
+    with _clients_lock:
+        if key not in _clients:
+            commands = server_commands(name)
+            _clients[key] = LanguageClient(key[0], name, commands) if commands else None
+        client = _clients[key]
+    if client is not None and client.given_up:
+        commands = server_commands(name)
+        if commands and commands != client.commands:
+            client.restart(commands)
+    return client
+
+
+def client_for(file_path) -> Optional[LanguageClient]:
+    """The language client for a saved file, None to use Jedi in-process."""
+    if not file_path or not config.get_bool('LSP_ENABLED', True):
+        return None
+    _, name = language_of(file_path)
+    if name is None:
+        return None
+    return get_language_client(workspace_for(file_path), name)
+
+
+def shutdown_all() -> None:
+    """Stop every language server, e.g. when the editor exits."""
+    with _clients_lock:
+        clients = [client for client in _clients.values() if client is not None]
+        _clients.clear()
+    for client in clients:
+        client.stop()
+
+
+atexit.register(shutdown_all)
+
+
+# Tags for diagnostics in the editor, by severity
+DIAGNOSTIC_TAGS = {
+    "error": ("lsp_error", "#F14C4C"),
+    "warning": ("lsp_warning", "#CCA700"),
+    "info": ("lsp_info", "#3794FF"),
+    "hint": ("lsp_info", "#3794FF"),
+}
+
+
+class EditorSync:
+    """Keep a CodeEditor's file open in its language server and underline diagnostics.
+
+    Edits are forwarded as they happen. While the widget is reloaded (no
+    document attached) or once its file changed, the file is resent in
+    full at the next idle moment instead.
+    """
+
+    def __init__(self, editor) -> None:
+        self.editor = editor
+        self.path: Optional[str] = None
+        self.client: Optional[LanguageClient] = None
+        self.diagnostics: List[Diagnostic] = []
+        self._resync_pending = False
+        for tag, color in DIAGNOSTIC_TAGS.values():
+            editor.tag_config(tag, underline=True)
+            try:
+                editor.tag_config(tag, underlinefg=color)
+            except Exception:
+                pass  # Tk before 8.6.6 has no underline colour
+        editor.edit_listeners.append(self.on_edit)
+        editor.bind("<Destroy>", lambda e: self.detach(), add=True)
+
+    def on_edit(self, start: str, end: str, text: str) -> None:
+        if self.editor.document is None or self.editor.file_path != self.path:
+            self.schedule_resync()
+        elif self.client is not None:
+            self.client.change_document(self.path, [(start, end, text)], self.editor.edit_version)
+
+    def schedule_resync(self) -> None:
+        if not self._resync_pending:
+            self._resync_pending = True
+            self.editor.after_idle(self.resync)
+
+    def resync(self) -> None:
+        """Open the editor's current file in its server, with the full text."""
+        self._resync_pending = False
+        path = self.editor.file_path
+        if path != self.path:
+            self.detach()
+            self.path = path
+            self.client = client_for(path)
+            if self.client is None:
+                return
+            self.client.diagnostics_listeners.append(self._on_diagnostics)
+        if self.client is not None:
+            try:
+                self.client.sync(path, self.editor.get_text(), self.editor.edit_version)
+            except Exception as e:
+                logger.warning(f"Sending {path} to its language server failed: {e}")
+
+    def detach(self) -> None:
+        """Close the file in its server."""
+        if self.client is not None:
+            try:
+                self.client.diagnostics_listeners.remove(self._on_diagnostics)
+            except ValueError:
+                pass
+            self.client.close_document(self.path)
+        self.client = None
+        self.path = None
+        try:
+            self.show_diagnostics([])
+        except Exception:
+            pass
+
+    def _on_diagnostics(self, path: str, diagnostics: List[Diagnostic]) -> None:
+        # Reader thread: hand over to Tk
+        if self.path and path == os.path.abspath(self.path):
+            try:
+                self.editor.after(0, lambda: self.show_diagnostics(diagnostics))
+            except RuntimeError:
+                pass
+
+    def show_diagnostics(self, diagnostics: List[Diagnostic]) -> None:
+        self.diagnostics = diagnostics
+        for tag, _ in DIAGNOSTIC_TAGS.values():
+            self.editor.tag_remove(tag, "1.0", "end")
+        for diagnostic in diagnostics:
+            start = f"{diagnostic.line}.{diagnostic.column}"
+            if (diagnostic.end_line, diagnostic.end_column) > (diagnostic.line, diagnostic.column):
+                end = f"{diagnostic.end_line}.{diagnostic.end_column}"
+            else:
+                end = f"{start} wordend"
+            self.editor.tag_add(DIAGNOSTIC_TAGS[diagnostic.severity][0], start, end)
+
+    def message_at(self, index: str) -> str:
+        """The message of the first diagnostic covering a Tk index."""
+        line, column = map(int, index.split("."))
+        for diagnostic in self.diagnostics:
+            if (diagnostic.line, diagnostic.column) <= (line, column) <= (diagnostic.end_line, diagnostic.end_column):
+                return f"{diagnostic.severity}: {diagnostic.message}"
+        return ""
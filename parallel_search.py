@@ -0,0 +1,163 @@
+"""Multi-process project search over memory-mapped files."""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Callable, Iterable, List, Optional
+
+from logger import logger
+from search_engine import Result, SearchQuery
+
+# Files per task sent to a worker process
+CHUNK_FILES = 64
+# Below this many files the pool's startup cost isn't worth it
+INLINE_FILES = 32
+
+
+def search_chunk(paths: List[str], query: SearchQuery, limit: int) -> List[Result]:
+    """Worker entry point: search a chunk of files."""
+    results = []
+    for path in paths:
+        results.extend(query.search_file(path, limit - len(results)))
+        if len(results) >= limit:
+            break
+    return results
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int = 0) -> ProcessPoolExecutor:
+    """Return the shared worker pool, started on first use.
+
+    Uses spawn so workers don't inherit the Tk interpreter or its threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def reset_pool() -> None:
+    """Drop a broken pool so the next search starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+class ParallelSearch:
+    """One search run: fan files out to worker processes and stream results.
+
+    `on_batch(results)` is called on the search thread with each chunk's
+    matches as soon as it finishes, and `on_done(total, cancelled, capped)`
+    once at the end. Callers that touch Tk must marshal with after().
+    """
+
+    def __init__(self, query: SearchQuery, max_matches: int = 5000, workers: int = 0) -> None:
+        self.query = query
+        self.max_matches = max_matches
+        self.workers = workers or os.cpu_count() or 1
+        self.total = 0
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Stop submitting work and drop results still in flight."""
+        self._cancelled.set()
+
+    def start(self, files: Iterable, on_batch: Callable[[List[Result]], None],
+              on_done: Callable[[int, bool, bool], None]) -> None:
+        self._thread = threading.Thread(target=self.run, args=(files, on_batch, on_done),
+                                        name="project-search", daemon=True)
+        self._thread.start()
+
+    def run(self, files: Iterable, on_batch: Callable[[List[Result]], None],
+            on_done: Callable[[int, bool, bool], None]) -> None:
+        files = iter(str(path) for path in files)
+        head = list(islice(files, INLINE_FILES))
+        if len(head) < INLINE_FILES:
+            self._run_inline(head, on_batch)
+        else:
+            self._run_pool(head, files, on_batch)
+        on_done(self.total, self.cancelled, self.total >= self.max_matches)
+
+    def _deliver(self, results: List[Result], on_batch) -> bool:
+        """Pass results on, truncated to the cap; return False to stop."""
+        if self.cancelled:
+            return False
+        results = results[:self.max_matches - self.total]
+        if results:
+            self.total += len(results)
+            on_batch(results)
+        return self.total < self.max_matches
+
+    def _run_inline(self, paths: List[str], on_batch) -> None:
+        for path in paths:
+            found = self.query.search_file(path, self.max_matches - self.total)
+            if not self._deliver(found, on_batch):
+                return
+
+    def _run_pool(self, head: List[str], rest, on_batch) -> None:
+        chunks = _chunks(head, rest)
+        pending = {}
+        unsent = None
+        try:
+            pool = get_pool(self.workers)
+            while True:
+                # Keep a bounded number of chunks in flight so cancel is quick
+                while len(pending) < self.workers * 2 and not self.cancelled:
+                    unsent = next(chunks, None)
+                    if unsent is None:
+                        break
+                    future = pool.submit(search_chunk, unsent, self.query, self.max_matches)
+                    pending[future], unsent = unsent, None
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    try:
+                        results = future.result()
+                    except BrokenProcessPool:
+                        pending[future] = chunk
+                        raise
+                    except Exception:
+                        continue
+                    if not self._deliver(results, on_batch):
+                        return
+        except (BrokenProcessPool, RuntimeError, OSError) as e:
+            # Workers died or couldn't start: finish the remaining files here
+            logger.warning(f"Search worker pool failed, continuing in-process: {e}")
+            reset_pool()
+            leftovers = list(pending.values()) + ([unsent] if unsent else [])
+            pending = {}
+            for chunk in leftovers + list(chunks):
+                self._run_inline(chunk, on_batch)
+                if self.cancelled or self.total >= self.max_matches:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _chunks(head: List[str], rest) -> Iterable[List[str]]:
+    chunk = head
+    while chunk:
+        while len(chunk) < CHUNK_FILES:
+            path = next(rest, None)
+            if path is None:
+                break
+            chunk.append(path)
+        yield chunk
+        chunk = list(islice(rest, CHUNK_FILES))
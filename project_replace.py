@@ -0,0 +1,320 @@
+"""Project-wide replace: per-file hunk previews and atomic parallel writes."""
+import os
+import re
+import shutil
+import tempfile
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from logger import logger
+from parallel_search import ParallelSearch
+from search_engine import SearchError, SearchQuery
+
+# (start offset, end offset, replacement text)
+Edit = Tuple[int, int, str]
+# (mtime_ns, size) of a file when it was planned
+Signature = Tuple[int, int]
+
+
+class Hunk:
+    """Consecutive lines changed by one or more matches, applied as a unit."""
+
+    def __init__(self, first_line: int, old_lines: List[str], new_lines: List[str],
+                 edits: List[Edit]) -> None:
+        self.first_line = first_line
+        self.old_lines = old_lines
+        self.new_lines = new_lines
+        self.edits = edits
+        self.selected = True
+
+    def diff_lines(self) -> List[str]:
+        """Unified-diff style body: removed lines, then added lines."""
+        return [f"-{line}" for line in self.old_lines] + [f"+{line}" for line in self.new_lines]
+
+
+class FilePlan:
+    """The replacements for one file, against the text they were computed from."""
+
+    def __init__(self, path: str, text: str, hunks: List[Hunk],
+                 signature: Optional[Signature] = None, line_starts: Optional[List[int]] = None) -> None:
+        self.path = path
+        self.text = text
+        self.hunks = hunks
+        self.signature = signature
+        # Open buffers whose text equals the file on disk are saved too
+        self.matches_disk = signature is not None
+        self._line_starts = line_starts if line_starts is not None else _line_starts(text)
+
+    @property
+    def count(self) -> int:
+        return sum(len(hunk.edits) for hunk in self.hunks)
+
+    def selected_edits(self) -> List[Edit]:
+        return [edit for hunk in self.hunks if hunk.selected for edit in hunk.edits]
+
+    def new_text(self) -> str:
+        return apply_edits(self.text, self.selected_edits())
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """Map an offset in the planned text to a (1-based line, column)."""
+        line = bisect_right(self._line_starts, offset)
+        return line, offset - self._line_starts[line - 1]
+
+
+def _line_starts(text: str) -> List[int]:
+    starts = [0]
+    find = text.find
+    position = find("\n")
+    while position >= 0:
+        starts.append(position + 1)
+        position = find("\n", position + 1)
+    return starts
+
+
+def validate_replacement(query: SearchQuery, replacement: str) -> None:
+    """Raise SearchError for an invalid query or replacement template."""
+    query.validate()
+    if query.regex:
+        try:
+            query.compiled.text_pattern.sub(replacement, "")
+        except (re.error, IndexError) as e:
+            raise SearchError(f"Invalid replacement: {e}") from e
+
+
+def expand(query: SearchQuery, match, replacement: str) -> str:
+    """Replacement text for one match; regex queries expand \\1 and \\g<name>."""
+    if not query.regex:
+        return replacement
+    try:
+        return match.expand(replacement)
+    except (re.error, IndexError) as e:
+        raise SearchError(f"Invalid replacement: {e}") from e
+
+
+def plan_text(query: SearchQuery, replacement: str, text: str, path: str = "",
+              signature: Optional[Signature] = None) -> Optional[FilePlan]:
+    """Plan replacing every match in text; None if nothing matches.
+
+    Matches that share a line are grouped into one hunk, so a hunk can be
+    applied or skipped without leaving a line half replaced.
+    """
+    starts = _line_starts(text)
+    groups: List[Tuple[int, int, List[Edit]]] = []
+    for match in query.compiled.text_pattern.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue
+        new = expand(query, match, replacement)
+        if new == match.group(0):
+            continue
+        first = bisect_right(starts, start)
+        last = bisect_right(starts, end - 1)
+        if groups and first <= groups[-1][1]:
+            groups[-1] = (groups[-1][0], max(groups[-1][1], last), groups[-1][2] + [(start, end, new)])
+        else:
+            groups.append((first, last, [(start, end, new)]))
+    if not groups:
+        return None
+
+    hunks = []
+    for first, last, edits in groups:
+        segment_start = starts[first - 1]
+        segment_end = starts[last] - 1 if last < len(starts) else len(text)
+        local = [(start - segment_start, end - segment_start, new) for start, end, new in edits]
+        old = text[segment_start:segment_end]
+        hunks.append(Hunk(first, old.split("\n"), apply_edits(old, local).split("\n"), edits))
+    return FilePlan(path, text, hunks, signature, starts)
+
+
+def apply_edits(text: str, edits: List[Edit]) -> str:
+    """Apply sorted, non-overlapping edits to text."""
+    parts = []
+    position = 0
+    for start, end, new in edits:
+        parts.append(text[position:start])
+        parts.append(new)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def apply_to_widget(widget, plan: FilePlan) -> int:
+    """Apply the plan's selected edits to a Tk text widget showing plan.text.
+
+    Only the changed ranges are touched, last first so earlier indices stay
+    valid, and the whole replace is one undo step. Returns the edit count.
+    """
+    edits = plan.selected_edits()
+    if not edits:
+        return 0
+    try:
+        widget.edit_separator()
+    except Exception:
+        pass
+    for start, end, new in reversed(edits):
+        start_index = "%d.%d" % plan.position(start)
+        widget.delete(start_index, "%d.%d" % plan.position(end))
+        if new:
+            widget.insert(start_index, new)
+    try:
+        widget.edit_separator()
+    except Exception:
+        pass
+    return len(edits)
+
+
+def apply_to_document(document, plan: FilePlan) -> int:
+    """Apply the plan's selected edits to a Document holding plan.text."""
+    edits = plan.selected_edits()
+    for start, end, new in reversed(edits):
+        document.replace(start, end, new)
+    return len(edits)
+
+
+def file_signature(path: str) -> Signature:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_text(path: str) -> Optional[Tuple[str, Signature]]:
+    """Read a UTF-8 file keeping its line endings; None if it can't be edited as text."""
+    try:
+        signature = file_signature(path)
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return f.read(), signature
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def write_atomic(path: str, text: str) -> None:
+    """Write text next to path and rename it over, so readers never see half a file.
+
+    A symlink is followed, so the file it points to is replaced, not the link.
+    """
+    path = os.path.realpath(path)
+    fd, temp_path = tempfile.mkstemp(prefix=".nanoeditor-", suffix=".tmp",
+                                     dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConflictError(OSError):
+    """The file changed on disk after its preview was computed."""
+
+
+def write_plan(plan: FilePlan) -> int:
+    """Write one plan's selected hunks to disk; returns the edit count."""
+    edits = plan.selected_edits()
+    if not edits:
+        return 0
+    if file_signature(plan.path) != plan.signature:
+        raise ConflictError(f"{plan.path} changed on disk since the preview")
+    write_atomic(plan.path, plan.new_text())
+    return len(edits)
+
+
+def write_plans(plans: Iterable[FilePlan], workers: int = 8) -> Tuple[int, List[Tuple[str, str]]]:
+    """Write plans in parallel; return (edits written, [(path, error)])."""
+    plans = [plan for plan in plans if plan.selected_edits()]
+    written = 0
+    failed = []
+    if not plans:
+        return written, failed
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(plans)))) as pool:
+        for plan, future in [(plan, pool.submit(write_plan, plan)) for plan in plans]:
+            try:
+                written += future.result()
+            except OSError as e:
+                logger.warning(f"Replace failed for {plan.path}: {e}")
+                failed.append((plan.path, str(e)))
+    return written, failed
+
+
+class ReplacePreview:
+    """Stream a FilePlan per matching file, open buffers first.
+
+    `buffers` maps absolute paths of open tabs to their current text, which
+    is planned instead of the file on disk. The other files are scanned by
+    a ParallelSearch and planned as their matches arrive. Planning stops
+    once max_matches replacements are planned, which is reported as
+    capped. `on_plan(plan)` and `on_done(files, cancelled, capped)` run on
+    the preview thread.
+    """
+
+    def __init__(self, query: SearchQuery, replacement: str, buffers: Dict[str, str],
+                 workers: int = 0, max_matches: int = 50000) -> None:
+        self.query = query
+        self.replacement = replacement
+        self.buffers = buffers
+        self.files = 0
+        self.total = 0
+        self.max_matches = max_matches
+        self.capped = False
+        self._search = ParallelSearch(query, max_matches=max_matches, workers=workers)
+        self._seen = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._search.cancelled
+
+    def cancel(self) -> None:
+        self._search.cancel()
+
+    def start(self, files: Iterable, on_plan: Callable[[FilePlan], None],
+              on_done: Callable[[int, bool, bool], None]) -> None:
+        threading.Thread(target=self.run, args=(files, on_plan, on_done),
+                         name="replace-preview", daemon=True).start()
+
+    def run(self, files: Iterable, on_plan: Callable[[FilePlan], None],
+            on_done: Callable[[int, bool, bool], None]) -> None:
+        for path, text in self.buffers.items():
+            if self.cancelled or self.capped:
+                break
+            self._seen.add(path)
+            disk = read_text(path)
+            self._emit(plan_text(self.query, self.replacement, text, path,
+                                 disk[1] if disk and disk[0] == text else None), on_plan)
+
+        if not self.cancelled and not self.capped:
+            # Every matching line is at least one replacement
+            self._search.max_matches = self.max_matches - self.total
+            others = (path for path in map(str, files) if os.path.abspath(path) not in self._seen)
+            self._search.run(others, lambda batch: self._plan_batch(batch, on_plan),
+                             self._search_done)
+        on_done(self.files, self.cancelled, self.capped)
+
+    def _search_done(self, total: int, cancelled: bool, capped: bool) -> None:
+        self.capped = self.capped or capped
+
+    def _plan_batch(self, batch, on_plan) -> None:
+        for path, _, _ in batch:
+            path = os.path.abspath(str(path))
+            if path in self._seen or self.cancelled or self.capped:
+                continue
+            self._seen.add(path)
+            disk = read_text(path)
+            if disk is not None:
+                self._emit(plan_text(self.query, self.replacement, disk[0], path, disk[1]), on_plan)
+
+    def _emit(self, plan: Optional[FilePlan], on_plan) -> None:
+        if plan is not None:
+            self.files += 1
+            self.total += plan.count
+            if self.total >= self.max_matches:
+                self.capped = True
+                # Lowering the search's cap to what it found makes it stop
+                self._search.max_matches = min(self._search.max_matches, self._search.total)
+            on_plan(plan)
@@ -2,18 +2,34 @@
 import customtkinter
 import tkinter
 import os
+import sqlite3
 from pathlib import Path
 import threading
+from config import config
+from logger import logger
+from search_index import get_index, iter_workspace_files
+from parallel_search import ParallelSearch
+from search_engine import SearchQuery, SearchError
+from search_cache import search_cache
+from results_view import ResultsView, context_lines
+from project_replace import (ReplacePreview, apply_to_document, apply_to_widget,
+                             validate_replacement, write_plans)
 
 
 class ProjectSearchWindow(customtkinter.CTkToplevel):
     """Window for searching text across project files."""
     
-    def __init__(self, master, workspace_path, open_file_callback):
+    def __init__(self, master, workspace_path, open_file_callback, query=None,
+                 case_sensitive=False, whole_word=False, regex=False, replace=None):
         super().__init__(master)
         self.workspace_path = Path(workspace_path)
         self.open_file_callback = open_file_callback
         self.search_thread = None
+        self.search = None
+        self.result_count = 0
+        # Replace preview: plans in arrival order, hunks by their text tag
+        self.plans = []
+        self.hunk_tags = {}
         
         self.title("Search in Project")
         self.geometry("700x500")
@@ -39,9 +55,30 @@ class ProjectSearchWindow(customtkinter.CTkToplevel):
         )
         self.search_btn.grid(row=0, column=1)
         
+        self.replace_entry = customtkinter.CTkEntry(
+            search_frame,
+            placeholder_text="Replace with..."
+        )
+        self.replace_entry.grid(row=1, column=0, sticky="ew", padx=(0, 5), pady=(5, 0))
+        
+        replace_buttons = customtkinter.CTkFrame(search_frame, fg_color="transparent")
+        replace_buttons.grid(row=1, column=1, pady=(5, 0))
+        
+        self.preview_btn = customtkinter.CTkButton(
+            replace_buttons, text="Preview", width=80,
+            command=self.start_replace_preview
+        )
+        self.preview_btn.pack(side="left")
+        
+        self.apply_btn = customtkinter.CTkButton(
+            replace_buttons, text="Apply", width=80, state="disabled",
+            command=self.apply_replace
+        )
+        self.apply_btn.pack(side="left", padx=(5, 0))
+        
         # Options
         options_frame = customtkinter.CTkFrame(search_frame)
-        options_frame.grid(row=1, column=0, columnspan=2, sticky="w", pady=(5, 0))
+        options_frame.grid(row=2, column=0, columnspan=2, sticky="w", pady=(5, 0))
         
         self.case_sensitive = customtkinter.CTkCheckBox(
             options_frame, text="Case sensitive"
@@ -53,116 +90,393 @@ class ProjectSearchWindow(customtkinter.CTkToplevel):
         )
         self.whole_word.pack(side="left", padx=5)
         
+        self.regex = customtkinter.CTkCheckBox(
+            options_frame, text="Regex"
+        )
+        self.regex.pack(side="left", padx=5)
+        
+        self.collapse_btn = customtkinter.CTkButton(
+            options_frame, text="Collapse all", width=90,
+            command=self.toggle_collapse_all
+        )
+        self.collapse_btn.pack(side="left", padx=5)
+        
         # Results
         results_frame = customtkinter.CTkFrame(self)
         results_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
         results_frame.grid_columnconfigure(0, weight=1)
         results_frame.grid_rowconfigure(0, weight=1)
         
-        self.results_text = customtkinter.CTkTextbox(
+        self.results_view = ResultsView(
+            results_frame, self.workspace_path,
+            on_open=self.open_result, on_select=self.show_context
+        )
+        self.results_view.grid(row=0, column=0, sticky="nsew")
+        
+        # Replace preview, shown instead of the results list
+        self.preview_text = customtkinter.CTkTextbox(
             results_frame, font=("monospace", 11)
         )
-        self.results_text.grid(row=0, column=0, sticky="nsew")
-        self.results_text.bind("<Double-Button-1>", self.on_result_click)
+        
+        # Lines around the selected match, read when it is selected
+        self.context_text = customtkinter.CTkTextbox(
+            results_frame, font=("monospace", 11), height=110, state="disabled"
+        )
+        self.context_text.grid(row=1, column=0, sticky="ew", pady=(5, 0))
+        self.context_text.tag_config("match", background="#264F78")
         
         # Status
         self.status_label = customtkinter.CTkLabel(
             self, text="Enter search term and press Search"
         )
         self.status_label.grid(row=2, column=0, sticky="w", padx=10, pady=(0, 10))
+        
+        self.preview_text.tag_config("file", foreground="#4A9EFF", underline=True)
+        self.preview_text.tag_config("hunk", foreground="#C586C0")
+        self.preview_text.tag_config("removed", foreground="#F48771")
+        self.preview_text.tag_config("added", foreground="#89D185")
+        
+        if query:
+            self.search_entry.insert(0, query)
+            for checkbox, checked in ((self.case_sensitive, case_sensitive),
+                                      (self.whole_word, whole_word), (self.regex, regex)):
+                if checked:
+                    checkbox.select()
+            if replace:
+                self.replace_entry.insert(0, replace)
+                self.after(0, self.start_replace_preview)
+            else:
+                self.after(0, self.start_search)
+    
+    def build_query(self):
+        """Return the SearchQuery for the entry and options, or None if empty."""
+        text = self.search_entry.get().strip()
+        if not text:
+            return None
+        return SearchQuery(
+            text,
+            case_sensitive=bool(self.case_sensitive.get()),
+            whole_word=bool(self.whole_word.get()),
+            regex=bool(self.regex.get())
+        )
+    
+    def reset_results(self, status, preview=False):
+        """Clear results and the replace preview before a new run."""
+        self.search_btn.configure(text="Cancel")
+        self.apply_btn.configure(state="disabled")
+        for tag in self.hunk_tags:
+            self.preview_text.tag_delete(tag)
+        self.plans = []
+        self.hunk_tags = {}
+        self.preview_text.delete("1.0", "end")
+        self.results_view.clear()
+        self.collapse_btn.configure(text="Collapse all")
+        self.show_context(None, None)
+        if preview:
+            self.results_view.grid_remove()
+            self.context_text.grid_remove()
+            self.preview_text.grid(row=0, column=0, sticky="nsew")
+        else:
+            self.preview_text.grid_remove()
+            self.results_view.grid()
+            self.context_text.grid()
+        self.status_label.configure(text=status)
+        self.result_count = 0
     
     def start_search(self):
-        """Start search in background thread."""
-        query = self.search_entry.get().strip()
-        if not query:
+        """Start a search, or cancel the one running."""
+        if self.search is not None:
+            self.search.cancel()
+            return
+        
+        query = self.build_query()
+        if query is None:
+            return
+        text = query.text
+        try:
+            query.validate()
+        except SearchError as e:
+            self.status_label.configure(text=str(e))
             return
         
-        self.search_btn.configure(state="disabled", text="Searching...")
-        self.results_text.delete("1.0", "end")
-        self.status_label.configure(text="Searching...")
+        self.reset_results("Searching...")
+        
+        max_matches = config.get_int('SEARCH_MAX_RESULTS', 50000)
+        search = ParallelSearch(query, max_matches=max_matches,
+                                workers=config.get_int('SEARCH_WORKERS', 0))
+        self.search = search
         
         def search_thread():
-            results = self.search_in_files(query)
-            self.after(0, lambda: self.display_results(results, query))
+            # Reuse results of files unchanged since the same or a broader query
+            run = search_cache.plan(self.workspace_path, query, self.candidate_files(query))
+            cached = run.cached[:max_matches]
+            if cached:
+                self.after(0, lambda: self.display_results(cached, text, search))
+            search.max_matches = max_matches - len(cached)
+            found = []
+            
+            def on_batch(batch):
+                found.extend(batch)
+                self.after(0, lambda: self.display_results(batch, text, search))
+            
+            def on_done(total, cancelled, capped):
+                capped = capped or len(run.cached) > len(cached)
+                if not cancelled and not capped:
+                    search_cache.store(self.workspace_path, query, run, found)
+                self.after(0, lambda: self.search_finished(search, text, cancelled, capped))
+            
+            if search.max_matches <= 0:
+                on_done(0, search.cancelled, True)
+            else:
+                search.run(run.scan, on_batch, on_done)
         
         self.search_thread = threading.Thread(target=search_thread, daemon=True)
         self.search_thread.start()
     
-    def search_in_files(self, query):
-        """Search for query in all project files."""
-        results = []
-        case_sensitive = self.case_sensitive.get()
-        whole_word = self.whole_word.get()
+    def destroy(self):
+        if self.search is not None:
+            self.search.cancel()
+        super().destroy()
+    
+    def candidate_files(self, query):
+        """Return files that may match, narrowed by the trigram index when possible."""
+        literal = query.index_literal
+        if literal and config.get_bool('SEARCH_INDEX_ENABLED', True):
+            try:
+                index = get_index(self.workspace_path)
+                if not index.built:
+                    self.after(0, lambda: self.status_label.configure(text="Indexing workspace..."))
+                index.ensure_fresh()
+                files = index.candidates(literal, query.index_case_sensitive)
+                if files is not None:
+                    return files
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Search index unavailable, scanning all files: {e}")
         
-        search_query = query if case_sensitive else query.lower()
+        return (Path(path) for path, _ in iter_workspace_files(self.workspace_path))
+    
+    def display_results(self, results, query, search=None):
+        """Append a batch of results as it streams in."""
+        if search is not self.search:
+            return  # Batch from a cancelled or replaced search
         
-        # File extensions to search
-        extensions = {'.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs', 
-                     '.rb', '.php', '.html', '.css', '.txt', '.md', '.json', '.xml'}
+        self.results_view.add(results)
+        self.result_count += len(results)
+        self.status_label.configure(text=f"Found {self.result_count} results so far...")
+    
+    def search_finished(self, search, query, cancelled, capped):
+        """Restore the button and report the outcome of a search."""
+        if search is not self.search:
+            return
+        self.search = None
+        self.search_btn.configure(state="normal", text="Search")
+        
+        if cancelled:
+            self.status_label.configure(text=f"Search cancelled ({self.result_count} results)")
+        elif capped:
+            self.status_label.configure(text=f"Showing the first {self.result_count} results")
+        elif not self.result_count:
+            self.status_label.configure(text=f"No results found for '{query}'")
+        else:
+            self.status_label.configure(text=f"Found {self.result_count} results")
+    
+    def start_replace_preview(self):
+        """Stream a diff preview of replacing the query across the project."""
+        if self.search is not None:
+            self.search.cancel()
+            return
+        
+        query = self.build_query()
+        if query is None:
+            return
+        replacement = self.replace_entry.get()
+        try:
+            validate_replacement(query, replacement)
+        except SearchError as e:
+            self.status_label.configure(text=str(e))
+            return
+        
+        self.reset_results("Preparing replace preview...", preview=True)
+        buffers = {path: self.tab_text(tab) for path, tab in self.open_tabs().items()}
+        preview = ReplacePreview(query, replacement, buffers,
+                                 workers=config.get_int('SEARCH_WORKERS', 0),
+                                 max_matches=config.get_int('SEARCH_MAX_RESULTS', 50000))
+        self.search = preview
+        
+        def preview_thread():
+            files = self.candidate_files(query)
+            preview.run(
+                files,
+                lambda plan: self.after(0, lambda: self.display_plan(plan, preview)),
+                lambda total, cancelled, capped: self.after(
+                    0, lambda: self.preview_finished(preview, cancelled, capped))
+            )
+        
+        self.search_thread = threading.Thread(target=preview_thread, daemon=True)
+        self.search_thread.start()
+    
+    def open_tabs(self):
+        """Return {absolute path: tab} for the editor's open files."""
+        tab_manager = getattr(self.master, "tab_manager", None)
+        if tab_manager is None:
+            return {}
+        return {os.path.abspath(tab.file_path): tab for tab in tab_manager.tabs if tab.file_path}
+    
+    def tab_editor(self, tab):
+        """The widget showing a tab, if any (the shared editor shows only the current tab)."""
+        tab_manager = self.master.tab_manager
+        if tab.editor is not None:
+            return tab.editor
+        return tab_manager.text_area if tab is tab_manager.get_current_tab() else None
+    
+    def tab_text(self, tab):
+        editor = self.tab_editor(tab)
+        return editor.get_text() if editor is not None else tab.content
+    
+    def display_plan(self, plan, preview):
+        """Append one file's hunks, each with a toggle to include it."""
+        if preview is not self.search:
+            return
         
+        textbox = getattr(self.preview_text, "_textbox", self.preview_text)
         try:
-            for root, dirs, files in os.walk(self.workspace_path):
-                # Skip common directories
-                dirs[:] = [d for d in dirs if d not in {'.git', '__pycache__', 'node_modules', 'venv', 'env'}]
-                
-                for file in files:
-                    if Path(file).suffix in extensions:
-                        file_path = Path(root) / file
-                        try:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                for line_num, line in enumerate(f, 1):
-                                    search_line = line if case_sensitive else line.lower()
-                                    
-                                    if whole_word:
-                                        import re
-                                        pattern = r'\b' + re.escape(search_query) + r'\b'
-                                        if re.search(pattern, search_line):
-                                            results.append((file_path, line_num, line.rstrip()))
-                                    else:
-                                        if search_query in search_line:
-                                            results.append((file_path, line_num, line.rstrip()))
-                        except Exception:
-                            continue
-        except Exception:
-            pass
-        
-        return results
-    
-    def display_results(self, results, query):
-        """Display search results."""
+            rel_path = os.path.relpath(plan.path, self.workspace_path)
+        except ValueError:
+            rel_path = plan.path
+        chunks = [f"{rel_path} ({plan.count} changes)\n", "file"]
+        for hunk in plan.hunks:
+            tag = f"hunk{len(self.hunk_tags)}"
+            self.hunk_tags[tag] = hunk
+            chunks.extend((f"[x] line {hunk.first_line}\n", ("hunk", tag)))
+            for line in hunk.diff_lines():
+                chunks.extend((f"  {line}\n", "removed" if line[0] == "-" else "added"))
+            self.preview_text.tag_bind(tag, "<Button-1>", lambda e, t=tag: self.toggle_hunk(t))
+        chunks.extend(("\n", ""))
+        textbox.insert("end", *chunks)
+        
+        self.plans.append(plan)
+        self.result_count += plan.count
+        self.status_label.configure(
+            text=f"{self.result_count} replacements in {len(self.plans)} files so far...")
+    
+    def toggle_hunk(self, tag):
+        """Include or skip a hunk, flipping its [x] marker."""
+        hunk = self.hunk_tags.get(tag)
+        ranges = self.preview_text.tag_ranges(tag)
+        if hunk is None or not ranges:
+            return "break"
+        hunk.selected = not hunk.selected
+        textbox = getattr(self.preview_text, "_textbox", self.preview_text)
+        start = str(ranges[0])
+        textbox.delete(start, f"{start}+3c")
+        textbox.insert(start, "[x]" if hunk.selected else "[ ]", ("hunk", tag))
+        return "break"
+    
+    def preview_finished(self, preview, cancelled, capped):
+        """Enable Apply once the preview is complete, unless it was cut short."""
+        if preview is not self.search:
+            return
+        self.search = None
         self.search_btn.configure(state="normal", text="Search")
         
-        if not results:
-            self.results_text.insert("1.0", f"No results found for '{query}'")
-            self.status_label.configure(text="No results found")
+        if cancelled:
+            self.status_label.configure(text="Replace preview cancelled")
+            return
+        if capped:
+            # Applying only the previewed part would leave the project half replaced
+            self.status_label.configure(
+                text=f"More than {preview.max_matches} replacements, narrow the search "
+                     "or raise SEARCH_MAX_RESULTS")
+            return
+        if not self.plans:
+            self.status_label.configure(text="Nothing to replace")
+            return
+        self.apply_btn.configure(state="normal")
+        self.status_label.configure(
+            text=f"{self.result_count} replacements in {len(self.plans)} files, "
+                 "click a hunk to skip it")
+    
+    def apply_replace(self):
+        """Apply the selected hunks: open tabs in place, other files on disk."""
+        if self.search is not None or not self.plans:
             return
+        self.apply_btn.configure(state="disabled")
+        tabs = self.open_tabs()
+        to_write = []
+        # Edits per file that has been or will be changed
+        counts = {}
+        stale = []
+        
+        for plan in self.plans:
+            tab = tabs.get(plan.path)
+            if tab is None:
+                to_write.append(plan)
+                counts[plan.path] = len(plan.selected_edits())
+                continue
+            if self.tab_text(tab) != plan.text:
+                stale.append(plan.path)
+                continue
+            editor = self.tab_editor(tab)
+            if editor is not None:
+                counts[plan.path] = apply_to_widget(editor, plan)
+            else:
+                tab.thaw()
+                counts[plan.path] = apply_to_document(tab.document, plan)
+            if plan.matches_disk:
+                to_write.append(plan)
+            elif plan.selected_edits():
+                tab.modified = True
+                self.master.tab_manager.update_tab_title(self.master.tab_manager.tabs.index(tab))
         
-        self.status_label.configure(text=f"Found {len(results)} results")
+        self.plans = []
+        self.status_label.configure(text="Writing files...")
         
-        for file_path, line_num, line in results:
-            rel_path = file_path.relative_to(self.workspace_path)
-            self.results_text.insert("end", f"{rel_path}:{line_num}\n", "file")
-            self.results_text.insert("end", f"  {line}\n\n")
+        def write_thread():
+            _, failed = write_plans(to_write, config.get_int('REPLACE_WRITE_WORKERS', 8))
+            self.after(0, lambda: self.replace_finished(counts, failed, stale))
         
-        # Configure tag for clickable file paths
-        self.results_text.tag_config("file", foreground="#4A9EFF", underline=True)
+        threading.Thread(target=write_thread, daemon=True).start()
     
-    def on_result_click(self, event):
-        """Handle click on search result."""
-        try:
-            index = self.results_text.index(f"@{event.x},{event.y}")
-            line_start = self.results_text.index(f"{index} linestart")
-            line_end = self.results_text.index(f"{index} lineend")
-            line_text = self.results_text.get(line_start, line_end)
-            
-            if ":" in line_text and not line_text.startswith(" "):
-                parts = line_text.split(":")
-                if len(parts) >= 2:
-                    file_path = self.workspace_path / parts[0]
-                    line_num = int(parts[1])
-                    
-                    if file_path.exists():
-                        self.open_file_callback(str(file_path), line_num)
-                        self.destroy()
-        except Exception:
-            pass
+    def replace_finished(self, counts, failed, stale):
+        """Report how many replacements landed and which files were skipped."""
+        tabs = self.open_tabs()
+        for path, _ in failed:
+            tab = tabs.get(path)
+            if tab is None:
+                counts.pop(path, None)
+            else:
+                # The tab was edited in place, only saving it failed
+                tab.modified = True
+                self.master.tab_manager.update_tab_title(self.master.tab_manager.tabs.index(tab))
+        for path in stale:
+            logger.warning(f"Replace skipped, tab changed since preview: {path}")
+        
+        applied = {path: count for path, count in counts.items() if count}
+        message = f"Replaced {sum(applied.values())} occurrences in {len(applied)} files"
+        if failed or stale:
+            message += f", {len(failed) + len(stale)} files skipped (see log)"
+        self.status_label.configure(text=message)
+    
+    def toggle_collapse_all(self):
+        """Collapse every file's matches, or expand them all again."""
+        collapse = self.collapse_btn.cget("text") == "Collapse all"
+        self.results_view.model.set_all_collapsed(collapse)
+        self.results_view.set_top(0)
+        self.results_view.redraw()
+        self.collapse_btn.configure(text="Expand all" if collapse else "Collapse all")
+    
+    def show_context(self, path, line_num):
+        """Show the lines around a selected match."""
+        self.context_text.configure(state="normal")
+        self.context_text.delete("1.0", "end")
+        if path is not None:
+            for number, line in context_lines(path, line_num):
+                self.context_text.insert("end", f"{number:>6}  {line}\n",
+                                         "match" if number == line_num else "")
+        self.context_text.configure(state="disabled")
+    
+    def open_result(self, path, line_num):
+        """Open a result in the editor and close the window."""
+        if os.path.exists(path):
+            self.open_file_callback(path, line_num)
+            self.destroy()
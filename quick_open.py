@@ -0,0 +1,258 @@
+"""Quick Open: fuzzy file finder over an in-memory index of workspace paths."""
+import customtkinter
+import itertools
+import os
+import threading
+import tkinter
+from typing import Dict, List, NamedTuple
+from file_watcher import RESCAN
+from fuzzy import FuzzyIndex
+from logger import logger
+from workspace_files import IGNORE_FILES, get_workspace_files
+
+
+class QuickOpenMatch(NamedTuple):
+    path: str                # Absolute path
+    relative: str            # Path shown in the list, '/'-separated
+    score: float
+    positions: List[int]     # Matched offsets in relative
+
+
+class PathIndex:
+    """Relative paths of a workspace, fuzzy-searchable per keystroke."""
+
+    def __init__(self, root) -> None:
+        self.root = os.path.abspath(str(root))
+        self.built = False
+        self._lock = threading.RLock()
+        self._fuzzy = FuzzyIndex()
+        self._slots: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def build(self) -> None:
+        """Walk the workspace and index every file the explorer would show."""
+        paths = [self._relative(entry.path)
+                 for entry in get_workspace_files(self.root).walk() if not entry.is_dir]
+        self.load(paths)
+        logger.debug(f"Quick open index: {len(paths)} paths in {self.root}")
+
+    def load(self, paths) -> None:
+        """Replace the index with relative '/'-separated paths."""
+        paths = list(dict.fromkeys(paths))
+        with self._lock:
+            self._fuzzy.load(paths)
+            self._slots = {path: slot for slot, path in enumerate(paths)}
+            self.built = True
+
+    def ensure_built(self) -> None:
+        if not self.built:
+            self.build()
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _add(self, relative: str) -> None:
+        if relative not in self._slots:
+            self._slots[relative] = self._fuzzy.add(relative)
+
+    def _remove(self, relative: str) -> None:
+        slot = self._slots.pop(relative, None)
+        if slot is not None:
+            self._fuzzy.remove(slot)
+
+    def apply_changes(self, changes: Dict[str, str]) -> None:
+        """Update paths for a batch of {path: kind} changes from a file watcher."""
+        with self._lock:
+            if not self.built:
+                return
+            files = get_workspace_files(self.root)
+            for path, kind in changes.items():
+                if kind == RESCAN or os.path.basename(path) in IGNORE_FILES:
+                    self.build()
+                    return
+                relative = self._relative(path)
+                if os.path.isdir(path):
+                    if not files.is_ignored(path, True):
+                        for entry in files.walk(path):
+                            if not entry.is_dir:
+                                self._add(self._relative(entry.path))
+                elif os.path.exists(path):
+                    if not files.is_ignored(path, False):
+                        self._add(relative)
+                else:
+                    self._remove(relative)
+                    prefix = relative + "/"
+                    for known in [p for p in self._slots if p.startswith(prefix)]:
+                        self._remove(known)
+            if self._fuzzy.size > 2 * len(self._slots) + 1000:
+                # Mostly removed slots: compact
+                self.load(list(self._slots))
+
+    def search(self, query: str, limit: int = 50) -> List[QuickOpenMatch]:
+        """Best matches for query, best first. Spaces in the query are ignored."""
+        query = query.lower().replace(" ", "").replace("\\", "/")
+        with self._lock:
+            if not query:
+                paths = list(itertools.islice(self._slots, limit))
+                return [QuickOpenMatch(os.path.join(self.root, path), path, 0.0, []) for path in paths]
+            texts = self._fuzzy.texts
+            return [QuickOpenMatch(os.path.join(self.root, texts[slot]), texts[slot], score, positions)
+                    for score, slot, positions in self._fuzzy.search(query, limit)]
+
+
+_indexes: Dict[str, PathIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_path_index(root) -> PathIndex:
+    """Return the shared path index for a workspace."""
+    key = os.path.abspath(str(root))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = PathIndex(key)
+        return _indexes[key]
+
+
+class PaletteWindow(customtkinter.CTkToplevel):
+    """Fuzzy picker: an entry over a ranked list, Enter accepts the selection.
+
+    Subclasses provide ready(), prepare() (run on a thread until ready),
+    find(text), label(match), summary() and accept(match).
+    """
+
+    LIMIT = 50
+
+    def __init__(self, master, title, placeholder):
+        super().__init__(master)
+        self.matches = []
+        self._rank_pending = False
+
+        self.title(title)
+        self.geometry("600x400")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.entry = customtkinter.CTkEntry(self, placeholder_text=placeholder)
+        self.entry.grid(row=0, column=0, sticky="ew", padx=10, pady=(10, 5))
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Return>", lambda e: self.open_selected())
+        self.entry.bind("<Escape>", lambda e: self.destroy())
+        self.entry.bind("<Down>", lambda e: self.move(1))
+        self.entry.bind("<Up>", lambda e: self.move(-1))
+
+        dark = customtkinter.get_appearance_mode() == "Dark"
+        self.listbox = tkinter.Listbox(
+            self, activestyle="none", exportselection=False, borderwidth=0, highlightthickness=0,
+            font=("monospace", 11),
+            bg="#1E1E1E" if dark else "#FFFFFF", fg="#CCCCCC" if dark else "#333333",
+            selectbackground="#264F78" if dark else "#ADD6FF",
+            selectforeground="#FFFFFF" if dark else "#000000"
+        )
+        self.listbox.grid(row=1, column=0, sticky="nsew", padx=10)
+        self.listbox.bind("<Double-Button-1>", lambda e: self.open_selected())
+
+        self.status = customtkinter.CTkLabel(self, text="", anchor="w")
+        self.status.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 5))
+
+        self.entry.focus_set()
+        if self.ready():
+            self.schedule_rank()
+        else:
+            self.status.configure(text="Indexing...")
+            threading.Thread(target=self.prepare, daemon=True).start()
+            self.after(50, self._wait_until_ready)
+
+    def ready(self):
+        return True
+
+    def prepare(self):
+        pass
+
+    def find(self, text):
+        raise NotImplementedError
+
+    def label(self, match):
+        return str(match)
+
+    def summary(self):
+        return ""
+
+    def accept(self, match):
+        raise NotImplementedError
+
+    def _wait_until_ready(self):
+        if not self.winfo_exists():
+            return
+        if self.ready():
+            self.schedule_rank()
+        else:
+            self.after(50, self._wait_until_ready)
+
+    def _on_key(self, event):
+        if event.keysym not in ("Up", "Down", "Return", "Escape"):
+            self.schedule_rank()
+
+    def schedule_rank(self):
+        """Rank once per idle cycle, so a burst of keys costs one search."""
+        if not self._rank_pending:
+            self._rank_pending = True
+            self.after_idle(self._rank)
+
+    def _rank(self):
+        self._rank_pending = False
+        if not self.ready():
+            return
+        self.matches = self.find(self.entry.get())
+        self.listbox.delete(0, "end")
+        for match in self.matches:
+            self.listbox.insert("end", self.label(match))
+        if self.matches:
+            self.listbox.selection_set(0)
+        self.status.configure(text=self.summary())
+
+    def move(self, step):
+        if not self.matches:
+            return "break"
+        current = self.listbox.curselection()
+        index = max(0, min(len(self.matches) - 1, (current[0] if current else -1) + step))
+        self.listbox.selection_clear(0, "end")
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+        return "break"
+
+    def open_selected(self):
+        current = self.listbox.curselection()
+        if not current or current[0] >= len(self.matches):
+            return
+        match = self.matches[current[0]]
+        self.destroy()
+        self.accept(match)
+
+
+class QuickOpenWindow(PaletteWindow):
+    """Ctrl+P palette: type part of a path, Enter opens the selected file."""
+
+    def __init__(self, master, workspace_path, open_file_callback):
+        self.index = get_path_index(workspace_path)
+        self.open_file_callback = open_file_callback
+        super().__init__(master, "Go to File", "Search files by name...")
+
+    def ready(self):
+        return self.index.built
+
+    def prepare(self):
+        self.index.ensure_built()
+
+    def find(self, text):
+        return self.index.search(text, self.LIMIT)
+
+    def label(self, match):
+        return match.relative
+
+    def summary(self):
+        return f"{len(self.index)} files"
+
+    def accept(self, match):
+        self.open_file_callback(match.path)
@@ -0,0 +1,267 @@
+"""Virtualised project search results, grouped by file."""
+import customtkinter
+import linecache
+import os
+import tkinter
+import tkinter.font
+from bisect import bisect_right
+from typing import Dict, List, Optional, Set, Tuple
+
+# Row kinds
+HEADER = "file"
+MATCH = "match"
+
+# Longer lines are cut when stored; the editor shows the rest
+MAX_LINE_CHARS = 400
+
+
+class ResultModel:
+    """Search results grouped by file, addressed as a flat list of rows.
+
+    Every file contributes a header row followed by one row per match
+    unless it is collapsed. Row lookup bisects the first row of each file,
+    and appending to or collapsing a file only invalidates the offsets of
+    the files after it.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self.files: List[str] = []
+        self.matches: Dict[str, List[Tuple[int, str]]] = {}
+        self.collapsed: Set[str] = set()
+        self.total = 0
+        self._index: Dict[str, int] = {}
+        self._starts: List[int] = []
+        self._valid = 0  # _starts[:_valid] are up to date
+
+    def add(self, results) -> None:
+        """Append (path, line number, line) results."""
+        for path, line_num, line in results:
+            key = str(path)
+            group = self.matches.get(key)
+            if group is None:
+                group = self.matches[key] = []
+                self._index[key] = len(self.files)
+                self.files.append(key)
+                self._starts.append(0)
+            group.append((line_num, line[:MAX_LINE_CHARS]))
+            self._invalidate_after(key)
+            self.total += 1
+
+    def _invalidate_after(self, path: str) -> None:
+        self._valid = min(self._valid, self._index[path] + 1)
+
+    def _size(self, index: int) -> int:
+        path = self.files[index]
+        return 1 if path in self.collapsed else 1 + len(self.matches[path])
+
+    def _ensure_starts(self) -> None:
+        for i in range(max(self._valid, 1), len(self.files)):
+            self._starts[i] = self._starts[i - 1] + self._size(i - 1)
+        self._valid = len(self.files)
+
+    @property
+    def row_count(self) -> int:
+        if not self.files:
+            return 0
+        self._ensure_starts()
+        return self._starts[-1] + self._size(len(self.files) - 1)
+
+    def row(self, index: int) -> Tuple:
+        """Return (HEADER, path, matches, collapsed) or (MATCH, path, line number, line)."""
+        self._ensure_starts()
+        group = bisect_right(self._starts, index) - 1
+        path = self.files[group]
+        offset = index - self._starts[group]
+        if offset == 0:
+            return HEADER, path, len(self.matches[path]), path in self.collapsed
+        line_num, line = self.matches[path][offset - 1]
+        return MATCH, path, line_num, line
+
+    def toggle(self, path: str) -> None:
+        """Collapse or expand a file's matches."""
+        if path in self.collapsed:
+            self.collapsed.discard(path)
+        else:
+            self.collapsed.add(path)
+        self._invalidate_after(path)
+
+    def set_all_collapsed(self, collapsed: bool) -> None:
+        self.collapsed = set(self.files) if collapsed else set()
+        self._valid = 0
+
+
+def context_lines(path: str, line_num: int, radius: int = 3) -> List[Tuple[int, str]]:
+    """Lines around a match, read on demand and cached per file."""
+    linecache.checkcache(path)
+    lines = []
+    for number in range(max(1, line_num - radius), line_num + radius + 1):
+        line = linecache.getline(path, number)
+        if not line and number > line_num:
+            break
+        lines.append((number, line.rstrip("\r\n")))
+    return lines
+
+
+class ResultsView(customtkinter.CTkFrame):
+    """Results list that draws only the visible rows.
+
+    Rows are a recycled pool of canvas items, so the cost of a redraw
+    depends on the window height, not on the number of results. Results
+    streamed in with add() are drawn once per idle cycle.
+    `on_select(path, line)` runs on a single click on a match,
+    `on_open(path, line)` on a double click.
+    """
+
+    INDENT = 20
+
+    def __init__(self, master, root_path, on_open=None, on_select=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.root_path = str(root_path)
+        self.on_open = on_open
+        self.on_select = on_select
+        self.model = ResultModel()
+        self.top = 0
+        self.selected: Optional[Tuple[str, int]] = None
+        self._items = []  # (background, text) canvas items per visible row
+        self._redraw_pending = False
+
+        self.font = tkinter.font.Font(family="monospace", size=11)
+        self.row_height = self.font.metrics("linespace") + 4
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.canvas = customtkinter.CTkCanvas(self, highlightthickness=0, bd=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = customtkinter.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll(-int(event.delta / 120) * 3))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll(3))
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Double-Button-1>", self._on_double_click)
+        self._apply_colors()
+
+    def _apply_colors(self):
+        dark = customtkinter.get_appearance_mode() == "Dark"
+        self.colors = {
+            "background": "#1E1E1E" if dark else "#FFFFFF",
+            "text": "#CCCCCC" if dark else "#333333",
+            "file": "#4A9EFF" if dark else "#0066BF",
+            "selected": "#264F78" if dark else "#ADD6FF",
+        }
+        self.canvas.configure(bg=self.colors["background"])
+
+    @property
+    def visible_rows(self) -> int:
+        return max(1, self.canvas.winfo_height() // self.row_height + 1)
+
+    def clear(self):
+        self.model.clear()
+        self.top = 0
+        self.selected = None
+        self.schedule_redraw()
+
+    def add(self, results):
+        """Append streamed results; drawing waits for the next idle cycle."""
+        self.model.add(results)
+        self.schedule_redraw()
+
+    def schedule_redraw(self):
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._idle_redraw)
+
+    def _idle_redraw(self):
+        self._redraw_pending = False
+        self.redraw()
+
+    def yview(self, *args):
+        """Scrollbar protocol: moveto fraction / scroll n units|pages."""
+        rows = self.model.row_count
+        if args and args[0] == "moveto":
+            self.set_top(int(float(args[1]) * rows))
+        elif args and args[0] == "scroll":
+            step = int(args[1])
+            self.scroll(step * (self.visible_rows - 1) if args[2] == "pages" else step)
+
+    def scroll(self, rows):
+        self.set_top(self.top + rows)
+
+    def set_top(self, top):
+        top = max(0, min(top, self.model.row_count - self.visible_rows + 1))
+        if top != self.top:
+            self.top = top
+            self.redraw()
+
+    def redraw(self):
+        try:
+            width = self.canvas.winfo_width()
+            count = self.visible_rows
+        except tkinter.TclError:
+            return
+        rows = self.model.row_count
+        self.top = max(0, min(self.top, rows - count + 1))
+
+        while len(self._items) < count:
+            y = len(self._items) * self.row_height
+            background = self.canvas.create_rectangle(0, y, width, y + self.row_height,
+                                                      width=0, fill="")
+            text = self.canvas.create_text(4, y + 2, anchor="nw", font=self.font, text="")
+            self._items.append((background, text))
+
+        for i, (background, text) in enumerate(self._items):
+            index = self.top + i
+            if i >= count or index >= rows:
+                self.canvas.itemconfigure(text, text="")
+                self.canvas.itemconfigure(background, fill="")
+                continue
+            label, x, color, selected = self._render(self.model.row(index))
+            self.canvas.coords(text, x, i * self.row_height + 2)
+            self.canvas.itemconfigure(text, text=label, fill=color)
+            self.canvas.coords(background, 0, i * self.row_height, width, (i + 1) * self.row_height)
+            self.canvas.itemconfigure(background, fill=self.colors["selected"] if selected else "")
+
+        if rows:
+            self.scrollbar.set(self.top / rows, min(1.0, (self.top + count) / rows))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _render(self, row):
+        """Return (text, x, color, selected) for one row."""
+        if row[0] == HEADER:
+            _, path, matches, collapsed = row
+            try:
+                name = os.path.relpath(path, self.root_path)
+            except ValueError:
+                name = path
+            marker = "▸" if collapsed else "▾"
+            return f"{marker} {name}  ({matches})", 4, self.colors["file"], False
+        _, path, line_num, line = row
+        return (f"{line_num:>6}  {line.strip()}", self.INDENT, self.colors["text"],
+                self.selected == (path, line_num))
+
+    def _row_at(self, y):
+        index = self.top + y // self.row_height
+        return self.model.row(index) if 0 <= index < self.model.row_count else None
+
+    def _on_click(self, event):
+        row = self._row_at(event.y)
+        if row is None:
+            return
+        if row[0] == HEADER:
+            self.model.toggle(row[1])
+        else:
+            self.selected = (row[1], row[2])
+            if self.on_select:
+                self.on_select(row[1], row[2])
+        self.redraw()
+
+    def _on_double_click(self, event):
+        row = self._row_at(event.y)
+        if row is not None and row[0] == MATCH and self.on_open:
+            self.on_open(row[1], row[2])
@@ -0,0 +1,143 @@
+"""Cache of recent project search results, revalidated per file."""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import config
+from search_engine import Result, SearchQuery
+
+# Files plus matches kept across all entries before the oldest are evicted
+MAX_ITEMS = 1_000_000
+
+Generation = Tuple[float, int]  # (mtime, size)
+
+
+class _Entry:
+    """Results of one complete search: every file it covered, with its generation and matches."""
+
+    def __init__(self, query: SearchQuery, files: Dict[str, Tuple[Generation, List[Tuple[int, str]]]]) -> None:
+        self.query = query
+        self.files = files
+        self.size = len(files) + sum(len(matches) for _, matches in files.values())
+
+
+class CachedRun:
+    """How to answer a query: results still valid in the cache, and files to read.
+
+    `cached` are ready to show, `scan` must be searched, and
+    `generations` holds the generation of every candidate, taken before
+    reading it. `source` is "exact" for a repeated query, "refined" when
+    an earlier, broader query limited the files, or None.
+    """
+
+    def __init__(self) -> None:
+        self.cached: List[Result] = []
+        self.scan: List[str] = []
+        self.generations: Dict[str, Generation] = {}
+        self.reused: Dict[str, List[Tuple[int, str]]] = {}
+        self.source: Optional[str] = None
+
+
+def refines(old: SearchQuery, new: SearchQuery) -> bool:
+    """Whether every file matching new also matches old.
+
+    Holds for literal queries with the same options when new contains
+    old. Regular expressions and whole-word queries don't shrink that
+    way ("a" -> "a|b", or "foo" -> "foob" as whole words).
+    """
+    if new.regex or new.whole_word or old.key[1:] != new.key[1:]:
+        return False
+    if new.case_sensitive:
+        return old.text in new.text
+    return old.text.isascii() and old.text.lower() in new.text.lower()
+
+
+class SearchCache:
+    """Recent search results keyed by (workspace, query, options).
+
+    An entry records the mtime and size of every file the search covered.
+    Repeating a query reuses the matches of files whose generation is
+    unchanged and reads only the rest; a query that refines an earlier
+    one reads only the files that matched before, plus any that changed.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_items: int = MAX_ITEMS) -> None:
+        self.max_entries = max_entries or config.get_int('SEARCH_CACHE_ENTRIES', 16)
+        self.max_items = max_items
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(workspace, query: SearchQuery) -> tuple:
+        return (os.path.abspath(str(workspace)),) + query.key
+
+    def _base(self, workspace: str, query: SearchQuery) -> Tuple[Optional[_Entry], Optional[str]]:
+        """The exact entry for query, else the broader entry with the fewest matching files."""
+        with self._lock:
+            key = self.key(workspace, query)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry, "exact"
+            best = None
+            for (root, *_), entry in self._entries.items():
+                if root == key[0] and refines(entry.query, query):
+                    if best is None or entry.size < best.size:
+                        best = entry
+            return best, "refined" if best else None
+
+    def plan(self, workspace, query: SearchQuery, candidates: Iterable) -> CachedRun:
+        """Split candidate files into reusable results and files to search."""
+        run = CachedRun()
+        base, run.source = self._base(workspace, query)
+        for candidate in candidates:
+            path = str(candidate)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            generation = (stat.st_mtime, stat.st_size)
+            run.generations[path] = generation
+            known = base.files.get(path) if base else None
+            if known is None or known[0] != generation:
+                run.scan.append(path)
+            elif run.source == "exact":
+                run.reused[path] = known[1]
+                run.cached.extend((Path(path), line, text) for line, text in known[1])
+            elif known[1]:
+                run.scan.append(path)  # Matched the broader query, may match this one
+            else:
+                run.reused[path] = []  # Didn't match the broader query, can't match this one
+        return run
+
+    def store(self, workspace, query: SearchQuery, run: CachedRun, results: Iterable[Result]) -> None:
+        """Record a complete (not capped or cancelled) search planned with run."""
+        found: Dict[str, List[Tuple[int, str]]] = {}
+        for path, line, text in results:
+            found.setdefault(str(path), []).append((line, text))
+        files = {}
+        for path, generation in run.generations.items():
+            matches = run.reused.get(path)
+            files[path] = (generation, matches if matches is not None else found.get(path, []))
+        entry = _Entry(query, files)
+
+        with self._lock:
+            key = self.key(workspace, query)
+            self._entries.pop(key, None)
+            if entry.size > self.max_items:
+                return
+            self._entries[key] = entry
+            total = sum(e.size for e in self._entries.values())
+            while len(self._entries) > self.max_entries or total > self.max_items:
+                _, evicted = self._entries.popitem(last=False)
+                total -= evicted.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Global search cache instance
+search_cache = SearchCache()
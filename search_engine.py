@@ -0,0 +1,275 @@
+"""Search engine for project and editor search: literal, whole-word and regex."""
+import mmap
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+Result = Tuple[Path, int, str]
+
+_LITERAL = sre_parse.LITERAL
+_SUBPATTERN = sre_parse.SUBPATTERN
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+_AT = sre_parse.AT
+# Word boundaries, which bytes patterns only find around ASCII letters
+_WORD_BOUNDARIES = (sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY)
+_IN = sre_parse.IN
+_RANGE = sre_parse.RANGE
+_BRANCH = sre_parse.BRANCH
+_GROUPREF = sre_parse.GROUPREF
+_ASSERTS = (sre_parse.ASSERT, sre_parse.ASSERT_NOT)
+
+# ASCII letters that match a non-ASCII character under Unicode IGNORECASE
+_UNICODE_FOLDS = frozenset("iks")
+
+
+class SearchError(ValueError):
+    """Raised for a query that can't be compiled, e.g. an invalid regex."""
+
+
+def required_literals(pattern: str, flags: int = 0) -> Tuple[List[str], bool]:
+    """Return substrings every match of a regex must contain.
+
+    The second value is True if any of them may match case-insensitively
+    (an IGNORECASE flag anywhere in the pattern). Alternations, classes
+    and optional parts just end a literal run, so the result is always
+    safe to prefilter with, if not the tightest possible.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return [], True
+    folded = [bool(parsed.state.flags & re.IGNORECASE)]
+    literals: List[str] = []
+
+    def walk(items) -> None:
+        run: List[str] = []
+
+        def flush() -> None:
+            if run:
+                literals.append("".join(run))
+                run.clear()
+
+        for op, av in items:
+            if op is _LITERAL:
+                run.append(chr(av))
+            elif op is _AT:
+                continue  # Zero-width anchors don't break a run
+            elif op is _SUBPATTERN:
+                flush()
+                _, add_flags, del_flags, sub = av
+                if (add_flags | del_flags) & re.IGNORECASE:
+                    folded[0] = True
+                walk(sub)
+            elif op in _REPEATS and av[0] >= 1:
+                flush()
+                walk(av[2])
+            else:
+                flush()
+        flush()
+
+    walk(parsed)
+    return [literal for literal in literals if literal], folded[0]
+
+
+def ascii_only(pattern: str, flags: int = 0) -> bool:
+    """Whether a regex can only match ASCII text, so it may run on raw bytes.
+
+    Literals, ASCII sets and ranges, anchors, groups, alternations and
+    repeats of those qualify. `.`, negated sets and classes like \\w or
+    \\d match non-ASCII characters in text, so they don't; nor do \\b and
+    \\B, which must see letters like é as word characters.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return False
+
+    def walk(items) -> bool:
+        for op, av in items:
+            if op is _LITERAL:
+                if av >= 128:
+                    return False
+            elif op is _IN:
+                for set_op, set_av in av:
+                    if set_op is _LITERAL and set_av < 128:
+                        continue
+                    if set_op is _RANGE and set_av[1] < 128:
+                        continue
+                    return False
+            elif op is _AT:
+                if av in _WORD_BOUNDARIES:
+                    return False
+            elif op is _GROUPREF:
+                continue
+            elif op is _SUBPATTERN:
+                if not walk(av[3]):
+                    return False
+            elif op in _REPEATS:
+                if not walk(av[2]):
+                    return False
+            elif op is _BRANCH:
+                if not all(walk(branch) for branch in av[1]):
+                    return False
+            elif op in _ASSERTS:
+                if not walk(av[1]):
+                    return False
+            else:
+                return False
+        return True
+
+    return walk(parsed)
+
+
+class CompiledQuery:
+    """Patterns and prefilter literals for one query, built once per process."""
+
+    def __init__(self, text: str, case_sensitive: bool, whole_word: bool, regex: bool) -> None:
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if regex:
+            flags |= re.MULTILINE
+            source = text
+            self.literals, folded = required_literals(text, flags)
+            self.literals_case_sensitive = case_sensitive and not folded
+        else:
+            source = re.escape(text)
+            self.literals = [text]
+            self.literals_case_sensitive = case_sensitive
+        if whole_word:
+            source = r"\b(?:" + source + r")\b"
+
+        try:
+            self.text_pattern = re.compile(source, flags)
+        except re.error as e:
+            raise SearchError(f"Invalid regular expression: {e}") from e
+
+        # Bytes patterns only fold case and find word boundaries for ASCII,
+        # and `.` or \w would match single bytes of UTF-8 characters
+        if whole_word:
+            self.text_mode = True
+        elif regex:
+            self.text_mode = not (text.isascii() and ascii_only(text, flags))
+        else:
+            self.text_mode = not text.isascii()
+        self.pattern = None
+        self.byte_literals: List[bytes] = []
+        if not self.text_mode:
+            try:
+                self.pattern = re.compile(source.encode("ascii"), flags)
+                self.byte_literals = [literal.encode("ascii") for literal in self.literals]
+            except (re.error, UnicodeEncodeError) as e:
+                raise SearchError(f"Invalid regular expression: {e}") from e
+        else:
+            # Still reject files before decoding them. UTF-8 literals compare
+            # as bytes unless folding case could match non-ASCII letters
+            # (é/É, or i, k and s against İ, K and ſ)
+            self.byte_literals = [literal.encode("utf-8") for literal in self.literals
+                                  if self.literals_case_sensitive
+                                  or (literal.isascii() and not _UNICODE_FOLDS & set(literal.lower()))]
+        self._literal_patterns = [re.compile(re.escape(literal), re.IGNORECASE)
+                                  for literal in self.byte_literals]
+
+    def may_match(self, data) -> bool:
+        """Cheap check that every required literal occurs in bytes or mmap data."""
+        if self.literals_case_sensitive:
+            return all(data.find(literal) >= 0 for literal in self.byte_literals)
+        return all(pattern.search(data) is not None for pattern in self._literal_patterns)
+
+
+@lru_cache(maxsize=64)
+def compile_query(text: str, case_sensitive: bool, whole_word: bool, regex: bool) -> CompiledQuery:
+    return CompiledQuery(text, case_sensitive, whole_word, regex)
+
+
+class SearchQuery:
+    """A search request; cheap to pickle, compiled on first use in each process."""
+
+    def __init__(self, text: str, case_sensitive: bool = False, whole_word: bool = False,
+                 regex: bool = False) -> None:
+        self.text = text
+        self.case_sensitive = case_sensitive
+        self.whole_word = whole_word
+        self.regex = regex
+
+    @property
+    def key(self) -> Tuple[str, bool, bool, bool]:
+        return self.text, self.case_sensitive, self.whole_word, self.regex
+
+    @property
+    def compiled(self) -> CompiledQuery:
+        return compile_query(*self.key)
+
+    def validate(self) -> None:
+        """Raise SearchError if the query can't be compiled."""
+        self.compiled
+
+    @property
+    def index_literal(self) -> Optional[str]:
+        """The longest literal every match contains, for index lookups."""
+        literals = self.compiled.literals
+        return max(literals, key=len) if literals else None
+
+    @property
+    def index_case_sensitive(self) -> bool:
+        return self.compiled.literals_case_sensitive
+
+    def search_text(self, text: str, path=None, limit: int = 1000) -> List[Result]:
+        """Search a string, e.g. an open buffer."""
+        return _collect(self.compiled.text_pattern, text, "\n", Path(path) if path else None, limit)
+
+    def search_file(self, path, limit: int = 1000) -> List[Result]:
+        """Return up to limit (path, line number, first line) matches in a file.
+
+        Bytes queries run directly on a memory map, so a match may span
+        lines, and files are rejected by the literal pre-check before any
+        line handling. Queries that need Unicode case folding or word
+        boundaries are matched on the decoded text.
+        """
+        compiled = self.compiled
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if not compiled.may_match(mm):
+                        return []
+                    if compiled.text_mode:
+                        text = mm[:].decode("utf-8", errors="ignore")
+                        return _collect(compiled.text_pattern, text, "\n", Path(path), limit)
+                    return _collect(compiled.pattern, mm, b"\n", Path(path), limit)
+        except (OSError, ValueError):
+            return []
+
+
+def _collect(pattern, data, newline, path, limit: int) -> List[Result]:
+    """One result per line where a match starts, numbering lines incrementally."""
+    results = []
+    line_num = 1
+    scanned = 0
+    last_line_start = -1
+    for match in pattern.finditer(data):
+        start = match.start()
+        if match.end() == start:
+            continue  # Empty matches, e.g. "x*", aren't useful results
+        line_num += data[scanned:start].count(newline)
+        scanned = start
+        line_start = data.rfind(newline, 0, start) + 1
+        if line_start == last_line_start:
+            continue
+        last_line_start = line_start
+        line_end = data.find(newline, start)
+        if line_end < 0:
+            line_end = len(data)
+        line = data[line_start:line_end]
+        if not isinstance(line, str):
+            line = line.decode("utf-8", errors="ignore")
+        results.append((path, line_num, line.rstrip()))
+        if len(results) >= limit:
+            break
+    return results
@@ -0,0 +1,347 @@
+"""Persistent trigram index of workspace files for project search."""
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from config import config
+from file_watcher import RESCAN
+from logger import logger
+from workspace_files import IGNORE_FILES, get_workspace_files
+
+FORMAT_VERSION = 1
+
+# File states
+INDEXED = 0     # Trigrams in the main postings
+DELTA = 1       # Changed since the last build, trigrams in the delta table
+UNINDEXED = 2   # Too large or binary, always a candidate
+DELETED = 3     # Removed since the last build
+
+
+def iter_workspace_files(root) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (path, stat) for every searchable (text, not ignored) file under root."""
+    return get_workspace_files(root).iter_files()
+
+
+def trigrams(data: bytes) -> Set[int]:
+    """Return the case-folded (ASCII) trigrams of data as 24-bit ints.
+
+    Reads the bytes as 32-bit words at offsets 0 and 2, so the windows are
+    deduplicated in C; each distinct word holds two trigrams. A trigram
+    b0 b1 b2 is encoded as b0 | b1 << 8 | b2 << 16.
+    """
+    data = data.lower()
+    words = set()
+    for offset in (0, 2):
+        chunk = data[offset:]
+        values = array("I", chunk[:len(chunk) // 4 * 4])
+        if sys.byteorder == "big":
+            values.byteswap()
+        words.update(values)
+
+    result = {word & 0xFFFFFF for word in words}
+    result.update(word >> 8 for word in words)
+    # Windows in the last few bytes that no whole word covers
+    for pos in range(max(0, len(data) - 4), len(data) - 2):
+        result.add(data[pos] | data[pos + 1] << 8 | data[pos + 2] << 16)
+    return result
+
+
+def query_trigrams(literal: str, case_sensitive: bool) -> Optional[Set[int]]:
+    """Return the trigrams a file must contain to match literal.
+
+    None means the index can't narrow the search: the literal is shorter
+    than a trigram, or a case-insensitive match may fold non-ASCII
+    characters differently from the index.
+    """
+    data = literal.encode("utf-8")
+    if len(data) < 3 or (not case_sensitive and not literal.isascii()):
+        return None
+    return trigrams(data)
+
+
+def _pack(values) -> bytes:
+    return zlib.compress(array("I", sorted(values)).tobytes(), 1)
+
+
+def _unpack(blob: bytes) -> array:
+    values = array("I")
+    values.frombytes(zlib.decompress(blob))
+    return values
+
+
+class TrigramIndex:
+    """Trigram posting lists for the files of one workspace.
+
+    Stored in SQLite under <workspace>/.nanoeditor/index. A full build
+    writes one compressed posting list per trigram; files that change
+    afterwards are moved to a small delta table instead of rewriting the
+    postings, and the index is rebuilt once the delta grows too large.
+    Candidates are always verified by reading the file, so the index only
+    needs to never miss a file that could match.
+    """
+
+    def __init__(self, workspace_path, index_dir=None, max_file_bytes: Optional[int] = None) -> None:
+        self.workspace_path = Path(workspace_path)
+        self.index_dir = Path(index_dir) if index_dir else self.workspace_path / '.nanoeditor' / 'index'
+        self.max_file_bytes = max_file_bytes or config.get_int('SEARCH_INDEX_MAX_FILE_KB', 1024) * 1024
+        self.max_age = config.get_int('SEARCH_INDEX_MAX_AGE_S', 30)
+        # Set when something else (a file watcher) keeps the index fresh
+        self.watched = False
+        self.refreshed_at = 0.0
+        self._lock = threading.RLock()
+        self._files: Dict[str, Tuple[int, float, int, int]] = {}  # path -> (id, mtime, size, state)
+        self._paths: Dict[int, str] = {}
+        self._delta: Dict[int, Set[int]] = {}
+        self._next_id = 1
+        self._built = False
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def built(self) -> bool:
+        """True once the index was built, here or by an earlier session."""
+        with self._lock:
+            if self._db is None and not (self.index_dir / 'trigrams.sqlite3').exists():
+                return False
+            self._connect()
+            return self._built
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.index_dir / 'trigrams.sqlite3'), check_same_thread=False)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE,
+                                                  mtime REAL, size INTEGER, state INTEGER);
+                CREATE TABLE IF NOT EXISTS postings (trigram INTEGER PRIMARY KEY, ids BLOB);
+                CREATE TABLE IF NOT EXISTS delta (file_id INTEGER PRIMARY KEY, trigrams BLOB);
+            """)
+            self._load()
+        return self._db
+
+    def _load(self) -> None:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or int(row[0]) != FORMAT_VERSION:
+            return
+        for file_id, path, mtime, size, state in self._db.execute("SELECT * FROM files"):
+            self._files[path] = (file_id, mtime, size, state)
+            self._paths[file_id] = path
+        for file_id, blob in self._db.execute("SELECT * FROM delta"):
+            self._delta[file_id] = set(_unpack(blob))
+        self._next_id = max(self._paths, default=0) + 1
+        self._built = True
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _read(self, path: str, size: int) -> Optional[bytes]:
+        """Return file bytes worth indexing, None for large or binary files."""
+        if size > self.max_file_bytes:
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        if b'\0' in data[:8192]:
+            return None
+        return data
+
+    def build(self) -> None:
+        """Index every workspace file from scratch."""
+        start = time.perf_counter()
+        with self._lock:
+            db = self._connect()
+            postings: Dict[int, List[int]] = defaultdict(list)
+            files = {}
+            for file_id, (path, stat) in enumerate(iter_workspace_files(self.workspace_path), 1):
+                try:
+                    data = self._read(path, stat.st_size)
+                except OSError:
+                    continue
+                state = UNINDEXED
+                if data is not None:
+                    state = INDEXED
+                    for trigram in trigrams(data):
+                        postings[trigram].append(file_id)
+                files[path] = (file_id, stat.st_mtime, stat.st_size, state)
+
+            with db:
+                db.execute("DELETE FROM files")
+                db.execute("DELETE FROM postings")
+                db.execute("DELETE FROM delta")
+                db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)",
+                               ((v[0], p, v[1], v[2], v[3]) for p, v in files.items()))
+                db.executemany("INSERT INTO postings VALUES (?, ?)",
+                               ((t, _pack(ids)) for t, ids in postings.items()))
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(FORMAT_VERSION),))
+
+            self._files = files
+            self._paths = {v[0]: p for p, v in files.items()}
+            self._delta = {}
+            self._next_id = max(self._paths, default=0) + 1
+            self._built = True
+            self.refreshed_at = time.monotonic()
+        logger.info(f"Indexed {len(files)} files in {time.perf_counter() - start:.1f}s")
+
+    def update_file(self, path: str) -> None:
+        """Re-index one file if its mtime or size changed."""
+        path = str(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove_file(path)
+            return
+
+        with self._lock:
+            db = self._connect()
+            known = self._files.get(path)
+            if known and known[3] != DELETED and (known[1], known[2]) == (stat.st_mtime, stat.st_size):
+                return
+            try:
+                data = self._read(path, stat.st_size)
+            except OSError:
+                return
+
+            if known:
+                file_id = known[0]
+            else:
+                file_id = self._next_id
+                self._next_id += 1
+            state = DELTA if data is not None else UNINDEXED
+
+            with db:
+                db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                           (file_id, path, stat.st_mtime, stat.st_size, state))
+                if data is not None:
+                    file_trigrams = trigrams(data)
+                    db.execute("INSERT OR REPLACE INTO delta VALUES (?, ?)", (file_id, _pack(file_trigrams)))
+                    self._delta[file_id] = file_trigrams
+                else:
+                    db.execute("DELETE FROM delta WHERE file_id = ?", (file_id,))
+                    self._delta.pop(file_id, None)
+            self._files[path] = (file_id, stat.st_mtime, stat.st_size, state)
+            self._paths[file_id] = path
+
+    def remove_file(self, path: str) -> None:
+        """Drop a deleted file from the results."""
+        path = str(path)
+        with self._lock:
+            db = self._connect()
+            known = self._files.get(path)
+            if not known or known[3] == DELETED:
+                return
+            file_id = known[0]
+            with db:
+                db.execute("UPDATE files SET state = ? WHERE id = ?", (DELETED, file_id))
+                db.execute("DELETE FROM delta WHERE file_id = ?", (file_id,))
+            self._delta.pop(file_id, None)
+            self._files[path] = (file_id, known[1], known[2], DELETED)
+
+    def apply_changes(self, changes: Dict[str, str]) -> None:
+        """Update entries for a batch of {path: kind} changes from a file watcher."""
+        with self._lock:
+            if not self.built:
+                return
+            for path, kind in changes.items():
+                if kind == RESCAN:
+                    self.refresh()
+                    return
+                if os.path.basename(path) in IGNORE_FILES:
+                    # Ignore rules changed, any file may have come or gone
+                    self.refresh()
+                    return
+                files = get_workspace_files(self.workspace_path)
+                if os.path.isdir(path):
+                    # A directory created or moved in, its files weren't reported
+                    if not files.is_ignored(path, True):
+                        for file_path, _ in files.iter_files(path):
+                            self.update_file(file_path)
+                elif os.path.exists(path):
+                    if not files.is_ignored(path, False) and files.is_text(path):
+                        self.update_file(path)
+                else:
+                    self.remove_file(path)
+                    prefix = path + os.sep
+                    for known in [p for p in self._files if p.startswith(prefix)]:
+                        self.remove_file(known)
+            if len(self._delta) > max(1000, len(self._files) // 10):
+                self.build()
+
+    def refresh(self) -> None:
+        """Bring the index up to date with a stat-only walk of the workspace."""
+        with self._lock:
+            self._connect()
+            if not self.built:
+                self.build()
+                return
+
+            seen = set()
+            for path, stat in iter_workspace_files(self.workspace_path):
+                seen.add(path)
+                known = self._files.get(path)
+                if not known or known[3] == DELETED or (known[1], known[2]) != (stat.st_mtime, stat.st_size):
+                    self.update_file(path)
+            for path in set(self._files) - seen:
+                self.remove_file(path)
+
+            self.refreshed_at = time.monotonic()
+            if len(self._delta) > max(1000, len(self._files) // 10):
+                self.build()
+
+    def ensure_fresh(self) -> None:
+        """Build or refresh the index unless it was refreshed recently."""
+        with self._lock:
+            self._connect()
+            if not self.built:
+                self.build()
+            elif not self.refreshed_at or (not self.watched
+                                           and time.monotonic() - self.refreshed_at > self.max_age):
+                # Loaded from disk, or nothing keeps it fresh
+                self.refresh()
+
+    def candidates(self, literal: str, case_sensitive: bool = False) -> Optional[List[Path]]:
+        """Return the files that may contain literal, or None to scan everything."""
+        required = query_trigrams(literal, case_sensitive)
+        if required is None:
+            return None
+
+        with self._lock:
+            db = self._connect()
+            ids: Optional[Set[int]] = None
+            for trigram in required:
+                row = db.execute("SELECT ids FROM postings WHERE trigram = ?", (trigram,)).fetchone()
+                found = set(_unpack(row[0])) if row else set()
+                ids = found if ids is None else ids & found
+                if not ids:
+                    break
+
+            paths = []
+            for file_id in ids or ():
+                path = self._paths.get(file_id)
+                if path and self._files[path][3] == INDEXED:
+                    paths.append(path)
+            paths.extend(self._paths[file_id] for file_id, file_trigrams in self._delta.items()
+                         if required <= file_trigrams)
+            paths.extend(path for path, known in self._files.items() if known[3] == UNINDEXED)
+        return [Path(path) for path in sorted(paths)]
+
+
+_indexes: Dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(workspace_path) -> TrigramIndex:
+    """Return the shared index for a workspace."""
+    key = os.path.abspath(str(workspace_path))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = TrigramIndex(key)
+        return _indexes[key]
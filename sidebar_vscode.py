@@ -1,6 +1,8 @@
 """VS Code style sidebar with activity bar."""
 import customtkinter as ctk
 
+from search_engine import SearchQuery, SearchError
+
 
 class VSCodeSidebar(ctk.CTkFrame):
     def __init__(self, master, app):
@@ -154,16 +156,51 @@ class SearchPanel(ctk.CTkFrame):
         options = ctk.CTkFrame(self, fg_color="transparent")
         options.pack(fill="x", padx=10)
         
-        ctk.CTkCheckBox(options, text="Match Case", font=("Segoe UI", 10)).pack(anchor="w")
-        ctk.CTkCheckBox(options, text="Match Whole Word", font=("Segoe UI", 10)).pack(anchor="w")
-        ctk.CTkCheckBox(options, text="Use Regular Expression", font=("Segoe UI", 10)).pack(anchor="w")
+        self.match_case = ctk.CTkCheckBox(options, text="Match Case", font=("Segoe UI", 10))
+        self.match_case.pack(anchor="w")
+        self.whole_word = ctk.CTkCheckBox(options, text="Match Whole Word", font=("Segoe UI", 10))
+        self.whole_word.pack(anchor="w")
+        self.regex = ctk.CTkCheckBox(options, text="Use Regular Expression", font=("Segoe UI", 10))
+        self.regex.pack(anchor="w")
         
         # Search button
         ctk.CTkButton(
             self, text="Search in Files",
-            command=lambda: app.open_project_search(),
+            command=self.search,
             height=32, font=("Segoe UI", 11)
         ).pack(fill="x", padx=10, pady=10)
+        
+        self.error_label = ctk.CTkLabel(
+            self, text="", font=("Segoe UI", 10),
+            text_color=("#C42B1C", "#F48771"), wraplength=220, justify="left"
+        )
+        self.error_label.pack(fill="x", padx=10)
+        
+        self.search_entry.bind("<Return>", lambda e: self.search())
+    
+    def search(self):
+        """Open project search with this panel's query and options.
+        
+        With replace text, the window opens on a replace preview instead.
+        """
+        query = SearchQuery(
+            self.search_entry.get().strip(),
+            case_sensitive=bool(self.match_case.get()),
+            whole_word=bool(self.whole_word.get()),
+            regex=bool(self.regex.get())
+        )
+        if query.text:
+            try:
+                query.validate()
+            except SearchError as e:
+                self.error_label.configure(text=str(e))
+                return
+        self.error_label.configure(text="")
+        self.app.open_project_search(
+            query=query.text or None, case_sensitive=query.case_sensitive,
+            whole_word=query.whole_word, regex=query.regex,
+            replace=self.replace_entry.get() or None
+        )
 
 
 class SourceControlPanel(ctk.CTkFrame):
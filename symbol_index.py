@@ -0,0 +1,421 @@
+"""Persistent index of workspace symbols for Go to Symbol in Workspace."""
+import ast
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pygments.token import Keyword, Name
+
+from config import config
+from file_watcher import RESCAN
+from fuzzy import FuzzyIndex
+from lexer_registry import lexer_registry
+from logger import logger
+from quick_open import PaletteWindow
+from workspace_files import IGNORE_FILES, get_workspace_files
+
+FORMAT_VERSION = 1
+
+# Files extracted between database writes during a refresh
+WRITE_BATCH = 200
+
+
+class Symbol(NamedTuple):
+    name: str
+    kind: str        # class, function, method or variable
+    path: str
+    line: int
+    column: int
+    container: str   # Enclosing class, or ""
+
+
+class SymbolMatch(NamedTuple):
+    symbol: Symbol
+    score: float
+    positions: List[int]  # Matched offsets in symbol.name
+
+
+def python_symbols(text: str) -> List[Tuple[str, str, int, int, str]]:
+    """Return (name, kind, line, column, container) for a module's definitions.
+
+    Covers top-level classes, functions and assignments, the methods of
+    top-level classes, and definitions inside top-level if/try/with
+    blocks (guarded imports, TYPE_CHECKING). Raises SyntaxError.
+    """
+    symbols = []
+
+    def targets(node):
+        if isinstance(node, ast.Name):
+            yield node
+        elif isinstance(node, (ast.Tuple, ast.List)):
+            for element in node.elts:
+                yield from targets(element)
+
+    def visit(body, container=""):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                if container:
+                    continue
+                symbols.append((node.name, "class", node.lineno, node.col_offset, ""))
+                visit(node.body, node.name)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if container else "function"
+                symbols.append((node.name, kind, node.lineno, node.col_offset, container))
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and not container:
+                for target in (node.targets if isinstance(node, ast.Assign) else [node.target]):
+                    for name in targets(target):
+                        symbols.append((name.id, "variable", name.lineno, name.col_offset, ""))
+            elif isinstance(node, (ast.If, ast.Try, ast.With)) and not container:
+                visit(node.body)
+                visit(getattr(node, "orelse", []))
+                for handler in getattr(node, "handlers", []):
+                    visit(handler.body)
+
+    visit(ast.parse(text).body)
+    return symbols
+
+
+# Keywords whose next name is a definition, for lexers that tag it as a plain name
+DEFINITION_KEYWORDS = {
+    "class": "class", "struct": "class", "interface": "class", "enum": "class",
+    "trait": "class", "type": "class",
+    "def": "function", "func": "function", "function": "function", "fn": "function",
+}
+
+
+def token_symbols(text: str, lexer) -> List[Tuple[str, str, int, int, str]]:
+    """Return (name, kind, line, column, "") for class and function names in a lexer's tokens.
+
+    Names the lexer tags as classes or functions are definitions; so is
+    the first name after a definition keyword, skipping a parenthesised
+    group such as a Go method receiver.
+    """
+    symbols = []
+    seen = set()
+    line = 1
+    line_start = 0
+    position = 0
+    pending = None  # Kind announced by the last definition keyword
+    depth = 0
+    for index, token_type, value in lexer.get_tokens_unprocessed(text):
+        if not value.strip():
+            continue
+        kind = None
+        if token_type in Name.Class:
+            kind = "class"
+        elif token_type in Name.Function:
+            kind = "function"
+        elif token_type in Name and pending and depth == 0:
+            kind = pending
+        elif token_type in Keyword and value in DEFINITION_KEYWORDS:
+            pending, depth = DEFINITION_KEYWORDS[value], 0
+            continue
+        elif pending and value == "(":
+            depth += 1
+            continue
+        elif pending and value == ")" and depth:
+            depth -= 1
+            continue
+        if depth == 0:
+            pending = None
+        if kind is None:
+            continue
+
+        line += text.count("\n", position, index)
+        if line > 1:
+            line_start = text.rfind("\n", 0, index) + 1
+        position = index
+        name = value.strip()
+        if (name, line) not in seen:
+            seen.add((name, line))
+            symbols.append((name, kind, line, index - line_start, ""))
+    return symbols
+
+
+def extract_symbols(path: str, text: str) -> List[Tuple[str, str, int, int, str]]:
+    """Symbols of one file: ast for Python, Pygments tokens for anything else."""
+    if path.endswith((".py", ".pyw", ".pyi")):
+        try:
+            return python_symbols(text)
+        except (SyntaxError, ValueError, RecursionError):
+            pass  # Mid-edit or Python 2; the lexer still finds def/class names
+    lexer = lexer_registry.get_lexer(path)
+    if lexer is None:
+        return []
+    return token_symbols(text, lexer)
+
+
+class SymbolIndex:
+    """Definitions of every workspace file, searchable by fuzzy name.
+
+    Stored in SQLite under <workspace>/.nanoeditor/index next to the
+    trigram index, with each file's mtime and size, so a later session
+    only re-parses files that changed. Files are parsed outside the lock,
+    so searches keep answering from the previous state while the index
+    is being built or refreshed.
+    """
+
+    def __init__(self, workspace_path, index_dir=None, max_file_bytes: Optional[int] = None) -> None:
+        self.workspace_path = Path(workspace_path)
+        self.index_dir = Path(index_dir) if index_dir else self.workspace_path / '.nanoeditor' / 'index'
+        self.max_file_bytes = max_file_bytes or config.get_int('SYMBOL_INDEX_MAX_FILE_KB', 512) * 1024
+        self.max_age = config.get_int('SEARCH_INDEX_MAX_AGE_S', 30)
+        # Set when something else (a file watcher) keeps the index fresh
+        self.watched = False
+        self.refreshed_at = 0.0
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._files: Dict[str, Tuple[float, int]] = {}   # path -> (mtime, size)
+        self._slots: Dict[str, List[int]] = {}           # path -> fuzzy slots of its symbols
+        self._symbols: List[Optional[Symbol]] = []       # by fuzzy slot
+        self._fuzzy = FuzzyIndex(name_start=lambda name: 0)
+        self._built = False
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def built(self) -> bool:
+        """True once the index was built, here or by an earlier session."""
+        with self._lock:
+            if self._db is None and not (self.index_dir / 'symbols.sqlite3').exists():
+                return False
+            self._connect()
+            return self._built
+
+    def __len__(self) -> int:
+        return len(self._fuzzy)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.index_dir / 'symbols.sqlite3'), check_same_thread=False)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER);
+                CREATE TABLE IF NOT EXISTS symbols (path TEXT, name TEXT, kind TEXT, line INTEGER,
+                                                    col INTEGER, container TEXT);
+                CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path);
+            """)
+            self._load()
+        return self._db
+
+    def _load(self) -> None:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or int(row[0]) != FORMAT_VERSION:
+            return
+        self._files = {path: (mtime, size) for path, mtime, size in self._db.execute("SELECT * FROM files")}
+        symbols = [Symbol(name, kind, path, line, col, container) for path, name, kind, line, col, container
+                   in self._db.execute("SELECT * FROM symbols ORDER BY rowid")]
+        self._reload(symbols)
+        self._built = True
+
+    def _reload(self, symbols: List[Symbol]) -> None:
+        self._symbols = list(symbols)
+        self._slots = {}
+        for slot, symbol in enumerate(self._symbols):
+            self._slots.setdefault(symbol.path, []).append(slot)
+        self._fuzzy.load(symbol.name for symbol in self._symbols)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _extract(self, path: str, stat: os.stat_result) -> List[Symbol]:
+        if stat.st_size > self.max_file_bytes:
+            return []
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        return [Symbol(name, kind, path, line, column, container)
+                for name, kind, line, column, container in extract_symbols(path, text)]
+
+    def _store(self, updates: Dict[str, Tuple[os.stat_result, List[Symbol]]], removed: List[str]) -> None:
+        """Write parsed files and drop removed ones, on disk and in memory."""
+        with self._lock:
+            db = self._connect()
+            with db:
+                for path in list(updates) + removed:
+                    db.execute("DELETE FROM symbols WHERE path = ?", (path,))
+                db.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in removed))
+                db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                               ((path, stat.st_mtime, stat.st_size) for path, (stat, _) in updates.items()))
+                db.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?)",
+                               (symbol[2:3] + symbol[:2] + symbol[3:]
+                                for _, symbols in updates.values() for symbol in symbols))
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(FORMAT_VERSION),))
+
+            for path in list(updates) + removed:
+                for slot in self._slots.pop(path, []):
+                    self._fuzzy.remove(slot)
+                    self._symbols[slot] = None
+            for path in removed:
+                self._files.pop(path, None)
+            for path, (stat, symbols) in updates.items():
+                self._files[path] = (stat.st_mtime, stat.st_size)
+                for symbol in symbols:
+                    self._symbols.append(symbol)
+                    self._slots.setdefault(path, []).append(self._fuzzy.add(symbol.name))
+            if self._fuzzy.size > 2 * len(self._fuzzy) + 1000:
+                # Mostly removed slots: compact
+                self._reload([symbol for symbol in self._symbols if symbol is not None])
+
+    def refresh(self) -> None:
+        """Bring the index up to date, parsing only files whose mtime or size changed."""
+        start = time.perf_counter()
+        with self._refresh_lock:
+            with self._lock:
+                self._connect()
+                first = not self._built
+            seen = set()
+            updates = {}
+            parsed = 0
+            for path, stat in get_workspace_files(self.workspace_path).iter_files():
+                seen.add(path)
+                if self._files.get(path) == (stat.st_mtime, stat.st_size):
+                    continue
+                try:
+                    updates[path] = (stat, self._extract(path, stat))
+                except OSError:
+                    continue
+                parsed += 1
+                if len(updates) >= WRITE_BATCH:
+                    self._store(updates, [])
+                    updates = {}
+            with self._lock:
+                removed = [path for path in self._files if path not in seen]
+            self._store(updates, removed)
+            with self._lock:
+                self._built = True
+                self.refreshed_at = time.monotonic()
+        if first or parsed:
+            logger.info(f"Symbol index: parsed {parsed} files in {time.perf_counter() - start:.1f}s, "
+                        f"{len(self)} symbols")
+
+    def ensure_fresh(self) -> None:
+        """Build or refresh the index unless it was refreshed recently."""
+        if not self.built or not self.refreshed_at or (
+                not self.watched and time.monotonic() - self.refreshed_at > self.max_age):
+            self.refresh()
+
+    def update_file(self, path: str) -> None:
+        """Re-parse one file if its mtime or size changed."""
+        path = str(path)
+        try:
+            stat = os.stat(path)
+            if self._files.get(path) == (stat.st_mtime, stat.st_size):
+                return
+            symbols = self._extract(path, stat)
+        except OSError:
+            self.remove_file(path)
+            return
+        self._store({path: (stat, symbols)}, [])
+
+    def remove_file(self, path: str) -> None:
+        path = str(path)
+        with self._lock:
+            if path in self._files:
+                self._store({}, [path])
+
+    def apply_changes(self, changes: Dict[str, str]) -> None:
+        """Update entries for a batch of {path: kind} changes from a file watcher.
+
+        Runs on the watcher thread while refresh() may be storing files, so
+        shared state is only read under the lock. The lock isn't held
+        throughout: refresh() takes it after its own refresh lock.
+        """
+        with self._lock:
+            if not self._built:
+                return
+        files = get_workspace_files(self.workspace_path)
+        for path, kind in changes.items():
+            if kind == RESCAN or os.path.basename(path) in IGNORE_FILES:
+                self.refresh()
+                return
+            if os.path.isdir(path):
+                if not files.is_ignored(path, True):
+                    for file_path, _ in files.iter_files(path):
+                        self.update_file(file_path)
+            elif os.path.exists(path):
+                if not files.is_ignored(path, False) and files.is_text(path):
+                    self.update_file(path)
+            else:
+                prefix = path + os.sep
+                with self._lock:
+                    known = [p for p in self._files if p == path or p.startswith(prefix)]
+                for removed in known:
+                    self.remove_file(removed)
+
+    def search(self, query: str, limit: int = 50) -> List[SymbolMatch]:
+        """Best matching symbols for query, best first."""
+        query = query.lower().replace(" ", "")
+        with self._lock:
+            if not query:
+                return []
+            return [SymbolMatch(self._symbols[slot], score, positions)
+                    for score, slot, positions in self._fuzzy.search(query, limit)]
+
+    def lookup(self, name: str) -> List[Symbol]:
+        """Symbols named exactly name."""
+        with self._lock:
+            return [symbol for symbol in self._symbols if symbol is not None and symbol.name == name]
+
+    def symbols_in(self, path: str) -> List[Symbol]:
+        with self._lock:
+            return [self._symbols[slot] for slot in self._slots.get(str(path), [])]
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(workspace_path) -> SymbolIndex:
+    """Return the shared symbol index for a workspace."""
+    key = os.path.abspath(str(workspace_path))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = SymbolIndex(key)
+        return _indexes[key]
+
+
+class SymbolPickerWindow(PaletteWindow):
+    """Ctrl+T palette: type part of a name, Enter jumps to the definition."""
+
+    KIND_ICONS = {"class": "C", "function": "ƒ", "method": "m", "variable": "v"}
+
+    def __init__(self, master, workspace_path, open_file_callback):
+        self.index = get_symbol_index(workspace_path)
+        self.open_file_callback = open_file_callback
+        # A watched index is kept fresh, otherwise refresh before listing
+        self._fresh = bool(self.index.refreshed_at) and self.index.watched
+        super().__init__(master, "Go to Symbol in Workspace", "Search symbols by name...")
+
+    def ready(self):
+        return self._fresh
+
+    def prepare(self):
+        try:
+            self.index.ensure_fresh()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Symbol index unavailable: {e}")
+        self._fresh = True
+
+    def find(self, text):
+        return self.index.search(text, self.LIMIT)
+
+    def label(self, match):
+        symbol = match.symbol
+        name = f"{symbol.container}.{symbol.name}" if symbol.container else symbol.name
+        try:
+            where = os.path.relpath(symbol.path, self.index.workspace_path)
+        except ValueError:
+            where = symbol.path
+        return f"{self.KIND_ICONS.get(symbol.kind, ' ')} {name}    {where}:{symbol.line}"
+
+    def summary(self):
+        return f"{len(self.index)} symbols"
+
+    def accept(self, match):
+        self.open_file_callback(match.symbol.path, match.symbol.line)
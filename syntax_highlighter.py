@@ -1,7 +1,10 @@
-from pygments import lex
-from pygments.lexers import guess_lexer_for_filename, get_lexer_by_name
 from pygments.styles import get_style_by_name
 from pygments.util import ClassNotFound
+from incremental_highlighter import split_tokens_by_line, lex_tokens
+from viewport_highlighter import ViewportHighlighter
+from token_cache import token_cache
+from lexer_registry import lexer_registry
+from config import config
 import tkinter
 import re
 
@@ -9,7 +12,18 @@ import re
 class SyntaxHighlighter:
     def __init__(self, text_widget, style="monokai"):
         self.text_widget = text_widget
-        self.max_highlight_size = 100000  # 100KB limit
+        self.max_highlight_size = 100000  # Larger files use viewport-first mode
+        self.lexer = None
+        self.line_states = None  # Per-line tokens of the last highlight
+        self.token_tags = set()  # Tags with a configured colour
+        self.applied_tags = set()  # Tags that may currently be in the widget
+        self._tag_for_token = {}
+        # Plain tkinter.Text accepts many index pairs per tag_add call
+        self._tk_text = getattr(text_widget, "_textbox", text_widget)
+        self.viewport = ViewportHighlighter(
+            text_widget, self,
+            budget_bytes=config.get_int('SYNTAX_TOKEN_CACHE_MB', 32) * 1024 * 1024
+        )
         
         try:
             self.style = get_style_by_name(style)
@@ -31,6 +45,7 @@ class SyntaxHighlighter:
                             str(token), 
                             foreground=f"#{color}"
                         )
+                        self.token_tags.add(str(token))
                     except tkinter.TclError:
                         continue
         except (TypeError, AttributeError):
@@ -41,52 +56,122 @@ class SyntaxHighlighter:
             return False
         return bool(re.match(r'^[0-9A-Fa-f]{6}$', str(color)))
 
+    def tag_for(self, token):
+        """Return the coloured tag for a token type, falling back to its parents."""
+        try:
+            return self._tag_for_token[token]
+        except KeyError:
+            pass
+        
+        tag = None
+        ttype = token
+        while ttype is not None:
+            if str(ttype) in self.token_tags:
+                tag = str(ttype)
+                break
+            ttype = ttype.parent
+        
+        self._tag_for_token[token] = tag
+        return tag
+
+    def get_lexer(self, file_path, data=""):
+        """Resolve a lexer that keeps offsets aligned with the widget text."""
+        return lexer_registry.get_lexer(file_path, data)
+
+    def reset(self):
+        """Forget cached tokens, e.g. when the widget shows another document."""
+        self.viewport.stop()
+        self.lexer = None
+        self.line_states = None
+
     def highlight(self, file_path):
         try:
-            data = self.text_widget.get("1.0", "end-1c")
+            if hasattr(self.text_widget, "get_text"):
+                data = self.text_widget.get_text()
+            else:
+                data = self.text_widget.get("1.0", "end-1c")
             
-            if len(data) > self.max_highlight_size:
+            lexer = self.get_lexer(file_path, data[:self.max_highlight_size])
+            if lexer is None:
+                self.reset()
                 return
             
-            try:
-                lexer = guess_lexer_for_filename(file_path, data)
-            except ClassNotFound:
-                return
-            except (ValueError, TypeError):
+            if len(data) > self.max_highlight_size:
+                self.viewport.start(lexer, data.count("\n") + 1)
                 return
             
-            self.text_widget.mark_set("range_start", "1.0")
+            self.viewport.stop()
+            self.lexer = lexer
             
-            for token, content in lex(data, lexer):
-                if not content:
-                    continue
-                
-                try:
-                    self.text_widget.mark_set("range_end", f"range_start + {len(content)}c")
-                    self.text_widget.tag_add(str(token), "range_start", "range_end")
-                    self.text_widget.mark_set("range_start", "range_end")
-                except tkinter.TclError:
-                    break
+            key = token_cache.key(data, lexer)
+            states = token_cache.get(key)
+            if states is None:
+                states = split_tokens_by_line(lex_tokens(lexer, data))
+                token_cache.put(key, states)
+            
+            self.line_states = states
+            self.apply_line_states(1, self.line_states)
                     
         except tkinter.TclError:
             pass
         except Exception:
-            pass
+            self.reset()
     
-    def apply_tokens(self, tokens):
+    def remember(self, data):
+        """Cache the current tokens for data, e.g. right after saving it."""
+        if self.lexer is None or self.line_states is None or self.viewport.active:
+            return
+        if len(self.line_states) != data.count("\n") + 1:
+            return
+        token_cache.put(token_cache.key(data, self.lexer), self.line_states)
+    
+    def apply_tokens(self, tokens, file_path=None):
         """Apply pre-computed tokens from async highlighting."""
         try:
-            self.text_widget.mark_set("range_start", "1.0")
-            
-            for token, content in tokens:
-                if not content:
+            if file_path:
+                self.lexer = self.get_lexer(file_path)
+            self.viewport.stop()
+            self.line_states = split_tokens_by_line(tokens)
+            self.apply_line_states(1, self.line_states)
+        except (tkinter.TclError, Exception):
+            pass
+    
+    def apply_line_states(self, first_line, states):
+        """Re-tag lines starting at first_line with per-line token states.
+        
+        Indices are computed in Python and grouped by tag so every tag costs
+        a single tag_remove and a single tag_add carrying all of its ranges.
+        """
+        if not states:
+            return
+        
+        ranges = {}
+        for line, (tokens, _) in enumerate(states, first_line):
+            for start_col, end_col, token in tokens:
+                tag = self.tag_for(token)
+                if tag is None:
                     continue
                 
-                try:
-                    self.text_widget.mark_set("range_end", f"range_start + {len(content)}c")
-                    self.text_widget.tag_add(str(token), "range_start", "range_end")
-                    self.text_widget.mark_set("range_start", "range_end")
-                except tkinter.TclError:
-                    break
-        except (tkinter.TclError, Exception):
+                start_index = f"{line}.{start_col}"
+                indices = ranges.get(tag)
+                if indices is None:
+                    ranges[tag] = [start_index, f"{line}.{end_col}"]
+                elif indices[-1] == start_index:
+                    # Merge with the previous range of the same tag
+                    indices[-1] = f"{line}.{end_col}"
+                else:
+                    indices.append(start_index)
+                    indices.append(f"{line}.{end_col}")
+        
+        last_line = first_line + len(states) - 1
+        start, end = f"{first_line}.0", f"{last_line + 1}.0"
+        
+        try:
+            for tag in self.applied_tags:
+                self._tk_text.tag_remove(tag, start, end)
+            
+            for tag, indices in ranges.items():
+                self._tk_text.tag_add(tag, *indices)
+            self.applied_tags.update(ranges)
+        except tkinter.TclError:
             pass
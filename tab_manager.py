@@ -1,9 +1,17 @@
 """Tab management system for multiple file editing."""
 import customtkinter
 import tkinter
+import time
+import zlib
 from text_area import CodeEditor
 from line_numbers import LineNumbers
-from typing import Optional
+from document import Document
+from config import config
+from logger import logger
+from typing import List, Optional
+
+# Rough cost of a character held in a Tk text widget (B-tree, tags, undo)
+WIDGET_BYTES_PER_CHAR = 12
 
 
 class EditorTab:
@@ -11,10 +19,53 @@ class EditorTab:
     
     def __init__(self, file_path: Optional[str] = None):
         self.file_path = file_path
-        self.content = ""
+        self.document = Document()
         self.modified = False
         self.cursor_position = "1.0"
         self.scroll_position = 0.0
+        # Own widgets when TabManager keeps one editor per tab
+        self.editor: Optional[CodeEditor] = None
+        self.line_numbers: Optional[LineNumbers] = None
+        self.last_active = time.monotonic()
+        self._frozen: Optional[bytes] = None
+    
+    @property
+    def content(self) -> str:
+        """Tab text, backed by the tab's document."""
+        if self._frozen is not None:
+            return zlib.decompress(self._frozen).decode("utf-8")
+        return self.document.text()
+    
+    @content.setter
+    def content(self, value: str) -> None:
+        self._frozen = None
+        self.document.set_text(value)
+    
+    @property
+    def hibernated(self) -> bool:
+        return self._frozen is not None
+    
+    def hibernate(self) -> None:
+        """Drop the document for a compressed copy of its text."""
+        if self._frozen is None:
+            self._frozen = zlib.compress(self.document.text().encode("utf-8"), 1)
+            self.document = Document()
+    
+    def thaw(self) -> None:
+        """Restore the document from the compressed copy."""
+        if self._frozen is not None:
+            text = self.content
+            self._frozen = None
+            self.document = Document(text)
+    
+    def memory_estimate(self) -> int:
+        """Approximate bytes held by this tab."""
+        if self._frozen is not None:
+            return len(self._frozen)
+        size = len(self.document)
+        if self.editor is not None:
+            size *= WIDGET_BYTES_PER_CHAR
+        return size
     
     def get_title(self) -> str:
         """Get tab title."""
@@ -25,14 +76,52 @@ class EditorTab:
         return "Untitled*" if self.modified else "Untitled"
 
 
+def select_hibernation(tabs: List[EditorTab], current: Optional[EditorTab],
+                       cap_bytes: int, min_idle: float, now: float) -> List[EditorTab]:
+    """Pick tabs to hibernate, least recently used first, until under the cap.
+    
+    Only tabs that still own widgets and have been idle for min_idle
+    seconds are eligible; the current tab never is.
+    """
+    total = sum(tab.memory_estimate() for tab in tabs)
+    if total <= cap_bytes:
+        return []
+    
+    candidates = sorted(
+        (tab for tab in tabs
+         if tab is not current and tab.editor is not None and now - tab.last_active >= min_idle),
+        key=lambda tab: tab.last_active
+    )
+    selected = []
+    for tab in candidates:
+        if total <= cap_bytes:
+            break
+        total -= tab.memory_estimate()
+        selected.append(tab)
+    return selected
+
+
 class TabManager(customtkinter.CTkFrame):
-    """Manages multiple editor tabs."""
+    """Manages multiple editor tabs.
+    
+    With TABS_KEEP_EDITORS (the default) every tab owns its CodeEditor and
+    LineNumbers, and switching only changes which pair is gridded, so undo
+    history and highlighting survive. Idle tabs are hibernated to a
+    compressed copy of their text once the total estimate goes over
+    TABS_MEMORY_CAP_MB. Otherwise all tabs share one editor that is
+    reloaded on every switch.
+    """
     
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
         self.tabs = []
         self.current_tab_index = -1
         self.tab_buttons = []
+        self.keep_editors = config.get_bool('TABS_KEEP_EDITORS', True)
+        self.memory_cap = config.get_int('TABS_MEMORY_CAP_MB', 256) * 1024 * 1024
+        self.hibernate_after = config.get_int('TABS_HIBERNATE_AFTER_S', 300)
+        # Called with each new CodeEditor so the app can bind it
+        self.editor_listeners = []
         
         # Tab bar
         self.tab_bar = customtkinter.CTkFrame(self)
@@ -53,19 +142,39 @@ class TabManager(customtkinter.CTkFrame):
         self.editor_container.grid_columnconfigure(0, weight=0)
         self.editor_container.grid_columnconfigure(1, weight=1)
         
-        # Line numbers and text area
-        self.line_numbers = LineNumbers(self.editor_container, text_widget=None)
-        self.line_numbers.grid(row=0, column=0, sticky="ns")
-        
-        self.text_area = CodeEditor(self.editor_container)
-        self.text_area.grid(row=0, column=1, sticky="nsew")
-        
-        self.line_numbers.text_widget = self.text_area
-        self.text_area.set_line_numbers(self.line_numbers)
+        # Line numbers and text area, replaced per tab when keeping editors
+        self.line_numbers = None
+        self.text_area = None
+        if not self.keep_editors:
+            self.line_numbers, self.text_area = self._create_editor()
+            self.line_numbers.grid(row=0, column=0, sticky="ns")
+            self.text_area.grid(row=0, column=1, sticky="nsew")
         
         # Create first tab and switch to it
         first_tab = self.new_tab()
         self.switch_tab(first_tab)
+        
+        if self.keep_editors:
+            self.after(60000, self._hibernate_idle)
+    
+    def _create_editor(self):
+        """Create a line numbers and editor pair in the editor container."""
+        line_numbers = LineNumbers(self.editor_container, text_widget=None)
+        text_area = CodeEditor(self.editor_container)
+        line_numbers.text_widget = text_area
+        text_area.set_line_numbers(line_numbers)
+        for listener in self.editor_listeners:
+            listener(text_area)
+        return line_numbers, text_area
+    
+    def add_editor_listener(self, listener) -> None:
+        """Call listener with every editor, existing and future."""
+        self.editor_listeners.append(listener)
+        editors = [tab.editor for tab in self.tabs if tab.editor is not None]
+        if not self.keep_editors:
+            editors = [self.text_area]
+        for editor in editors:
+            listener(editor)
     
     def new_tab(self, file_path: Optional[str] = None) -> int:
         """Create new tab."""
@@ -119,26 +228,62 @@ class TabManager(customtkinter.CTkFrame):
         
         # Save current tab state
         if self.current_tab_index >= 0:
+            # The tab's document is kept in sync by edit events, no copy needed
             current_tab = self.tabs[self.current_tab_index]
-            current_tab.content = self.text_area.get("1.0", "end-1c")
             current_tab.cursor_position = self.text_area.index(customtkinter.INSERT)
             try:
                 yview = self.text_area.yview()
                 current_tab.scroll_position = float(yview[0]) if yview else 0.0
             except (tkinter.TclError, ValueError, IndexError):
                 current_tab.scroll_position = 0.0
+            current_tab.last_active = time.monotonic()
+            if self.keep_editors:
+                self.line_numbers.grid_remove()
+                self.text_area.grid_remove()
         
         # Load new tab
         self.current_tab_index = index
         tab = self.tabs[index]
+        tab.last_active = time.monotonic()
+        
+        if self.keep_editors:
+            self._show_tab_editor(tab)
+        else:
+            self._load_into_editor(tab)
+        
+        # Update button states
+        for i, (tab_frame, btn, close_btn) in enumerate(self.tab_buttons):
+            if i == index:
+                btn.configure(fg_color=("gray75", "gray25"))
+            else:
+                btn.configure(fg_color=("gray85", "gray15"))
         
-        print(f"[DEBUG] Loading tab {index}, content length: {len(tab.content)}")
+        if self.keep_editors:
+            self._enforce_memory_cap()
+    
+    def _show_tab_editor(self, tab: EditorTab) -> None:
+        """Grid the tab's own editor, creating it on first use or after hibernation."""
+        if tab.editor is None:
+            tab.thaw()
+            tab.line_numbers, tab.editor = self._create_editor()
+            self.text_area = tab.editor
+            self._load_into_editor(tab)
+            # The initial load is not an undoable edit
+            tab.editor.edit_reset()
+        
+        self.line_numbers = tab.line_numbers
+        self.text_area = tab.editor
+        self.line_numbers.grid(row=0, column=0, sticky="ns")
+        self.text_area.grid(row=0, column=1, sticky="nsew")
+        self.line_numbers.redraw()
+    
+    def _load_into_editor(self, tab: EditorTab) -> None:
+        """Reload self.text_area with the tab's content and re-highlight."""
+        # Detach so reloading the widget doesn't edit either tab's document
+        self.text_area.set_document(None)
         self.text_area.delete("1.0", "end")
-        print(f"[DEBUG] Text area cleared")
         self.text_area.insert("1.0", tab.content)
-        print(f"[DEBUG] Content inserted, checking...")
-        current_content = self.text_area.get("1.0", "end-1c")
-        print(f"[DEBUG] Current text_area content length: {len(current_content)}")
+        self.text_area.set_document(tab.document)
         
         try:
             self.text_area.mark_set(customtkinter.INSERT, tab.cursor_position)
@@ -151,22 +296,35 @@ class TabManager(customtkinter.CTkFrame):
         except (tkinter.TclError, ValueError):
             pass
         
-        if tab.file_path:
-            self.text_area.file_path = tab.file_path
-            print(f"[DEBUG] Calling highlight_text for {tab.file_path}")
-            self.text_area.highlight_text()
-            print(f"[DEBUG] Highlight completed")
+        # Untitled tabs must not inherit the previous tab's lexer and tokens
+        self.text_area.file_path = tab.file_path
+        self.text_area.highlight_text()
         
         # Force update
         self.text_area.update_idletasks()
-        print(f"[DEBUG] Tab switch completed")
-        
-        # Update button states
-        for i, (tab_frame, btn, close_btn) in enumerate(self.tab_buttons):
-            if i == index:
-                btn.configure(fg_color=("gray75", "gray25"))
-            else:
-                btn.configure(fg_color=("gray85", "gray15"))
+        logger.debug(f"Loaded tab {tab.get_title()} ({len(tab.document)} chars)")
+    
+    def hibernate_tab(self, tab: EditorTab) -> None:
+        """Destroy a background tab's widgets and compress its text."""
+        if tab.editor is None or tab is self.get_current_tab():
+            return
+        tab.cursor_position = tab.editor.index(customtkinter.INSERT)
+        tab.editor.destroy()
+        tab.line_numbers.destroy()
+        tab.editor = None
+        tab.line_numbers = None
+        tab.hibernate()
+        logger.info(f"Hibernated tab: {tab.get_title()}")
+    
+    def _enforce_memory_cap(self) -> None:
+        for tab in select_hibernation(self.tabs, self.get_current_tab(), self.memory_cap,
+                                      self.hibernate_after, time.monotonic()):
+            self.hibernate_tab(tab)
+    
+    def _hibernate_idle(self) -> None:
+        """Periodic check so idle tabs hibernate without a tab switch."""
+        self._enforce_memory_cap()
+        self.after(60000, self._hibernate_idle)
     
     def close_tab(self, index: int) -> None:
         """Close tab at index."""
@@ -176,17 +334,21 @@ class TabManager(customtkinter.CTkFrame):
         if len(self.tabs) <= 1:
             return  # Keep at least one tab
         
-        self.tabs.pop(index)
+        closing_current = index == self.current_tab_index
+        tab = self.tabs.pop(index)
         tab_frame, btn, close_btn = self.tab_buttons.pop(index)
         tab_frame.destroy()
+        if tab.editor is not None:
+            tab.editor.destroy()
+            tab.line_numbers.destroy()
         
         # Adjust current tab index
-        if self.current_tab_index >= len(self.tabs):
-            self.current_tab_index = len(self.tabs) - 1
+        if closing_current:
+            # Nothing to save, the closed tab's state must not land in a neighbour
+            self.current_tab_index = -1
+            self.switch_tab(min(index, len(self.tabs) - 1))
         elif self.current_tab_index > index:
             self.current_tab_index -= 1
-        
-        self.switch_tab(self.current_tab_index)
     
     def get_current_tab(self) -> Optional[EditorTab]:
         """Get current tab."""
@@ -0,0 +1,79 @@
+"""Tests for async highlighter."""
+import unittest
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from async_highlighter import AsyncHighlighter
+
+
+class TestAsyncHighlighter(unittest.TestCase):
+    """Test the coalescing highlight worker."""
+
+    def setUp(self):
+        self.highlighter = AsyncHighlighter(delay_ms=50)
+        self.results = []
+        self.done = threading.Event()
+
+    def tearDown(self):
+        self.highlighter.shutdown()
+
+    def callback(self, tokens, generation):
+        self.results.append((generation, "".join(value for _, value in tokens)))
+        self.done.set()
+
+    def test_burst_is_coalesced(self):
+        """Test a burst of edits lexes only the latest text."""
+        for i in range(5):
+            self.highlighter.highlight_async(f"x = {i}\n", "test.py", self.callback)
+        self.assertTrue(self.done.wait(2))
+        time.sleep(0.1)
+
+        self.assertEqual(self.results, [(5, "x = 4\n")])
+        self.assertEqual(self.highlighter.stats["coalesced"], 4)
+
+    def test_single_worker_thread(self):
+        """Test requests reuse one worker thread."""
+        self.highlighter.highlight_async("a = 1", "test.py", self.callback)
+        worker = self.highlighter._thread
+        self.assertTrue(self.done.wait(2))
+        self.done.clear()
+        self.highlighter.highlight_async("a = 2", "test.py", self.callback)
+        self.assertTrue(self.done.wait(2))
+
+        self.assertIs(self.highlighter._thread, worker)
+
+    def test_stale_result_rejected(self):
+        """Test accept() drops results superseded by a newer request."""
+        self.highlighter.highlight_async("a = 1", "test.py", self.callback)
+        self.assertTrue(self.done.wait(2))
+        generation = self.results[0][0]
+        self.highlighter.cancel()
+
+        self.assertFalse(self.highlighter.accept(generation))
+        self.assertEqual(self.highlighter.stats["dropped"], 1)
+        self.assertEqual(self.highlighter.stats["completed"], 0)
+
+    def test_current_result_accepted(self):
+        """Test accept() counts applied results as completed."""
+        generation = self.highlighter.highlight_async("a = 1", "test.py", self.callback)
+        self.assertTrue(self.done.wait(2))
+
+        self.assertTrue(self.highlighter.accept(generation))
+        self.assertEqual(self.highlighter.stats["completed"], 1)
+
+    def test_stale_result_counted_as_dropped(self):
+        """Test a result the caller finds stale is dropped, not completed."""
+        generation = self.highlighter.highlight_async("a = 1", "test.py", self.callback)
+        self.assertTrue(self.done.wait(2))
+
+        self.assertFalse(self.highlighter.accept(generation, current=False))
+        self.assertEqual(self.highlighter.stats["dropped"], 1)
+        self.assertEqual(self.highlighter.stats["completed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
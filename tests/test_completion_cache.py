@@ -0,0 +1,89 @@
+"""Tests for completion cache."""
+import unittest
+import os
+import sys
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from completion_cache import CompletionCache
+
+Completion = namedtuple("Completion", "name")
+
+
+def names(completions):
+    return [c.name for c in completions]
+
+
+class TestCompletionCache(unittest.TestCase):
+    """Test local filtering and validity of the cached set."""
+
+    def setUp(self):
+        self.cache = CompletionCache()
+        self.cache.start((3, 4), version=7)
+        self.cache.add([Completion(n) for n in ["append", "clear", "copy", "count", "extend", "pop"]])
+
+    def test_empty_prefix_keeps_order(self):
+        """Test no typed text shows every completion in the original order."""
+        self.assertEqual(names(self.cache.filter("")), ["append", "clear", "copy", "count", "extend", "pop"])
+
+    def test_prefix_filters_and_ranks(self):
+        """Test prefix matches rank above scattered subsequence matches."""
+        self.cache.add([Completion("close_cursor")])
+        result = names(self.cache.filter("co"))
+        self.assertEqual(result[:2], ["copy", "count"])
+        self.assertIn("close_cursor", result)
+        self.assertNotIn("append", result)
+
+    def test_fuzzy_subsequence(self):
+        """Test typed letters may skip characters of the name."""
+        self.assertEqual(names(self.cache.filter("ext")), ["extend"])
+        self.assertEqual(names(self.cache.filter("apnd")), ["append"])
+        self.assertEqual(self.cache.filter("xyz"), [])
+
+    def test_exact_case_prefix_wins(self):
+        """Test a name typed with its own case beats one differing in case."""
+        self.cache.start((1, 0), version=1)
+        self.cache.add([Completion("Path"), Completion("path")])
+        self.assertEqual(names(self.cache.filter("pa")), ["path", "Path"])
+
+    def test_longer_prefix_narrows_previous_matches(self):
+        """Test extending the prefix only re-scores the previous matches."""
+        self.cache.filter("c")
+        self.assertEqual(names(self.cache.filter("co")), ["copy", "count"])
+        self.assertEqual(self.cache.stats["narrowed"], 1)
+        self.assertEqual(sorted(names(self.cache.filter("c"))), ["clear", "copy", "count"])
+
+    def test_new_chunks_are_included(self):
+        """Test completions arriving later are filtered too."""
+        self.cache.filter("p")
+        self.cache.add([Completion("popitem")])
+        self.assertEqual(names(self.cache.filter("pop")), ["pop", "popitem"])
+
+    def test_edits_inside_word_keep_set(self):
+        """Test typing or deleting word characters after the trigger keeps it valid."""
+        self.cache.on_edit("3.4", "3.4", "co", 8)
+        self.cache.on_edit("3.5", "3.6", "", 9)
+        self.assertTrue(self.cache.covers((3, 4), 9))
+
+    def test_other_edits_drop_set(self):
+        """Test edits before the trigger, on other lines or of non-word text drop it."""
+        for edit in [("3.3", "3.4", ""), ("3.4", "3.4", "("), ("5.0", "5.0", "x"), ("3.4", "4.0", "")]:
+            self.setUp()
+            self.cache.on_edit(*edit, 8)
+            self.assertIsNone(self.cache.trigger, edit)
+            self.assertEqual(self.cache.completions, [])
+
+    def test_filter_speed(self):
+        """Test re-ranking thousands of completions fits in a keystroke."""
+        self.cache.start((1, 0), version=1)
+        self.cache.add([Completion(f"attribute_{i}_{w}") for i in range(5000) for w in ("x",)])
+        start = time.perf_counter()
+        for prefix in ("a", "at", "att", "attr_9"):
+            self.cache.filter(prefix)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""Tests for background completion worker."""
+import unittest
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from completion_worker import CHUNK_SIZE, CompletionDetail, CompletionWorker, DetailWorker, describe_completion
+from lsp_client import LspCompletion
+
+
+class TestCompletionWorker(unittest.TestCase):
+    """Test chunked delivery and cancellation."""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = []
+        self.worker = CompletionWorker(complete=self.complete)
+        self.chunks = []
+        self.done = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.worker.shutdown()
+
+    def complete(self, code, line, column, path, edit_version=None):
+        self.calls.append(code)
+        self.release.wait(2)
+        if code == "fail":
+            raise ValueError("broken")
+        return list(range(int(code)))
+
+    def callback(self, chunk, generation, done):
+        self.chunks.append((generation, list(chunk), done))
+        if done:
+            self.done.set()
+
+    def test_results_arrive_in_chunks(self):
+        """Test results are split into chunks and the last one is marked done."""
+        generation = self.worker.request(str(CHUNK_SIZE * 2 + 5), 1, 0, None, self.callback)
+        self.assertTrue(self.done.wait(2))
+
+        self.assertEqual([len(chunk) for _, chunk, _ in self.chunks], [CHUNK_SIZE, CHUNK_SIZE, 5])
+        self.assertEqual([done for _, _, done in self.chunks], [False, False, True])
+        self.assertTrue(all(g == generation for g, _, _ in self.chunks))
+        self.assertEqual(self.worker.stats["delivered"], 1)
+
+    def test_no_completions_still_reports_done(self):
+        """Test an empty result delivers one empty, final chunk."""
+        self.worker.request("0", 1, 0, None, self.callback)
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual([chunk for _, chunk, _ in self.chunks], [[]])
+
+    def test_newer_request_supersedes(self):
+        """Test results of a request overtaken while computing are dropped."""
+        self.release.clear()
+        first = self.worker.request("3", 1, 0, None, self.callback)
+        while not self.calls:
+            threading.Event().wait(0.01)
+        second = self.worker.request("2", 1, 0, None, self.callback)
+        self.assertFalse(self.worker.is_current(first))
+        self.release.set()
+        self.assertTrue(self.done.wait(2))
+
+        self.assertEqual(self.chunks, [(second, [0, 1], True)])
+
+    def test_cancel_prevents_delivery(self):
+        """Test a cancelled request never calls back."""
+        self.release.clear()
+        generation = self.worker.request("3", 1, 0, None, self.callback)
+        while not self.calls:
+            threading.Event().wait(0.01)
+        self.worker.cancel()
+        self.release.set()
+
+        self.assertFalse(self.done.wait(0.3))
+        self.assertFalse(self.worker.is_current(generation))
+        self.assertEqual(self.chunks, [])
+
+    def test_failure_delivers_empty_result(self):
+        """Test a failing completion reports no results instead of raising."""
+        self.worker.request("fail", 1, 0, None, self.callback)
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual([chunk for _, chunk, _ in self.chunks], [[]])
+        self.assertEqual(self.worker.stats["failed"], 1)
+
+
+class TestDetailWorker(unittest.TestCase):
+    """Test completion details are fetched for the latest selection only."""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.described = []
+        self.worker = DetailWorker(describe=self.describe)
+        self.results = []
+        self.done = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.worker.shutdown()
+
+    def describe(self, completion, path):
+        self.described.append(completion)
+        self.started.set()
+        self.release.wait(2)
+        if completion == "broken":
+            raise ValueError("no signature")
+        return CompletionDetail("function", f"{completion}()", "")
+
+    def callback(self, completion, detail):
+        self.results.append((completion, detail))
+        if completion in ("last", "broken"):
+            self.done.set()
+
+    def test_only_latest_pending_is_described(self):
+        """Test requests made while one is described replace each other."""
+        self.worker.request("first", None, self.callback)
+        self.assertTrue(self.started.wait(2))
+        for name in ("second", "third", "last"):
+            self.worker.request(name, None, self.callback)
+        self.release.set()
+        self.assertTrue(self.done.wait(2))
+
+        self.assertEqual(self.described, ["first", "last"])
+        self.assertEqual(self.results[-1], ("last", CompletionDetail("function", "last()", "")))
+
+    def test_failure_gives_empty_detail(self):
+        """Test a failing lookup reports an empty detail."""
+        self.release.set()
+        self.worker.request("broken", None, self.callback)
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual(self.results, [("broken", CompletionDetail("", "", ""))])
+        self.assertEqual(self.worker.stats["failed"], 1)
+
+    def test_language_server_items_need_no_lookup(self):
+        """Test items from a language server are described from their own fields."""
+        item = LspCompletion("dumps", "function", "dumps(obj)", "Serialize obj.")
+        self.assertEqual(describe_completion(item, None), ("function", "dumps(obj)", "Serialize obj."))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests for piece-table document model."""
+import unittest
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from document import Document
+
+
+class TestDocument(unittest.TestCase):
+    """Test edits and offset/position mapping."""
+
+    def test_random_edits_match_string(self):
+        """Test random inserts and deletes agree with plain string edits."""
+        rng = random.Random(7)
+        expected = "line one\nline two\n\nlast"
+        doc = Document(expected)
+
+        for _ in range(500):
+            start = rng.randint(0, len(expected))
+            end = rng.randint(start, min(len(expected), start + 10))
+            text = rng.choice(["", "x", "\n", "ab\ncd", "\n\n"])
+            doc.replace(start, end, text)
+            expected = expected[:start] + text + expected[end:]
+
+        self.assertEqual(doc.text(), expected)
+        self.assertEqual(len(doc), len(expected))
+        self.assertEqual(doc.line_count, expected.count("\n") + 1)
+
+    def test_offset_position_roundtrip(self):
+        """Test every offset maps to its line/column and back."""
+        doc = Document("ab\n")
+        doc.insert(3, "cde\n\nf")
+        doc.insert(0, "z")
+        text = doc.text()
+
+        for offset in range(len(text) + 1):
+            line = text.count("\n", 0, offset) + 1
+            column = offset - (text.rfind("\n", 0, offset) + 1)
+            self.assertEqual(doc.offset_to_position(offset), (line, column))
+            self.assertEqual(doc.position_to_offset(line, column), offset)
+
+    def test_apply_edit_tk_indices(self):
+        """Test widget edits expressed as Tk indices."""
+        doc = Document("def f():\n    pass\n")
+        doc.apply_edit("2.4", "2.8", "return 1")
+        doc.apply_edit("1.4", "1.5", "main")
+
+        self.assertEqual(doc.text(), "def main():\n    return 1\n")
+
+    def test_snapshot_is_immutable(self):
+        """Test snapshots keep their contents after later edits."""
+        doc = Document("hello\nworld")
+        snapshot = doc.snapshot()
+        doc.delete(0, 6)
+
+        self.assertEqual(snapshot.text(), "hello\nworld")
+        self.assertEqual(snapshot.lines(2, 2), "world")
+        self.assertEqual(doc.text(), "world")
+        self.assertGreater(doc.version, snapshot.version)
+
+    def test_snapshot_cached_per_version(self):
+        """Test unchanged documents reuse one snapshot."""
+        doc = Document("abc")
+        self.assertIs(doc.snapshot(), doc.snapshot())
+        doc.insert(3, "d")
+        self.assertEqual(doc.snapshot().slice(1, 4), "bcd")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Tests for workspace file watcher."""
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from file_watcher import (FileWatcher, merge_change, scan_tree, diff_scans,
+                          CREATED, MODIFIED, DELETED)
+from search_index import TrigramIndex
+
+
+class TestChangeHelpers(unittest.TestCase):
+    """Test change merging and scan diffs."""
+
+    def test_merge_change(self):
+        """Test successive changes in one batch collapse sensibly."""
+        self.assertEqual(merge_change(CREATED, MODIFIED), CREATED)
+        self.assertEqual(merge_change(CREATED, DELETED), DELETED)
+        self.assertEqual(merge_change(DELETED, CREATED), MODIFIED)
+        self.assertEqual(merge_change(MODIFIED, DELETED), DELETED)
+
+    def test_diff_scans(self):
+        """Test created, modified and deleted paths are detected."""
+        old = {"a": (1.0, 10), "b": (1.0, 10)}
+        new = {"a": (2.0, 10), "c": (1.0, 5)}
+        self.assertEqual(diff_scans(old, new), {"a": MODIFIED, "b": DELETED, "c": CREATED})
+
+
+class TestFileWatcher(unittest.TestCase):
+    """Test both watcher backends deliver batched changes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.batches = []
+        self.received = threading.Event()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def callback(self, changes):
+        self.batches.append(changes)
+        self.received.set()
+
+    def run_watcher(self, use_inotify):
+        watcher = FileWatcher(str(self.root), self.callback, debounce_ms=50,
+                              poll_interval=0.1, use_inotify=use_inotify)
+        watcher.start()
+        deadline = time.time() + 2
+        while watcher.backend is None and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.2)
+
+        (self.root / "one.py").write_text("x = 1\n")
+        (self.root / "two.py").write_text("y = 2\n")
+        self.assertTrue(self.received.wait(3))
+        time.sleep(0.3)
+        watcher.stop()
+
+        changes = {}
+        for batch in self.batches:
+            changes.update(batch)
+        self.assertEqual(changes.get(str(self.root / "one.py")), CREATED)
+        self.assertEqual(changes.get(str(self.root / "two.py")), CREATED)
+        return watcher
+
+    def test_polling_backend(self):
+        """Test the mtime/size polling fallback."""
+        self.assertEqual(self.run_watcher(False).backend, "polling")
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_backend_batches(self):
+        """Test inotify events for several files arrive in one batch."""
+        watcher = self.run_watcher(True)
+        if watcher.backend == "inotify":
+            self.assertEqual(len(self.batches), 1)
+
+    def test_scan_skips_ignored_dirs(self):
+        """Test node_modules and similar are not scanned."""
+        (self.root / "node_modules").mkdir()
+        (self.root / "node_modules" / "dep.js").write_text("")
+        (self.root / "src").mkdir()
+        (self.root / "src" / "main.py").write_text("")
+
+        found = scan_tree(str(self.root))
+        self.assertIn(str(self.root / "src" / "main.py"), found)
+        self.assertNotIn(str(self.root / "node_modules" / "dep.js"), found)
+
+
+class TestIndexApplyChanges(unittest.TestCase):
+    """Test watcher batches update only the affected index entries."""
+
+    def test_apply_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "a.py").write_text("alpha_value = 1\n")
+            index = TrigramIndex(root)
+            index.build()
+
+            (root / "pkg").mkdir()
+            (root / "pkg" / "b.py").write_text("alpha_value = 2\n")
+            os.remove(root / "a.py")
+            index.apply_changes({str(root / "pkg"): CREATED, str(root / "a.py"): DELETED})
+
+            self.assertEqual(index.candidates("alpha_value"), [root / "pkg" / "b.py"])
+            index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Tests for the fuzzy matcher."""
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import fuzzy
+from fuzzy import FuzzyIndex, fuzzy_match, is_boundary, iter_bits
+
+
+def rank(query, candidates):
+    scored = [(fuzzy_match(query, text)[0], text) for text in candidates if fuzzy_match(query, text)]
+    return [text for _, text in sorted(scored, reverse=True)]
+
+
+class TestFuzzyMatch(unittest.TestCase):
+    """Test subsequence matching and ranking."""
+
+    def test_subsequence_required(self):
+        """Test a query matches only when its characters appear in order."""
+        self.assertIsNotNone(fuzzy_match("ftv", "file_tree_vscode.py"))
+        self.assertIsNone(fuzzy_match("vtf", "file_tree_vscode.py"))
+        self.assertIsNone(fuzzy_match("x", "file_tree_vscode.py"))
+
+    def test_positions(self):
+        """Test the matched offsets are reported."""
+        score, positions = fuzzy_match("ftv", "file_tree_vscode.py")
+        self.assertEqual(positions, [0, 5, 10])
+
+    def test_boundaries(self):
+        """Test separators, camelCase humps and digits start words."""
+        self.assertTrue(is_boundary("a_b", 2))
+        self.assertTrue(is_boundary("fooBar", 3))
+        self.assertTrue(is_boundary("tab2", 3))
+        self.assertFalse(is_boundary("foobar", 3))
+
+    def test_word_starts_beat_scattered_letters(self):
+        """Test initials of words rank above letters inside words."""
+        self.assertEqual(rank("tm", ["utils/item.py", "tab_manager.py"])[0], "tab_manager.py")
+
+    def test_file_name_beats_directory(self):
+        """Test a match in the file name ranks above one in its folders."""
+        self.assertEqual(rank("search", ["search/utils.py", "lib/search.py"])[0], "lib/search.py")
+
+    def test_contiguous_beats_spread(self):
+        """Test consecutive characters rank above spread ones."""
+        self.assertEqual(rank("index", ["i_n_d_e_x.py", "index.py"])[0], "index.py")
+
+    def test_name_alignment_found_after_earlier_letters(self):
+        """Test the file name is matched even when the folders contain the letters first."""
+        score, positions = fuzzy_match("ed", "tests/editor.py")
+        self.assertEqual(positions, [6, 7])
+
+
+class TestFuzzyIndex(unittest.TestCase):
+    """Test the bitset prefilter, incremental re-ranking and updates."""
+
+    def setUp(self):
+        self.index = FuzzyIndex()
+        self.index.load(["src/editor.py", "src/tab_manager.py", "tests/test_editor.py", "docs/readme.md"])
+
+    def texts(self, query):
+        return [self.index.texts[slot] for _, slot, _ in self.index.search(query)]
+
+    def test_iter_bits(self):
+        """Test set bits are yielded in order across bytes."""
+        self.assertEqual(list(iter_bits(0b1000000101 | 1 << 40, 48)), [0, 2, 9, 40])
+
+    def test_longer_query_reranks_previous_matches(self):
+        """Test extending a query scores only the previous matches."""
+        self.index.search("ed")
+        scored = []
+        original = fuzzy.fuzzy_match
+        fuzzy.fuzzy_match = lambda *args: scored.append(args[1]) or original(*args)
+        try:
+            self.assertEqual(self.texts("edit"), ["src/editor.py", "tests/test_editor.py"])
+        finally:
+            fuzzy.fuzzy_match = original
+        self.assertNotIn("src/tab_manager.py", scored)  # No 'd', dropped at "ed"
+        self.assertEqual(len(scored), 3)
+
+    def test_add_and_remove(self):
+        """Test added strings are found and removed ones are not."""
+        self.index.search("ed")
+        slot = self.index.add("lib/editing.py")
+        self.index.remove(0)
+        self.assertEqual(sorted(self.texts("edit")), ["lib/editing.py", "tests/test_editor.py"])
+        self.assertEqual(self.index.texts[slot], "lib/editing.py")
+        self.assertEqual(len(self.index), 4)
+
+    def test_candidate_cap(self):
+        """Test large candidate sets are capped, names starting with the query first."""
+        index = FuzzyIndex()
+        index.load([f"data{i}/x{i}.py" for i in range(100)] + ["lib/aaa.py"])
+        old = fuzzy.MAX_CANDIDATES
+        fuzzy.MAX_CANDIDATES = 10
+        try:
+            candidates, complete = index._candidates("a")
+        finally:
+            fuzzy.MAX_CANDIDATES = old
+        self.assertFalse(complete)
+        self.assertEqual(candidates[0], 100)
+
+    def test_capped_search_includes_late_substring_hits(self):
+        """Test a capped search still finds the best match in the last slot, typed or pasted."""
+        index = FuzzyIndex()
+        index.load([f"alpha/{i:04}/test_each_reader.py" for i in range(fuzzy.MAX_CANDIDATES + 500)]
+                   + ["zzz/deep/the_search_index.py"])
+        best = index.size - 1
+        self.assertEqual(index.search("the_search")[0][1], best)
+
+        fresh = FuzzyIndex()
+        fresh.load(index.texts)
+        for end in range(1, len("the_search") + 1):
+            results = fresh.search("the_search"[:end])
+        self.assertEqual(results[0][1], best)
+
+    def test_capped_search_sees_added_and_removed(self):
+        """Test substring hits follow strings added and removed after loading."""
+        index = FuzzyIndex()
+        index.load([f"alpha/{i:04}/test_each_reader.py" for i in range(fuzzy.MAX_CANDIDATES + 500)])
+        index.search("the_search")
+        slot = index.add("zzz/the_search.py")
+        self.assertEqual(index.search("the_search")[0][1], slot)
+        index.remove(slot)
+        self.assertNotIn(slot, [match[1] for match in index.search("the_search")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Tests for incremental highlighter."""
+import unittest
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pygments.lexers import PythonLexer
+from incremental_highlighter import split_tokens_by_line, lex_tokens, relex
+
+
+def make_source(functions=50):
+    """Build a Python module with many top-level functions."""
+    parts = []
+    for i in range(functions):
+        parts.append(f"def func_{i}(x):\n    \"\"\"Doc {i}.\"\"\"\n    return x + {i}\n")
+    return "\n".join(parts)
+
+
+class TestIncrementalHighlighter(unittest.TestCase):
+    """Test dirty-region re-lexing."""
+
+    def setUp(self):
+        self.lexer = PythonLexer(stripnl=False, ensurenl=False)
+
+    def full_states(self, text):
+        return split_tokens_by_line(lex_tokens(self.lexer, text))
+
+    def edit(self, text, line, new_line):
+        """Replace a line and return (new_text, relexed_cache)."""
+        lines = text.split("\n")
+        cache = self.full_states(text)
+        new_lines = lines[:line - 1] + new_line.split("\n") + lines[line:]
+        added = new_line.count("\n")
+        cache[line - 1:line] = [None] * (added + 1)
+
+        def read(first, last):
+            return "\n".join(new_lines[first - 1:last])
+
+        first, states = relex(self.lexer, read, cache, line, line + added)
+        cache[first - 1:first - 1 + len(states)] = states
+        return "\n".join(new_lines), cache, first, states
+
+    def test_one_state_per_line(self):
+        """Test states are produced for every line."""
+        text = make_source(3)
+        self.assertEqual(len(self.full_states(text)), text.count("\n") + 1)
+
+    def test_top_level_lines_are_stable(self):
+        """Test lines starting a definition are restart points."""
+        states = self.full_states("def a():\n    pass\n")
+        self.assertTrue(states[0][1])
+        self.assertFalse(states[1][1])
+
+    def test_docstring_continuation_not_stable(self):
+        """Test lines inside a multi-line string are not restart points."""
+        states = self.full_states('x = """\nclass Foo\n"""\n')
+        self.assertFalse(states[1][1])
+
+    def test_relex_matches_full_lex(self):
+        """Test incremental result equals a full re-lex."""
+        text = make_source()
+        new_text, cache, _, _ = self.edit(text, 40, "    return x * 2  # changed")
+        self.assertEqual(cache, self.full_states(new_text))
+
+    def test_relex_stops_after_convergence(self):
+        """Test only a small window around the edit is re-lexed."""
+        text = make_source()
+        _, _, first, states = self.edit(text, 40, "    return x * 2")
+        self.assertLessEqual(first, 40)
+        self.assertLess(len(states), 10)
+
+    def test_relex_lexes_lazily(self):
+        """Test lexing stops at convergence instead of running to the end of the window."""
+        text = make_source()
+        lexed = []
+
+        def counting(lexer, source):
+            for token in lex_tokens(lexer, source):
+                lexed.append(token)
+                yield token
+
+        with mock.patch("incremental_highlighter.lex_tokens", counting):
+            _, _, _, states = self.edit(text, 40, "    return x * 2")
+        self.assertLess(len(states), 10)
+        self.assertLess(len(lexed), len(list(lex_tokens(self.lexer, text))) // 10)
+
+    def test_relex_inserted_lines(self):
+        """Test edits that add lines keep the cache aligned."""
+        text = make_source()
+        new_text, cache, _, _ = self.edit(text, 10, "def extra():\n    pass\n")
+        self.assertEqual(cache, self.full_states(new_text))
+
+    def test_relex_opening_string_propagates(self):
+        """Test an unterminated string re-lexes past the edited line."""
+        text = make_source(10)
+        new_text, cache, _, _ = self.edit(text, 5, 'x = """')
+        self.assertEqual(cache, self.full_states(new_text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Tests for the per-workspace Jedi language service."""
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from language_service import LanguageService, find_environment, get_language_service, service_for
+
+
+class TestLanguageService(unittest.TestCase):
+    """Test the project, Script reuse and workspace lookup."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name).resolve()
+        (self.root / "src").mkdir()
+        (self.root / "src" / "helpers.py").write_text("def greet(name):\n    return name\n")
+        self.main = self.root / "main.py"
+        self.service = LanguageService(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_project_rooted_at_workspace(self):
+        """Test the project path and the src folder on its sys.path."""
+        project = self.service.project
+        self.assertEqual(str(project.path), str(self.root))
+        self.assertIn(str(self.root / "src"), [str(p) for p in project.added_sys_path])
+
+    def test_completes_workspace_modules(self):
+        """Test modules of the workspace are importable for completions."""
+        code = "import helpers\nhelpers.gr"
+        names = [c.name for c in self.service.complete(code, 2, 10, self.main)]
+        self.assertIn("greet", names)
+
+    def test_describe_completion(self):
+        """Test type, signature and docstring of a completion."""
+        code = "def greet(name):\n    \"\"\"Say hello.\"\"\"\n\ngre"
+        completion = self.service.complete(code, 4, 3, self.main)[0]
+        self.assertEqual(self.service.describe(completion), ("function", "greet(name)", "Say hello."))
+
+    def test_goto_follows_imports(self):
+        """Test definitions in other workspace files are found."""
+        code = "from helpers import greet\ngreet('x')\n"
+        definitions = self.service.goto(code, 2, 1, self.main)
+        self.assertEqual([(d.module_path.name, d.line) for d in definitions], [("helpers.py", 1)])
+
+    def test_script_reused_until_buffer_changes(self):
+        """Test one Script serves repeated requests on the same buffer."""
+        code = "import os\nos.pa"
+        first = self.service.script(code, self.main)
+        self.assertIs(self.service.script(code, self.main), first)
+        self.assertIsNot(self.service.script(code + "t", self.main), first)
+        self.assertEqual(self.service.stats, {"scripts": 2, "reused": 1})
+
+    def test_preload(self):
+        """Test preloading marks the service ready."""
+        self.service.preload(["json"])
+        self.assertTrue(self.service.preloaded.is_set())
+
+    def test_environment_from_workspace_virtualenv(self):
+        """Test a virtualenv in the workspace is picked up."""
+        self.assertIsNone(find_environment(str(self.root)))
+        (self.root / ".venv").mkdir()
+        (self.root / ".venv" / "pyvenv.cfg").write_text("home = /usr/bin\n")
+        self.assertEqual(find_environment(str(self.root)), str(self.root / ".venv"))
+
+    def test_service_for_innermost_workspace(self):
+        """Test files map to the innermost known workspace."""
+        outer = get_language_service(self.root)
+        inner = get_language_service(self.root / "src")
+        self.assertIs(service_for(self.root / "src" / "helpers.py"), inner)
+        self.assertIs(service_for(self.main), outer)
+
+
+if __name__ == "__main__":
+    unittest.main()
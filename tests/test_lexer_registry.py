@@ -0,0 +1,74 @@
+"""Tests for lexer registry."""
+import unittest
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pygments.lexers import guess_lexer
+from lexer_registry import LexerRegistry, shebang_interpreter, modeline_filetype
+
+
+class TestLexerRegistry(unittest.TestCase):
+    """Test cached lexer resolution."""
+
+    def setUp(self):
+        self.registry = LexerRegistry()
+
+    def test_shebang_interpreter(self):
+        """Test interpreter detection from shebang lines."""
+        self.assertEqual(shebang_interpreter("#!/usr/bin/env python3\nprint()"), "python3")
+        self.assertEqual(shebang_interpreter("#!/bin/bash\n"), "bash")
+        self.assertEqual(shebang_interpreter("print()"), "")
+
+    def test_modeline_filetype(self):
+        """Test vim modeline detection."""
+        self.assertEqual(modeline_filetype("x = 1\n# vim: set ft=python :\n"), "python")
+
+    def test_extension_lookup(self):
+        """Test lexer chosen by file extension."""
+        self.assertEqual(self.registry.get_lexer("/tmp/app.js").name, "JavaScript")
+
+    def test_instance_reused(self):
+        """Test the same lexer instance is returned for the same key."""
+        first = self.registry.get_lexer("/a/one.py")
+        second = self.registry.get_lexer("/b/two.py")
+        self.assertIs(first, second)
+        self.assertEqual(self.registry.stats["hits"], 1)
+
+    def test_names_pygments_matches_whole(self):
+        """Test files recognised by name don't share a lexer with their extension."""
+        notes = self.registry.get_lexer("/a/notes.txt")
+        cmake = self.registry.get_lexer("/a/CMakeLists.txt")
+        self.assertEqual(cmake.name, "CMake")
+        self.assertNotEqual(notes.name, "CMake")
+        self.assertIs(self.registry.get_lexer("/b/readme.txt"), notes)
+        self.assertIn("make", self.registry.get_lexer("/a/Makefile.am").aliases)
+        self.assertNotIn("make", (self.registry.get_lexer("/a/data.am") or notes).aliases)
+
+    def test_extension_case_kept(self):
+        """Test extensions Pygments tells apart by case get separate lexers."""
+        self.assertEqual(self.registry.get_lexer("/a/main.c").name, "C")
+        self.assertEqual(self.registry.get_lexer("/a/main.C").name, "C++")
+
+    def test_shebang_without_extension(self):
+        """Test scripts without extension resolve through their shebang."""
+        lexer = self.registry.get_lexer("/usr/local/bin/tool", "#!/usr/bin/env python3\nimport os\n")
+        self.assertIn("python", lexer.aliases)
+
+    def test_sniffing_only_once(self):
+        """Test content sniffing runs once per key."""
+        with mock.patch("lexer_registry.guess_lexer", wraps=guess_lexer) as guess:
+            self.registry.get_lexer("/tmp/data.unknownext", "<?php echo 1; ?>")
+            self.registry.get_lexer("/tmp/other.unknownext", "<?php echo 2; ?>")
+        self.assertEqual(guess.call_count, 1)
+
+    def test_offsets_preserved(self):
+        """Test lexers keep leading newlines so offsets match the widget."""
+        lexer = self.registry.get_lexer("/tmp/x.py")
+        self.assertFalse(lexer.stripnl)
+
+
+if __name__ == "__main__":
+    unittest.main()
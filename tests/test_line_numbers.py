@@ -0,0 +1,139 @@
+"""Tests for line number gutter."""
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from line_numbers import LineNumbers
+
+
+class FakeText:
+    """Text widget with 20px rows and a viewport of `rows` rows; lines in `wrapped` take two."""
+
+    def __init__(self, line_count, rows=10):
+        self.line_count = line_count
+        self.rows = rows
+        self.top = 1
+        self.wrapped = set()
+
+    def index(self, index):
+        if index == "@0,0":
+            return f"{self.top}.0"
+        return f"{self.line_count}.0"
+
+    def dlineinfo(self, index):
+        line = int(index.split(".")[0])
+        row = sum(2 if n in self.wrapped else 1 for n in range(self.top, line))
+        if line < self.top or row >= self.rows:
+            return None
+        return (0, row * 20, 100, 20, 15)
+
+    def winfo_height(self):
+        return self.rows * 20
+
+
+class FakeGutter(LineNumbers):
+    """LineNumbers with the canvas replaced by a dict of items."""
+
+    def __init__(self, text_widget):
+        self.text_widget = text_widget
+        self._items = []
+        self._shown = []
+        self._last_key = None
+        self._digits = 0
+        self._char_width = None
+        self.stats = {"redraws": 0, "skipped": 0, "created": 0, "updated": 0}
+        self.canvas = {}
+        self.width = None
+        self._set_digits(self.MIN_DIGITS)
+
+    def _measure_digit(self):
+        return 8
+
+    def configure(self, width=None, **kwargs):
+        self.width = width
+
+    def create_text(self, x, y, text, **kwargs):
+        item = len(self.canvas) + 1
+        self.canvas[item] = {"x": x, "y": y, "text": text, "state": "normal"}
+        return item
+
+    def coords(self, item, x, y):
+        self.canvas[item].update(x=x, y=y)
+
+    def itemconfigure(self, item, **kwargs):
+        self.canvas[item].update(kwargs)
+
+    def visible(self):
+        return [(c["text"], c["y"]) for c in self.canvas.values() if c["state"] == "normal"]
+
+
+class TestLineNumbers(unittest.TestCase):
+    """Test pooled, change-only gutter redraws."""
+
+    def setUp(self):
+        self.text = FakeText(1000)
+        self.gutter = FakeGutter(self.text)
+
+    def test_draws_visible_lines(self):
+        """Test one item per visible line at its y-offset."""
+        self.gutter.redraw()
+        self.assertEqual(self.gutter.visible(), [(str(n), (n - 1) * 20) for n in range(1, 11)])
+
+    def test_scroll_reuses_items(self):
+        """Test scrolling updates pooled items instead of creating new ones."""
+        self.gutter.redraw()
+        self.text.top = 50
+        self.gutter.redraw()
+
+        self.assertEqual(self.gutter.stats["created"], 10)
+        self.assertEqual(len(self.gutter.canvas), 10)
+        self.assertEqual(self.gutter.visible()[0], ("50", 0))
+
+    def test_unchanged_view_skips_redraw(self):
+        """Test redraw is skipped when nothing visible changed."""
+        self.gutter.redraw()
+        self.gutter.redraw()
+
+        self.assertEqual(self.gutter.stats["redraws"], 1)
+        self.assertEqual(self.gutter.stats["skipped"], 1)
+
+    def test_wrap_change_moves_lines_below(self):
+        """Test a line starting to wrap shifts the numbers after it."""
+        self.gutter.redraw()
+        self.text.wrapped.add(3)
+        self.gutter.redraw()
+
+        self.assertEqual(self.gutter.stats["redraws"], 2)
+        self.assertEqual(self.gutter.visible()[2:4], [("3", 40), ("4", 80)])
+        self.assertEqual(len(self.gutter.visible()), 9)
+
+    def test_spare_items_hidden(self):
+        """Test rows past the end of the file are hidden."""
+        self.gutter.redraw()
+        self.text.top = 995
+        self.gutter.redraw()
+
+        self.assertEqual([t for t, _ in self.gutter.visible()], ["995", "996", "997", "998", "999", "1000"])
+
+    def test_forced_redraw_hides_spare_items(self):
+        """Test a forced redraw still hides rows no longer visible."""
+        self.gutter.redraw()
+        self.text.top = 998
+        self.gutter.redraw(force=True)
+
+        self.assertEqual([t for t, _ in self.gutter.visible()], ["998", "999", "1000"])
+
+    def test_width_grows_with_digits(self):
+        """Test gutter widens for 6+ digit line numbers."""
+        narrow = self.gutter.width
+        self.text.line_count = 1234567
+        self.gutter.redraw()
+
+        self.assertEqual(self.gutter.width, 7 * 8 + LineNumbers.PADDING)
+        self.assertGreater(self.gutter.width, narrow)
+
+
+if __name__ == "__main__":
+    unittest.main()
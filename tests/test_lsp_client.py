@@ -0,0 +1,276 @@
+"""Tests for LSP client."""
+import unittest
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from lsp_client import (LanguageClient, LspError, char_column, encode_message, path_to_uri,
+                        read_message, utf16_column, uri_to_path)
+
+# A minimal server: incremental sync in UTF-16, canned answers, exits on "CRASH"
+FAKE_SERVER = r'''
+import json, os, sys
+
+docs = {}
+
+def read():
+    length = None
+    while True:
+        line = sys.stdin.buffer.readline()
+        if not line:
+            sys.exit(0)
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    return json.loads(sys.stdin.buffer.read(length))
+
+def send(payload):
+    body = json.dumps(payload).encode()
+    sys.stdout.buffer.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+    sys.stdout.buffer.flush()
+
+def offset(text, position):
+    lines = text.split("\n")
+    start = sum(len(line) + 1 for line in lines[:position["line"]])
+    line = lines[position["line"]] if position["line"] < len(lines) else ""
+    units = 0
+    for i, char in enumerate(line):
+        if units >= position["character"]:
+            return start + i
+        units += 2 if ord(char) > 0xFFFF else 1
+    return start + len(line)
+
+def publish(uri):
+    send({"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics", "params": {"uri": uri, "diagnostics": [
+        {"range": {"start": {"line": 0, "character": 2}, "end": {"line": 0, "character": 4}},
+         "severity": 2, "message": "length %d" % len(docs[uri]), "source": "fake"}]}})
+
+while True:
+    message = read()
+    method, params = message.get("method"), message.get("params") or {}
+    if method == "initialize":
+        send({"jsonrpc": "2.0", "id": message["id"], "result": {"capabilities": {
+            "textDocumentSync": {"openClose": True, "change": 2}}}})
+    elif method == "textDocument/didOpen":
+        docs[params["textDocument"]["uri"]] = params["textDocument"]["text"]
+        publish(params["textDocument"]["uri"])
+    elif method == "textDocument/didChange":
+        uri = params["textDocument"]["uri"]
+        for change in params["contentChanges"]:
+            if "range" in change:
+                text = docs[uri]
+                start, end = offset(text, change["range"]["start"]), offset(text, change["range"]["end"])
+                docs[uri] = text[:start] + change["text"] + text[end:]
+            else:
+                docs[uri] = change["text"]
+        if "CRASH" in docs[uri]:
+            os._exit(1)
+        publish(uri)
+    elif method == "test/text":
+        send({"jsonrpc": "2.0", "id": message["id"], "result": docs.get(params["uri"])})
+    elif method == "textDocument/completion":
+        position = params["position"]
+        send({"jsonrpc": "2.0", "id": message["id"], "result": {"isIncomplete": False, "items": [
+            {"label": "zeta", "kind": 6, "sortText": "b"},
+            {"label": "at:%d:%d" % (position["line"], position["character"]), "kind": 3,
+             "sortText": "a", "detail": "f()", "documentation": {"kind": "plaintext", "value": "Doc"}}]}})
+    elif method in ("textDocument/definition", "textDocument/references"):
+        uri = params["textDocument"]["uri"]
+        send({"jsonrpc": "2.0", "id": message["id"], "result": [
+            {"uri": uri, "range": {"start": {"line": 0, "character": 4}, "end": {"line": 0, "character": 5}}}]})
+    elif method == "test/fail":
+        send({"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32603, "message": "broken"}})
+    elif method == "shutdown":
+        send({"jsonrpc": "2.0", "id": message["id"], "result": None})
+    elif method == "exit":
+        sys.exit(0)
+'''
+
+
+class TestProtocol(unittest.TestCase):
+    """Test message framing and position conversion."""
+
+    def test_message_roundtrip(self):
+        """Test framed messages are read back, skipping extra headers."""
+        payload = {"jsonrpc": "2.0", "id": 1, "result": "ñ"}
+        data = encode_message(payload)
+        stream = io.BytesIO(data.replace(b"\r\n\r\n", b"\r\nContent-Type: x\r\n\r\n") + data)
+
+        self.assertEqual(read_message(stream), payload)
+        self.assertEqual(read_message(stream), payload)
+        self.assertIsNone(read_message(stream))
+
+    def test_truncated_message_is_end_of_stream(self):
+        """Test a body cut short reads as end of stream."""
+        self.assertIsNone(read_message(io.BytesIO(encode_message({"id": 1})[:-2])))
+
+    def test_utf16_columns(self):
+        """Test columns count astral characters as two UTF-16 units."""
+        line = "a😀b"
+        self.assertEqual(utf16_column(line, 2), 3)
+        self.assertEqual(char_column(line, 3), 2)
+        self.assertEqual(utf16_column("abc", 2), 2)
+        self.assertEqual(char_column("abc", 10), 3)
+
+    def test_uri_roundtrip(self):
+        """Test paths survive conversion to file URIs."""
+        path = os.path.abspath(os.path.join("some dir", "módulo.py"))
+        self.assertEqual(uri_to_path(path_to_uri(path)), path)
+
+
+class TestLanguageClient(unittest.TestCase):
+    """Test document sync, requests and restarts against a fake server."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        script = os.path.join(self.temp_dir, "fake_server.py")
+        with open(script, "w") as f:
+            f.write(FAKE_SERVER)
+        self.client = LanguageClient(self.temp_dir, "python", [[sys.executable, script]], timeout=5)
+        self.client.restart_delay = 0.05
+        self.path = os.path.join(self.temp_dir, "module.py")
+
+    def tearDown(self):
+        self.client.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def server_text(self):
+        self.assertTrue(self.client.ready.wait(5))
+        return self.client.server.request("test/text", {"uri": path_to_uri(self.path)}, 5)
+
+    def test_incremental_changes_stay_in_sync(self):
+        """Test range edits, including after astral characters, keep the server's copy equal."""
+        self.client.open_document(self.path, "x = 1\ny = 2\n")
+        self.assertTrue(self.client.ready.wait(5))
+        self.client.change_document(self.path, [("1.4", "1.5", "'😀'")])
+        self.client.change_document(self.path, [("1.7", "1.7", " + z"), ("2.0", "3.0", "")])
+
+        self.assertEqual(self.server_text(), "x = '😀' + z\n")
+        self.assertEqual(self.client.text(self.path), "x = '😀' + z\n")
+        self.assertEqual(self.client.stats["changes"], 2)
+
+    def test_edits_before_start_are_replayed(self):
+        """Test edits made while the server starts reach it through the reopened file."""
+        self.client.open_document(self.path, "a")
+        self.client.change_document(self.path, [("1.1", "1.1", "bc")])
+        self.assertEqual(self.server_text(), "abc")
+
+    def test_sync_resends_drifted_text(self):
+        """Test sync sends the full text only when the copy differs."""
+        self.client.sync(self.path, "one")
+        self.assertTrue(self.client.ready.wait(5))
+        self.client.sync(self.path, "one")
+        self.assertEqual(self.client.stats["resyncs"], 0)
+        self.client.sync(self.path, "two")
+        self.assertEqual(self.server_text(), "two")
+        self.assertEqual(self.client.stats["resyncs"], 1)
+
+    def test_stale_text_does_not_replace_newer_edits(self):
+        """Test text captured before the last forwarded edit is not sent back."""
+        self.client.open_document(self.path, "a", edit_version=1)
+        self.client.change_document(self.path, [("1.1", "1.1", "b")], edit_version=2)
+        self.client.complete(self.path, "a", 1, 1, edit_version=1)
+
+        self.assertEqual(self.client.text(self.path), "ab")
+        self.assertEqual(self.server_text(), "ab")
+        self.assertEqual(self.client.stats["stale"], 1)
+        self.client.sync(self.path, "abc", edit_version=3)
+        self.assertEqual(self.server_text(), "abc")
+
+    def test_completion_converts_positions_and_sorts(self):
+        """Test completion sends UTF-16 positions and returns items by sortText."""
+        completions = self.client.complete(self.path, "s = '😀'.up", 1, 10)
+
+        self.assertEqual([c.name for c in completions], ["at:0:11", "zeta"])
+        self.assertEqual(completions[0].type, "function")
+        self.assertEqual(completions[0].detail, "f()")
+        self.assertEqual(completions[0].documentation, "Doc")
+
+    def test_definition_and_references(self):
+        """Test locations come back as 1-based lines and character columns."""
+        code = "😀 = value\n"
+        definitions = self.client.definition(self.path, code, 1, 5)
+        references = self.client.references(self.path, code, 1, 5)
+
+        self.assertEqual(definitions, references)
+        self.assertEqual(definitions[0].module_path, self.path)
+        self.assertEqual((definitions[0].line, definitions[0].column), (1, 3))
+        self.assertEqual(definitions[0].name, "value")
+
+    def test_diagnostics_reach_listeners(self):
+        """Test published diagnostics are converted and passed to listeners."""
+        received = []
+        done = threading.Event()
+        self.client.diagnostics_listeners.append(lambda path, d: (received.append((path, d)), done.set()))
+        self.client.open_document(self.path, "abcdef")
+
+        self.assertTrue(done.wait(5))
+        path, diagnostics = received[-1]
+        self.assertEqual(path, self.path)
+        self.assertEqual(diagnostics[0][:5], (1, 2, 1, 4, "warning"))
+        self.assertEqual(diagnostics[0].message, "length 6")
+
+    def test_error_response_raises(self):
+        """Test a server error becomes an LspError."""
+        self.client.open_document(self.path, "")
+        self.assertTrue(self.client.ready.wait(5))
+        with self.assertRaises(LspError):
+            self.client.server.request("test/fail", {}, 5)
+
+    def test_crashed_server_restarts_with_files(self):
+        """Test a crash restarts the server and reopens files with their current text."""
+        self.client.open_document(self.path, "ok")
+        self.assertTrue(self.client.ready.wait(5))
+        first = self.client.server
+        self.client.change_document(self.path, [("1.2", "1.2", " CRASH")])
+
+        deadline = time.monotonic() + 5
+        while (self.client.server in (None, first) or not self.client.ready.is_set()) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertIsNot(self.client.server, first)
+        self.assertEqual(self.server_text(), "ok CRASH")
+        self.assertEqual(self.client.stats["restarts"], 1)
+        self.assertEqual(self.client.stats["starts"], 2)
+
+    def test_server_stays_down_after_crash_limit(self):
+        """Test a server past the crash limit is only started again by restart()."""
+        self.client.open_document(self.path, "ok")
+        self.assertTrue(self.client.ready.wait(5))
+        with mock.patch("lsp_client.RESTART_LIMIT", 0):
+            self.client.change_document(self.path, [("1.2", "1.2", " CRASH")])
+            deadline = time.monotonic() + 5
+            while not self.client.given_up and time.monotonic() < deadline:
+                time.sleep(0.02)
+        self.assertTrue(self.client.given_up)
+
+        self.client.start()
+        with self.assertRaises(LspError):
+            self.client.complete(self.path, "ok", 1, 1)
+        self.assertEqual(self.client.stats["starts"], 1)
+
+        self.client.sync(self.path, "ok")
+        self.client.restart()
+        self.assertEqual(self.server_text(), "ok")
+        self.assertFalse(self.client.given_up)
+        self.assertEqual(self.client.stats["starts"], 2)
+
+    def test_missing_server_raises(self):
+        """Test requests fail fast when no server can start."""
+        client = LanguageClient(self.temp_dir, "python", [[os.path.join(self.temp_dir, "missing")]], timeout=1)
+        with self.assertRaises(LspError):
+            client.complete(self.path, "x", 1, 1)
+        client.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Tests for multi-process project search."""
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import parallel_search
+from parallel_search import ParallelSearch, reset_pool
+from search_engine import SearchQuery
+
+
+class TestParallelSearch(unittest.TestCase):
+    """Test streaming, cap and cancel over many files."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.files = []
+        for i in range(100):
+            path = Path(cls.tmp.name) / f"mod{i}.py"
+            path.write_text(f"def handler_{i}():\n    return 'needle'\n" if i % 2 else "pass\n")
+            cls.files.append(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        reset_pool()
+        cls.tmp.cleanup()
+
+    def run_search(self, search, files):
+        batches = []
+        outcome = []
+        search.run(files, batches.append, lambda *args: outcome.append(args))
+        return batches, outcome[0]
+
+    def test_streams_batches_from_pool(self):
+        """Test results arrive in several batches from worker processes."""
+        batches, (total, cancelled, capped) = self.run_search(
+            ParallelSearch(SearchQuery("needle"), workers=2), self.files)
+
+        self.assertEqual(total, 50)
+        self.assertGreater(len(batches), 1)
+        self.assertFalse(cancelled or capped)
+        self.assertEqual(len({path for batch in batches for path, _, _ in batch}), 50)
+
+    def test_cap_total_matches(self):
+        """Test the total number of matches is capped."""
+        batches, (total, _, capped) = self.run_search(
+            ParallelSearch(SearchQuery("needle"), max_matches=7), self.files[:20])
+
+        self.assertEqual(total, 7)
+        self.assertEqual(sum(len(batch) for batch in batches), 7)
+        self.assertTrue(capped)
+
+    def test_cancel_drops_results(self):
+        """Test a cancelled search delivers nothing more."""
+        search = ParallelSearch(SearchQuery("needle"))
+        batches = []
+
+        def on_batch(batch):
+            batches.append(batch)
+            search.cancel()
+
+        outcome = []
+        search.run(self.files[:20], on_batch, lambda *args: outcome.append(args))
+        self.assertEqual(len(batches), 1)
+        self.assertTrue(outcome[0][1])
+
+    def test_broken_pool_falls_back_inline(self):
+        """Test a pool that fails to start doesn't lose results."""
+        original = parallel_search.get_pool
+
+        def broken_pool(workers=0):
+            raise RuntimeError("cannot start workers")
+
+        parallel_search.get_pool = broken_pool
+        try:
+            _, (total, _, _) = self.run_search(ParallelSearch(SearchQuery("needle")), self.files)
+        finally:
+            parallel_search.get_pool = original
+        self.assertEqual(total, 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
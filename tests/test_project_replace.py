@@ -0,0 +1,224 @@
+"""Tests for project-wide replace."""
+import unittest
+import os
+import stat
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from document import Document
+from parallel_search import reset_pool
+from project_replace import (ConflictError, ReplacePreview, apply_to_document, apply_to_widget,
+                             plan_text, validate_replacement, write_atomic, write_plan, write_plans,
+                             read_text)
+from search_engine import SearchError, SearchQuery
+
+
+class FakeWidget:
+    """Text widget stand-in recording the edits it receives."""
+
+    def __init__(self, text):
+        self.document = Document(text)
+        self.calls = []
+
+    def edit_separator(self):
+        self.calls.append(("separator",))
+
+    def delete(self, start, end):
+        self.calls.append(("delete", start, end))
+        self.document.apply_edit(start, end, "")
+
+    def insert(self, index, text):
+        self.calls.append(("insert", index, text))
+        self.document.apply_edit(index, index, text)
+
+
+class TestPlanText(unittest.TestCase):
+    """Test hunks computed for one file."""
+
+    TEXT = "a = old\nb = old + old\nc = 1\nold\n"
+
+    def test_hunks_group_matches_by_line(self):
+        """Test matches on one line share a hunk with its diff."""
+        plan = plan_text(SearchQuery("old", whole_word=True), "new", self.TEXT)
+        self.assertEqual([hunk.first_line for hunk in plan.hunks], [1, 2, 4])
+        self.assertEqual(plan.count, 4)
+        self.assertEqual(plan.hunks[1].diff_lines(), ["-b = old + old", "+b = new + new"])
+        self.assertEqual(plan.new_text(), self.TEXT.replace("old", "new"))
+
+    def test_skipped_hunks(self):
+        """Test unselected hunks are left as they were."""
+        plan = plan_text(SearchQuery("old"), "new", self.TEXT)
+        plan.hunks[1].selected = False
+        self.assertEqual(plan.new_text(), "a = new\nb = old + old\nc = 1\nnew\n")
+
+    def test_regex_groups_and_multiline(self):
+        """Test regex replacements expand groups and may span lines."""
+        plan = plan_text(SearchQuery(r"(\w) = (\w+)", regex=True), r"\2 = \1", self.TEXT)
+        self.assertEqual(plan.new_text().splitlines()[:3], ["old = a", "old = b + old", "1 = c"])
+
+        plan = plan_text(SearchQuery(r"1\nold", regex=True), "2", self.TEXT)
+        self.assertEqual(len(plan.hunks), 1)
+        self.assertEqual(plan.hunks[0].old_lines, ["c = 1", "old"])
+        self.assertEqual(plan.hunks[0].new_lines, ["c = 2"])
+
+    def test_no_changes(self):
+        """Test files without effective changes have no plan."""
+        self.assertIsNone(plan_text(SearchQuery("missing"), "x", self.TEXT))
+        self.assertIsNone(plan_text(SearchQuery("old"), "old", self.TEXT))
+
+    def test_invalid_replacement(self):
+        """Test bad group references are reported before planning."""
+        with self.assertRaises(SearchError):
+            validate_replacement(SearchQuery(r"(o)ld", regex=True), r"\2")
+        validate_replacement(SearchQuery("(o)ld"), r"\2")
+
+
+class TestApplyInPlace(unittest.TestCase):
+    """Test open buffers receive only the changed ranges."""
+
+    def test_widget_edits_changed_ranges(self):
+        """Test each match is one delete/insert, last first, in one undo step."""
+        text = "x = old\ny = 2\nold()\n"
+        widget = FakeWidget(text)
+        plan = plan_text(SearchQuery("old"), "new", text)
+
+        self.assertEqual(apply_to_widget(widget, plan), 2)
+        self.assertEqual(widget.document.text(), "x = new\ny = 2\nnew()\n")
+        self.assertEqual(widget.calls, [
+            ("separator",),
+            ("delete", "3.0", "3.3"), ("insert", "3.0", "new"),
+            ("delete", "1.4", "1.7"), ("insert", "1.4", "new"),
+            ("separator",),
+        ])
+
+    def test_document_edits(self):
+        """Test tabs without a widget are edited through their document."""
+        document = Document("old old\n")
+        plan = plan_text(SearchQuery("old"), "", document.text())
+        apply_to_document(document, plan)
+        self.assertEqual(document.text(), " \n")
+
+
+class TestWrites(unittest.TestCase):
+    """Test atomic and parallel writes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def plan_file(self, path, query="old", replacement="new"):
+        text, signature = read_text(str(path))
+        return plan_text(SearchQuery(query), replacement, text, str(path), signature)
+
+    def test_write_atomic_keeps_mode_and_newlines(self):
+        """Test the renamed file keeps its permissions and CRLF line endings."""
+        path = self.root / "script.sh"
+        path.write_bytes(b"echo old\r\necho old\r\n")
+        path.chmod(0o755)
+
+        write_plan(self.plan_file(path))
+        self.assertEqual(path.read_bytes(), b"echo new\r\necho new\r\n")
+        self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o755)
+        self.assertEqual(os.listdir(self.root), ["script.sh"])
+
+    def test_write_atomic_through_symlink(self):
+        """Test writing through a symlink replaces its target and keeps the link."""
+        target = self.root / "real.py"
+        target.write_text("old\n")
+        link = self.root / "link.py"
+        link.symlink_to(target)
+
+        write_atomic(str(link), "new\n")
+        self.assertTrue(link.is_symlink())
+        self.assertEqual(target.read_text(), "new\n")
+        self.assertEqual(sorted(os.listdir(self.root)), ["link.py", "real.py"])
+
+    def test_conflict_when_file_changed(self):
+        """Test a file edited after the preview is not overwritten."""
+        path = self.root / "a.py"
+        path.write_text("old\n")
+        plan = self.plan_file(path)
+        path.write_text("old and changed\n")
+
+        with self.assertRaises(ConflictError):
+            write_plan(plan)
+        self.assertEqual(path.read_text(), "old and changed\n")
+
+    def test_write_plans_in_parallel(self):
+        """Test many files are written and failures are reported per file."""
+        plans = []
+        for i in range(20):
+            path = self.root / f"m{i}.py"
+            path.write_text(f"old_{i} = 1\n")
+            plans.append(self.plan_file(path))
+        os.unlink(plans[3].path)
+
+        written, failed = write_plans(plans, workers=4)
+        self.assertEqual(written, 19)
+        self.assertEqual([path for path, _ in failed], [plans[3].path])
+        self.assertEqual((self.root / "m7.py").read_text(), "new_7 = 1\n")
+
+    def test_failed_write_leaves_no_temp_file(self):
+        """Test the temp file is removed if the rename can't happen."""
+        with self.assertRaises(OSError):
+            write_atomic(str(self.root / "missing.py"), "text")
+        self.assertEqual(os.listdir(self.root), [])
+
+
+class TestReplacePreview(unittest.TestCase):
+    """Test streaming plans over a workspace."""
+
+    @classmethod
+    def tearDownClass(cls):
+        reset_pool()
+
+    def test_streams_plans_with_buffers_first(self):
+        """Test open buffers are planned from their text, then matching files."""
+        with tempfile.TemporaryDirectory() as tmp:
+            files = []
+            for i in range(40):
+                path = Path(tmp) / f"f{i}.py"
+                path.write_text("needle\n" if i % 4 == 0 else "hay\n")
+                files.append(path)
+            open_path = str(files[1].resolve())
+            plans = []
+            outcome = []
+
+            preview = ReplacePreview(SearchQuery("needle"), "pin",
+                                     {open_path: "hay\nneedle\n"}, workers=2)
+            preview.run(files, plans.append, lambda *args: outcome.append(args))
+
+            self.assertEqual(plans[0].path, open_path)
+            self.assertIsNone(plans[0].signature)
+            self.assertEqual(plans[0].hunks[0].first_line, 2)
+            self.assertEqual(len(plans), 11)
+            self.assertTrue(all(plan.matches_disk for plan in plans[1:]))
+            self.assertEqual(outcome, [(11, False, False)])
+
+    def test_stops_at_max_matches(self):
+        """Test planning stops and reports capped past max_matches replacements."""
+        with tempfile.TemporaryDirectory() as tmp:
+            files = []
+            for i in range(40):
+                path = Path(tmp) / f"f{i}.py"
+                path.write_text("needle needle\nneedle\n")
+                files.append(path)
+            plans = []
+            outcome = []
+
+            preview = ReplacePreview(SearchQuery("needle"), "pin", {}, workers=2, max_matches=10)
+            preview.run(files, plans.append, lambda *args: outcome.append(args))
+
+            self.assertEqual(outcome, [(len(plans), False, True)])
+            self.assertLess(len(plans), 10)
+            self.assertGreaterEqual(preview.total, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
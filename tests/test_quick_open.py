@@ -0,0 +1,99 @@
+"""Tests for the quick open path index."""
+import unittest
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from quick_open import PathIndex
+
+
+class TestPathIndex(unittest.TestCase):
+    """Test searching paths."""
+
+    def setUp(self):
+        self.index = PathIndex("/ws")
+        self.index.load(["src/editor.py", "src/tab_manager.py", "tests/test_editor.py",
+                         "docs/readme.md", "src/Search/index.ts"])
+
+    def relative(self, query, limit=50):
+        return [match.relative for match in self.index.search(query, limit)]
+
+    def test_search_ranks_and_filters(self):
+        """Test only subsequence matches are returned, best first."""
+        self.assertEqual(self.relative("edit"), ["src/editor.py", "tests/test_editor.py"])
+        self.assertEqual(self.relative("tm")[0], "src/tab_manager.py")
+        self.assertEqual(self.relative("zzz"), [])
+
+    def test_query_normalised(self):
+        """Test case, spaces and backslashes don't matter."""
+        self.assertEqual(self.relative("SRC\\Search IDX"), ["src/Search/index.ts"])
+
+    def test_match_paths_are_absolute(self):
+        """Test matches carry the absolute path and matched offsets."""
+        match = self.index.search("readme")[0]
+        self.assertEqual(match.path, os.path.join("/ws", "docs/readme.md"))
+        self.assertEqual(match.positions, list(range(5, 11)))
+
+    def test_empty_query_lists_files(self):
+        """Test an empty query returns files up to the limit."""
+        self.assertEqual(len(self.relative("", limit=3)), 3)
+
+    def test_large_index_is_fast(self):
+        """Test searching 100k paths stays within a keystroke budget."""
+        index = PathIndex("/ws")
+        index.load([f"pkg{i % 97}/module{i}/file_{i}.py" for i in range(100000)])
+        start = time.perf_counter()
+        for query in ("f", "fi", "fil", "file", "file_9", "file_99"):
+            index.search(query)
+        self.assertLess(time.perf_counter() - start, 2.0)
+
+
+class TestPathIndexChanges(unittest.TestCase):
+    """Test watcher batches update the index."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for name in ("a.py", "pkg/b.py", "pkg/c.py"):
+            (self.root / name).parent.mkdir(parents=True, exist_ok=True)
+            (self.root / name).write_text("")
+        self.index = PathIndex(self.root)
+        self.index.build()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build_walks_workspace(self):
+        """Test every file is indexed."""
+        self.assertEqual(sorted(m.relative for m in self.index.search("py")), ["a.py", "pkg/b.py", "pkg/c.py"])
+
+    def test_apply_changes(self):
+        """Test created files, new folders and deletions are applied."""
+        self.index.search("new")
+        (self.root / "new.py").write_text("")
+        (self.root / "lib").mkdir()
+        (self.root / "lib" / "new_lib.py").write_text("")
+        (self.root / "pkg" / "b.py").unlink()
+        (self.root / "pkg" / "c.py").unlink()
+        (self.root / "pkg").rmdir()
+        self.index.apply_changes({
+            str(self.root / "new.py"): "created",
+            str(self.root / "lib"): "created",
+            str(self.root / "pkg"): "deleted",
+        })
+        self.assertEqual(sorted(m.relative for m in self.index.search("py")), ["a.py", "lib/new_lib.py", "new.py"])
+        self.assertEqual(len(self.index), 3)
+
+    def test_ignore_file_change_rebuilds(self):
+        """Test editing .gitignore re-walks the workspace."""
+        (self.root / ".gitignore").write_text("pkg/\n")
+        self.index.apply_changes({str(self.root / ".gitignore"): "created"})
+        self.assertEqual(sorted(m.relative for m in self.index.search("py")), ["a.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
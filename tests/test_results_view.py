@@ -0,0 +1,88 @@
+"""Tests for the virtualised search results model."""
+import unittest
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from results_view import ResultModel, HEADER, MATCH, MAX_LINE_CHARS, context_lines
+
+
+class TestResultModel(unittest.TestCase):
+    """Test grouping, row lookup and collapsing."""
+
+    def setUp(self):
+        self.model = ResultModel()
+        self.model.add([(Path("a.py"), 1, "one"), (Path("a.py"), 5, "five"), (Path("b.py"), 2, "two")])
+
+    def rows(self):
+        return [self.model.row(i) for i in range(self.model.row_count)]
+
+    def test_rows_grouped_by_file(self):
+        """Test each file has a header followed by its matches."""
+        self.assertEqual(self.rows(), [
+            (HEADER, "a.py", 2, False),
+            (MATCH, "a.py", 1, "one"),
+            (MATCH, "a.py", 5, "five"),
+            (HEADER, "b.py", 1, False),
+            (MATCH, "b.py", 2, "two"),
+        ])
+        self.assertEqual(self.model.total, 3)
+
+    def test_streamed_results_join_their_file(self):
+        """Test later batches extend existing groups and shift later files."""
+        self.model.add([(Path("a.py"), 9, "nine"), (Path("c.py"), 1, "c")])
+        self.assertEqual(self.model.row(3), (MATCH, "a.py", 9, "nine"))
+        self.assertEqual(self.model.row(4), (HEADER, "b.py", 1, False))
+        self.assertEqual(self.model.row(6), (HEADER, "c.py", 1, False))
+        self.assertEqual(self.model.row_count, 8)
+
+    def test_collapse(self):
+        """Test a collapsed file shows only its header."""
+        self.model.toggle("a.py")
+        self.assertEqual(self.rows(), [
+            (HEADER, "a.py", 2, True),
+            (HEADER, "b.py", 1, False),
+            (MATCH, "b.py", 2, "two"),
+        ])
+        self.model.set_all_collapsed(True)
+        self.assertEqual(self.model.row_count, 2)
+        self.model.set_all_collapsed(False)
+        self.assertEqual(self.model.row_count, 5)
+
+    def test_long_lines_are_cut(self):
+        """Test stored lines are capped."""
+        self.model.add([("c.py", 1, "x" * 10000)])
+        self.assertEqual(len(self.model.row(6)[3]), MAX_LINE_CHARS)
+
+    def test_many_results(self):
+        """Test appending and random row access stay fast with 50k results."""
+        model = ResultModel()
+        start = time.perf_counter()
+        for batch in range(500):
+            model.add([(f"f{batch // 5}.py", i, "match") for i in range(100)])
+            model.row(model.row_count - 1)
+        for i in range(0, model.row_count, 97):
+            model.row(i)
+        self.assertEqual(model.row_count, 50000 + 100)
+        self.assertLess(time.perf_counter() - start, 2.0)
+
+
+class TestContextLines(unittest.TestCase):
+    """Test lines around a match are read on demand."""
+
+    def test_context_clipped_at_file_edges(self):
+        """Test context stops at the first and last lines."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "f.py")
+            Path(path).write_text("".join(f"line{i}\n" for i in range(1, 6)))
+            self.assertEqual(context_lines(path, 2, radius=2),
+                             [(1, "line1"), (2, "line2"), (3, "line3"), (4, "line4")])
+            self.assertEqual([n for n, _ in context_lines(path, 5, radius=2)], [3, 4, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for the project search result cache."""
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from search_cache import SearchCache, refines
+from search_engine import SearchQuery
+
+
+class TestRefines(unittest.TestCase):
+    """Test when a query can only match files an earlier one matched."""
+
+    def test_literal_containment(self):
+        """Test a longer literal with the same options refines a shorter one."""
+        self.assertTrue(refines(SearchQuery("foo"), SearchQuery("foobar")))
+        self.assertTrue(refines(SearchQuery("foo"), SearchQuery("FOO.bar")))
+        self.assertFalse(refines(SearchQuery("foo"), SearchQuery("fo")))
+        self.assertTrue(refines(SearchQuery("Foo", case_sensitive=True), SearchQuery("xFoo", case_sensitive=True)))
+        self.assertFalse(refines(SearchQuery("Foo", case_sensitive=True), SearchQuery("xfoo", case_sensitive=True)))
+
+    def test_options_must_match(self):
+        """Test different options, regexes and whole words never refine."""
+        self.assertFalse(refines(SearchQuery("foo"), SearchQuery("foobar", case_sensitive=True)))
+        self.assertFalse(refines(SearchQuery("a", regex=True), SearchQuery("a|b", regex=True)))
+        self.assertFalse(refines(SearchQuery("foo", whole_word=True), SearchQuery("foob", whole_word=True)))
+
+
+class TestSearchCache(unittest.TestCase):
+    """Test planning and storing searches."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.files = {}
+        for name, text in {"a.py": "foo = 1\nfoobar()\n", "b.py": "bar\n", "c.py": "foo\n"}.items():
+            self.files[name] = self.root / name
+            self.files[name].write_text(text)
+        self.cache = SearchCache(max_entries=4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def search(self, query):
+        """Plan, scan what's needed like ProjectSearchWindow, store; return (run, results)."""
+        run = self.cache.plan(self.root, query, self.files.values())
+        found = [result for path in run.scan for result in query.search_file(path)]
+        self.cache.store(self.root, query, run, found)
+        return run, sorted((Path(p).name, line) for p, line, _ in run.cached + found)
+
+    def touch(self, name, text):
+        self.files[name].write_text(text)
+        os.utime(self.files[name], ns=(1, 1))
+
+    def test_repeat_reads_only_changed_files(self):
+        """Test an identical query reuses unchanged files' matches."""
+        query = SearchQuery("foo")
+        first, results = self.search(query)
+        self.assertEqual((first.source, len(first.scan)), (None, 3))
+
+        self.touch("b.py", "foo again\n")
+        again, repeated = self.search(SearchQuery("foo"))
+        self.assertEqual(again.source, "exact")
+        self.assertEqual(again.scan, [str(self.files["b.py"])])
+        self.assertEqual(repeated, sorted(results + [("b.py", 1)]))
+
+    def test_refined_query_reads_previous_matches(self):
+        """Test a refined query reads only files that matched the broader one."""
+        self.search(SearchQuery("foo"))
+        run, results = self.search(SearchQuery("foobar"))
+        self.assertEqual(run.source, "refined")
+        self.assertEqual(sorted(run.scan), sorted(str(self.files[n]) for n in ("a.py", "c.py")))
+        self.assertEqual(results, [("a.py", 2)])
+
+    def test_refined_query_reads_changed_files(self):
+        """Test files changed since the broader query are read too."""
+        self.search(SearchQuery("foo"))
+        self.touch("b.py", "foobar\n")
+        run, results = self.search(SearchQuery("foobar"))
+        self.assertIn(str(self.files["b.py"]), run.scan)
+        self.assertEqual(results, [("a.py", 2), ("b.py", 1)])
+
+    def test_deleted_files_dropped(self):
+        """Test files that no longer exist are neither read nor reported."""
+        self.search(SearchQuery("foo"))
+        self.files["c.py"].unlink()
+        run, results = self.search(SearchQuery("foo"))
+        self.assertEqual(results, [("a.py", 1), ("a.py", 2)])
+
+    def test_eviction(self):
+        """Test the least recently used entries are evicted."""
+        for text in ("a", "b", "c", "d", "e"):
+            self.search(SearchQuery(text, regex=True))
+        self.assertIsNone(self.cache.plan(self.root, SearchQuery("a", regex=True), []).source)
+        self.assertEqual(self.cache.plan(self.root, SearchQuery("e", regex=True), []).source, "exact")
+
+    def test_workspaces_kept_apart(self):
+        """Test an entry is only used for its own workspace."""
+        self.search(SearchQuery("foo"))
+        with tempfile.TemporaryDirectory() as other:
+            self.assertIsNone(self.cache.plan(other, SearchQuery("foo"), []).source)
+
+
+if __name__ == "__main__":
+    unittest.main()
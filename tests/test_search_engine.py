@@ -0,0 +1,145 @@
+"""Tests for the search engine: literal, whole-word and regex queries."""
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from search_engine import SearchQuery, SearchError, required_literals
+
+
+class TestRequiredLiterals(unittest.TestCase):
+    """Test extraction of literals every regex match must contain."""
+
+    def test_literal_runs(self):
+        """Test runs are split by classes, repeats and alternations."""
+        self.assertEqual(required_literals(r"def \w+_handler\(")[0], ["def ", "_handler("])
+        self.assertEqual(required_literals(r"^import (os|sys)$")[0], ["import "])
+        self.assertEqual(required_literals(r"(?:abc)+x?")[0], ["abc"])
+
+    def test_optional_parts_are_skipped(self):
+        """Test parts that may be absent don't become required."""
+        self.assertEqual(required_literals(r"colou?r")[0], ["colo", "r"])
+        self.assertEqual(required_literals(r"(?:foo)*bar")[0], ["bar"])
+        self.assertEqual(required_literals(r"a|b")[0], [])
+
+    def test_inline_ignorecase(self):
+        """Test inline flags mark the literals as case-folded."""
+        self.assertFalse(required_literals("Foo")[1])
+        self.assertTrue(required_literals("(?i)Foo")[1])
+        self.assertTrue(required_literals("x(?i:Foo)")[1])
+
+
+class TestSearchQuery(unittest.TestCase):
+    """Test matching files and strings in each mode."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "sample.py"
+        self.path.write_text("import os\nvalue = os.path  # os os\n\nOSError\nosmium\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def lines(self, text, **options):
+        return [(n, line) for _, n, line in SearchQuery(text, **options).search_file(self.path, 100)]
+
+    def test_one_result_per_line(self):
+        """Test repeated matches on a line give one result with its line number."""
+        self.assertEqual(self.lines("os", case_sensitive=True)[:2],
+                         [(1, "import os"), (2, "value = os.path  # os os")])
+
+    def test_case_and_whole_word(self):
+        """Test case folding and word boundaries."""
+        self.assertEqual([n for n, _ in self.lines("os", whole_word=True)], [1, 2])
+        self.assertEqual([n for n, _ in self.lines("OSERROR")], [4])
+        self.assertEqual(self.lines("OSERROR", case_sensitive=True), [])
+
+    def test_regex(self):
+        """Test regex queries, anchors and whole-word wrapping."""
+        self.assertEqual(self.lines(r"^os\w+"), [])
+        self.assertEqual([n for n, _ in self.lines(r"os\.\w+", regex=True)], [2])
+        self.assertEqual([n for n, _ in self.lines(r"^os\w*$", regex=True)], [4, 5])
+        self.assertEqual([n for n, _ in self.lines(r"os|path", regex=True, whole_word=True)], [1, 2])
+
+    def test_regex_matches_across_lines(self):
+        """Test a match spanning lines is reported at its first line."""
+        self.assertEqual(self.lines(r"os\n\nOS", regex=True, case_sensitive=True),
+                         [(2, "value = os.path  # os os")])
+
+    def test_empty_matches_are_skipped(self):
+        """Test patterns that can match nothing don't report every line."""
+        self.assertEqual([n for n, _ in self.lines("z*", regex=True)], [])
+
+    def test_non_ascii_case_folding(self):
+        """Test non-ASCII case-insensitive queries match like str.lower()."""
+        self.path.write_text("Año nuevo\nañoso\n", encoding="utf-8")
+        self.assertEqual(self.lines("AÑO", whole_word=True), [(1, "Año nuevo")])
+        self.assertEqual(self.lines(r"^AÑ\w+$", regex=True), [(2, "añoso")])
+
+    def test_regex_escapes_for_non_ascii(self):
+        """Test ASCII patterns that spell non-ASCII characters search the decoded text."""
+        self.path.write_text("café\naéb\nab\n", encoding="utf-8")
+        self.assertEqual(self.lines(r"caf\xe9", regex=True), [(1, "café")])
+        self.assertEqual(self.lines(r"caf\u00e9", regex=True), [(1, "café")])
+        self.assertEqual(self.lines(r"CAF\u00C9", regex=True), [(1, "café")])
+
+    def test_regex_wildcards_match_whole_characters(self):
+        """Test `.`, \\w and negated sets treat a non-ASCII character as one."""
+        self.path.write_text("aéb\nab\n", encoding="utf-8")
+        self.assertEqual(self.lines("a.b", regex=True), [(1, "aéb")])
+        self.assertEqual(self.lines(r"^a\wb$", regex=True), [(1, "aéb")])
+        self.assertEqual(self.lines("a[^x]b", regex=True), [(1, "aéb")])
+        self.assertTrue(SearchQuery("a.b", regex=True).compiled.text_mode)
+        self.assertFalse(SearchQuery(r"^(foo|ba[rz])+$", regex=True).compiled.text_mode)
+
+    def test_word_boundaries_see_non_ascii_letters(self):
+        """Test \\b and whole-word matching treat é as a word character in files too."""
+        self.path.write_text("caféfoo bar\nfoo é\n", encoding="utf-8")
+        self.assertEqual(self.lines("foo", whole_word=True), [(2, "foo é")])
+        self.assertEqual(self.lines(r"\bfoo\b", regex=True), [(2, "foo é")])
+        self.assertEqual(self.lines(r"\Bfoo", regex=True), [(1, "caféfoo bar")])
+        query = SearchQuery("foo", whole_word=True)
+        self.assertEqual(query.search_text("caféfoo bar\nfoo é\n")[0][1], 2)
+        self.assertFalse(query.compiled.may_match(b"bar baz"))
+
+    def test_text_mode_prefilter_keeps_unicode_folds(self):
+        """Test the byte pre-check doesn't reject case-folded non-ASCII matches."""
+        self.path.write_text("\u212aey.x = 1\n", encoding="utf-8")
+        self.assertEqual(self.lines(r"key\.\w", regex=True), [(1, "\u212aey.x = 1")])
+        self.assertFalse(SearchQuery(r"foo\.\w", regex=True).compiled.may_match(b"bar.x"))
+
+    def test_invalid_regex(self):
+        """Test invalid patterns raise SearchError only in regex mode."""
+        with self.assertRaises(SearchError):
+            SearchQuery("def (", regex=True).validate()
+        SearchQuery("def (").validate()
+        for pattern in (r"caf\xe9(", r"\u00e", r"\N{NO SUCH NAME}"):
+            with self.assertRaises(SearchError):
+                SearchQuery(pattern, regex=True).validate()
+        self.assertEqual(self.lines("value = os.path  ("), [])
+
+    def test_index_literal(self):
+        """Test the index lookup uses the longest required literal."""
+        self.assertEqual(SearchQuery(r"def \w+_handler\(", regex=True).index_literal, "_handler(")
+        self.assertIsNone(SearchQuery(r"\w+", regex=True).index_literal)
+        self.assertFalse(SearchQuery("(?i)Foo", case_sensitive=True, regex=True).index_case_sensitive)
+
+    def test_search_text(self):
+        """Test searching an in-memory buffer."""
+        results = SearchQuery("b", whole_word=True).search_text("a b\nab\nb", path="buf.py")
+        self.assertEqual([(n, line) for _, n, line in results], [(1, "a b"), (3, "b")])
+        self.assertEqual(results[0][0], Path("buf.py"))
+
+    def test_empty_and_missing_files(self):
+        """Test files that can't be mapped are skipped."""
+        empty = Path(self.tmp.name) / "empty.py"
+        empty.write_text("")
+        self.assertEqual(SearchQuery("x").search_file(empty, 10), [])
+        self.assertEqual(SearchQuery("x").search_file(Path(self.tmp.name) / "missing.py", 10), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
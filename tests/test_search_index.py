@@ -0,0 +1,80 @@
+"""Tests for trigram search index."""
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from search_index import TrigramIndex, query_trigrams
+
+
+class TestTrigramIndex(unittest.TestCase):
+    """Test candidate filtering and incremental updates."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.write("app.py", "def handle_request(req):\n    return req\n")
+        self.write("lib/util.py", "def format_date(value):\n    pass\n")
+        self.write("node_modules/dep.js", "handle_request()\n")
+        self.index = TrigramIndex(self.root)
+        self.index.build()
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        return path
+
+    def names(self, files):
+        return [str(path.relative_to(self.root)) for path in files]
+
+    def test_candidates_narrowed(self):
+        """Test only files containing every query trigram are candidates."""
+        self.assertEqual(self.names(self.index.candidates("handle_request")), ["app.py"])
+        self.assertEqual(self.names(self.index.candidates("FORMAT_date")), ["lib/util.py"])
+        self.assertEqual(self.index.candidates("nothing here"), [])
+
+    def test_unnarrowable_queries(self):
+        """Test short and non-ASCII case-insensitive queries fall back to a scan."""
+        self.assertIsNone(query_trigrams("ab", False))
+        self.assertIsNone(self.index.candidates("ñandú", case_sensitive=False))
+        self.assertIsNotNone(query_trigrams("ñandú", True))
+
+    def test_update_and_remove(self):
+        """Test changed, new and deleted files are reflected without a rebuild."""
+        self.write("lib/util.py", "def handle_request():\n    pass\n")
+        self.write("new.py", "handle_request = None\n")
+        os.remove(self.root / "app.py")
+        os.utime(self.root / "lib/util.py", (1, 1))
+        self.index.refresh()
+
+        self.assertEqual(self.names(self.index.candidates("handle_request")), ["lib/util.py", "new.py"])
+        self.assertEqual(self.index.candidates("format_date"), [])
+
+    def test_persists_across_instances(self):
+        """Test a new instance loads the index from disk."""
+        self.index.close()
+        reopened = TrigramIndex(self.root)
+        try:
+            self.assertTrue(reopened.built)
+            self.assertEqual(self.names(reopened.candidates("format_date")), ["lib/util.py"])
+        finally:
+            reopened.close()
+
+    def test_binary_files_always_candidates(self):
+        """Test files that can't be indexed are never filtered out."""
+        self.write("blob.txt", "handle\0binary")
+        self.index.update_file(str(self.root / "blob.txt"))
+
+        self.assertIn("blob.txt", self.names(self.index.candidates("zzz_unrelated")))
+
+
+if __name__ == "__main__":
+    unittest.main()
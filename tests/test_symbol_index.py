@@ -0,0 +1,150 @@
+"""Tests for the workspace symbol index."""
+import unittest
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from symbol_index import SymbolIndex, extract_symbols, python_symbols
+
+
+class TestExtraction(unittest.TestCase):
+    """Test symbols found in source text."""
+
+    def test_python_definitions(self):
+        """Test top-level definitions and class methods, not nested functions."""
+        source = (
+            "import os\n"
+            "MAX, MIN = 1, 2\n"
+            "name: str = 'x'\n"
+            "class Editor:\n"
+            "    size = 3\n"
+            "    def open(self):\n"
+            "        def inner(): pass\n"
+            "async def main():\n"
+            "    local = 1\n"
+            "try:\n"
+            "    import fast\n"
+            "except ImportError:\n"
+            "    def fast(): pass\n"
+        )
+        self.assertEqual(python_symbols(source), [
+            ("MAX", "variable", 2, 0, ""),
+            ("MIN", "variable", 2, 5, ""),
+            ("name", "variable", 3, 0, ""),
+            ("Editor", "class", 4, 0, ""),
+            ("open", "method", 6, 4, "Editor"),
+            ("main", "function", 8, 0, ""),
+            ("fast", "function", 13, 4, ""),
+        ])
+
+    def test_python_syntax_error_uses_tokens(self):
+        """Test a file that doesn't parse still yields its def and class names."""
+        self.assertEqual(extract_symbols("a.py", "def broken(:\n    pass\nclass Ok: pass\n"),
+                         [("broken", "function", 1, 4, ""), ("Ok", "class", 3, 6, "")])
+
+    def test_other_languages(self):
+        """Test Pygments tokens and definition keywords in other languages."""
+        self.assertEqual([s[:3] for s in extract_symbols("a.js", "class Foo {}\nfunction bar(x) {}\n")],
+                         [("Foo", "class", 1), ("bar", "function", 2)])
+        go = "package main\ntype Server struct{}\nfunc (s *Server) Run() {}\n"
+        self.assertEqual([s[:3] for s in extract_symbols("a.go", go)],
+                         [("Server", "class", 2), ("Run", "function", 3)])
+        self.assertEqual(extract_symbols("notes.unknownext", "class Foo"), [])
+
+
+class TestSymbolIndex(unittest.TestCase):
+    """Test building, searching, persistence and incremental updates."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "ws"
+        self.root.mkdir()
+        self.index_dir = Path(self.tmp.name) / "index"
+        (self.root / "editor.py").write_text("class TabManager:\n    def new_tab(self): pass\n")
+        (self.root / "app.js").write_text("function renderTree() {}\n")
+        self.index = SymbolIndex(self.root, index_dir=self.index_dir)
+        self.index.refresh()
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def names(self, query, index=None):
+        return [match.symbol.name for match in (index or self.index).search(query)]
+
+    def test_search(self):
+        """Test fuzzy matching over symbol names."""
+        self.assertEqual(self.names("tm"), ["TabManager"])
+        self.assertEqual(self.names("rtree"), ["renderTree"])
+        symbol = self.index.search("newtab")[0].symbol
+        self.assertEqual((symbol.path, symbol.line, symbol.container),
+                         (str(self.root / "editor.py"), 2, "TabManager"))
+
+    def test_persisted_between_sessions(self):
+        """Test a new instance loads symbols without parsing."""
+        index = SymbolIndex(self.root, index_dir=self.index_dir)
+        try:
+            self.assertTrue(index.built)
+            self.assertEqual(self.names("tm", index), ["TabManager"])
+        finally:
+            index.close()
+
+    def test_refresh_parses_only_changed_files(self):
+        """Test unchanged files are skipped and changed or removed ones updated."""
+        (self.root / "editor.py").write_text("class Window:\n    pass\n")
+        (self.root / "app.js").unlink()
+        self.index.refresh()
+        self.assertEqual(self.names("tm"), [])
+        self.assertEqual(self.names("win"), ["Window"])
+        self.assertEqual(self.names("rtree"), [])
+
+    def test_apply_changes(self):
+        """Test watcher batches add, update and remove files."""
+        (self.root / "new.py").write_text("def load_config(): pass\n")
+        (self.root / "app.js").unlink()
+        self.index.apply_changes({str(self.root / "new.py"): "created",
+                                  str(self.root / "app.js"): "deleted"})
+        self.assertEqual(self.names("lconf"), ["load_config"])
+        self.assertEqual(self.names("rtree"), [])
+        self.assertEqual([s.name for s in self.index.lookup("load_config")], ["load_config"])
+
+    def test_apply_changes_during_refresh(self):
+        """Test removing a deleted directory while a refresh stores files."""
+        package = self.root / "pkg"
+        package.mkdir()
+        for i in range(200):
+            (package / f"mod{i}.py").write_text(f"def func{i}(): pass\n")
+        self.index.refresh()
+        for i in range(200):
+            (self.root / f"extra{i}.py").write_text(f"def extra{i}(): pass\n")
+        for path in package.iterdir():
+            path.unlink()
+        package.rmdir()
+        errors = []
+
+        def refresh():
+            try:
+                self.index.refresh()
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=refresh)
+        thread.start()
+        self.index.apply_changes({str(package): "deleted"})
+        thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.index.lookup("func1"), [])
+        self.assertEqual([s.name for s in self.index.lookup("extra1")], ["extra1"])
+
+    def test_symbols_in_file(self):
+        """Test a file's symbols are listed in order."""
+        self.assertEqual([s.name for s in self.index.symbols_in(self.root / "editor.py")],
+                         ["TabManager", "new_tab"])
+
+
+if __name__ == "__main__":
+    unittest.main()
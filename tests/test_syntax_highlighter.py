@@ -0,0 +1,69 @@
+"""Tests for syntax highlighter."""
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pygments.token import Token
+
+
+class RecordingText:
+    """Records tag calls instead of talking to Tk."""
+
+    def __init__(self):
+        self.calls = []
+
+    def tag_config(self, tag, **kwargs):
+        pass
+
+    def tag_add(self, tag, *indices):
+        self.calls.append(("add", tag, indices))
+
+    def tag_remove(self, tag, start, end=None):
+        self.calls.append(("remove", tag, (start, end)))
+
+
+class TestSyntaxHighlighter(unittest.TestCase):
+    """Test batched tag application."""
+
+    def setUp(self):
+        from syntax_highlighter import SyntaxHighlighter
+
+        self.text = RecordingText()
+        self.highlighter = SyntaxHighlighter(self.text)
+
+    def test_one_tag_add_per_tag(self):
+        """Test all ranges of a tag go out in a single call."""
+        tokens = [(Token.Keyword, "def"), (Token.Text, " "), (Token.Name.Function, "f"),
+                  (Token.Text, "\n"), (Token.Keyword, "return")]
+        self.highlighter.apply_tokens(tokens)
+
+        adds = [call for call in self.text.calls if call[0] == "add"]
+        self.assertEqual(len(adds), len({tag for _, tag, _ in adds}))
+        keyword = [indices for _, tag, indices in adds if tag == "Token.Keyword"][0]
+        self.assertEqual(keyword, ("1.0", "1.3", "2.0", "2.6"))
+
+    def test_adjacent_ranges_merged(self):
+        """Test consecutive tokens of the same tag become one range."""
+        tokens = [(Token.Keyword, "if"), (Token.Keyword, "not")]
+        self.highlighter.apply_tokens(tokens)
+
+        adds = [indices for kind, tag, indices in self.text.calls if kind == "add"]
+        self.assertEqual(adds, [("1.0", "1.5")])
+
+    def test_unknown_subtype_uses_parent_tag(self):
+        """Test token subtypes without a style fall back to their parent."""
+        self.assertEqual(self.highlighter.tag_for(Token.Keyword.Custom), "Token.Keyword")
+
+    def test_retag_removes_previous_tags(self):
+        """Test re-tagging a window clears only that window."""
+        self.highlighter.apply_tokens([(Token.Keyword, "def")])
+        self.text.calls = []
+        self.highlighter.apply_line_states(3, [(((0, 2, Token.Keyword),), True)])
+
+        self.assertIn(("remove", "Token.Keyword", ("3.0", "4.0")), self.text.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,6 +55,54 @@ class TestEditorTab(unittest.TestCase):
         tab.modified = True
         self.assertEqual(tab.get_title(), "*test.py")
 
+    def test_hibernate_roundtrip(self):
+        """Test hibernated tabs keep their content."""
+        from tab_manager import EditorTab
+        
+        tab = EditorTab("/path/to/test.py")
+        tab.content = "print('hi')\n" * 100
+        tab.hibernate()
+        self.assertTrue(tab.hibernated)
+        self.assertEqual(tab.content, "print('hi')\n" * 100)
+        self.assertLess(tab.memory_estimate(), 100)
+        
+        tab.thaw()
+        self.assertFalse(tab.hibernated)
+        self.assertEqual(tab.document.text(), "print('hi')\n" * 100)
+
+
+class TestSelectHibernation(unittest.TestCase):
+    """Test choosing tabs to hibernate under a memory cap."""
+    
+    def make_tab(self, size, last_active):
+        from tab_manager import EditorTab
+        
+        tab = EditorTab()
+        tab.content = "x" * size
+        tab.editor = object()
+        tab.last_active = last_active
+        return tab
+    
+    def test_under_cap_keeps_all(self):
+        """Test nothing hibernates while under the cap."""
+        from tab_manager import select_hibernation
+        
+        tabs = [self.make_tab(10, 0), self.make_tab(10, 0)]
+        self.assertEqual(select_hibernation(tabs, tabs[0], 10 ** 6, 0, 1000), [])
+    
+    def test_least_recent_first(self):
+        """Test least recently used idle tabs go first, current never."""
+        from tab_manager import select_hibernation, WIDGET_BYTES_PER_CHAR
+        
+        current = self.make_tab(100, 0)
+        oldest = self.make_tab(100, 10)
+        older = self.make_tab(100, 20)
+        recent = self.make_tab(100, 995)
+        tabs = [current, recent, older, oldest]
+        cap = 2 * 100 * WIDGET_BYTES_PER_CHAR
+        
+        self.assertEqual(select_hibernation(tabs, current, cap, 60, 1000), [oldest, older])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,83 @@
+"""Tests for persistent token cache."""
+import unittest
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pygments.lexers import PythonLexer, JavascriptLexer
+from incremental_highlighter import split_tokens_by_line, lex_tokens
+from token_cache import TokenCache, encode, decode
+
+
+SOURCE = "def main():\n    return 'hello'  # greet\n"
+
+
+class TestTokenCache(unittest.TestCase):
+    """Test content-addressed token caching."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+        self.lexer = PythonLexer(stripnl=False, ensurenl=False)
+        self.states = split_tokens_by_line(lex_tokens(self.lexer, SOURCE))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def wait_for_files(self, count):
+        deadline = time.time() + 2
+        while len(list(self.cache_dir.glob("*.json"))) < count and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_encode_roundtrip(self):
+        """Test states survive encoding."""
+        self.assertEqual(decode(encode(self.states)), self.states)
+
+    def test_key_depends_on_lexer(self):
+        """Test same content with another lexer gets another key."""
+        js = JavascriptLexer()
+        self.assertNotEqual(TokenCache.key(SOURCE, self.lexer), TokenCache.key(SOURCE, js))
+        self.assertNotEqual(TokenCache.key(SOURCE, self.lexer), TokenCache.key(SOURCE + " ", self.lexer))
+
+    def test_survives_restart(self):
+        """Test a new cache instance reads entries from disk."""
+        key = TokenCache.key(SOURCE, self.lexer)
+        TokenCache(self.cache_dir).put(key, self.states)
+        self.wait_for_files(1)
+
+        self.assertEqual(TokenCache(self.cache_dir).get(key), self.states)
+
+    def test_string_cache_dir(self):
+        """Test a cache directory given as a string works like a Path."""
+        key = TokenCache.key(SOURCE, self.lexer)
+        cache = TokenCache(str(self.cache_dir), memory_entries=0)
+        cache.put(key, self.states)
+        self.wait_for_files(1)
+
+        self.assertEqual(cache.get(key), self.states)
+
+    def test_partial_states_not_cached(self):
+        """Test states with unknown lines are rejected."""
+        cache = TokenCache(self.cache_dir)
+        cache.put("partial", self.states + [None])
+        self.assertIsNone(cache.get("partial"))
+
+    def test_lru_eviction(self):
+        """Test oldest entries are evicted when over budget."""
+        size = len(str(encode(self.states)))
+        cache = TokenCache(self.cache_dir, max_bytes=size * 2, memory_entries=0)
+        for i in range(4):
+            cache.put(f"key{i}", self.states)
+            self.wait_for_files(1)
+            time.sleep(0.05)
+
+        self.assertIsNone(cache.get("key0"))
+        self.assertIsNotNone(cache.get("key3"))
+
+
+if __name__ == "__main__":
+    unittest.main()
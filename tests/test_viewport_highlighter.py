@@ -0,0 +1,99 @@
+"""Tests for viewport-first highlighting."""
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pygments.lexers import PythonLexer
+from viewport_highlighter import ViewportHighlighter, TOKEN_BYTES
+
+
+class FakeText:
+    """Minimal stand-in for the Tk text widget."""
+
+    def __init__(self, text, first_visible=1, visible=40):
+        self.lines = text.split("\n")
+        self.first_visible = first_visible
+        self.visible = visible
+        self.tagged = set()
+
+    def get(self, start, end):
+        first = int(start.split(".")[0])
+        last = int(end.split(".")[0])
+        return "\n".join(self.lines[first - 1:last])
+
+    def index(self, index):
+        if index == "@0,0":
+            return f"{self.first_visible}.0"
+        return f"{self.first_visible + self.visible - 1}.0"
+
+    def winfo_height(self):
+        return 600
+
+    def after(self, ms, callback):
+        return "after#1"
+
+    def after_idle(self, callback):
+        return "after#2"
+
+    def after_cancel(self, after_id):
+        pass
+
+
+class FakeHighlighter:
+    """Records which lines were re-tagged."""
+
+    def __init__(self):
+        self.lexer = None
+        self.line_states = None
+        self.applied = []
+
+    def apply_line_states(self, first_line, states):
+        self.applied.append((first_line, len(states)))
+
+
+def make_source(lines):
+    return "\n".join(f"value_{i} = {i}" for i in range(lines))
+
+
+class TestViewportHighlighter(unittest.TestCase):
+    """Test viewport-first ordering and the memory budget."""
+
+    def make(self, lines=5000, first_visible=1, **kwargs):
+        self.text = FakeText(make_source(lines), first_visible)
+        self.highlighter = FakeHighlighter()
+        viewport = ViewportHighlighter(self.text, self.highlighter, chunk_lines=100, **kwargs)
+        viewport.start(PythonLexer(stripnl=False, ensurenl=False), lines)
+        return viewport
+
+    def test_visible_lines_highlighted_first(self):
+        """Test the viewport is tagged before any background chunk."""
+        self.make(first_visible=2001)
+        self.assertEqual(self.highlighter.applied[0], (2001, 40))
+
+    def test_chunks_ordered_by_distance(self):
+        """Test background chunks start next to the viewport."""
+        viewport = self.make(first_visible=2001)
+        order = []
+        while viewport.pending:
+            first, _ = viewport.visible_lines()
+            chunk = viewport._nearest_pending(first, first + 39)
+            order.append(chunk)
+            viewport._tick()
+        self.assertEqual(order[0], 20)
+        self.assertEqual(set(order[1:3]), {19, 21})
+        self.assertTrue(viewport.is_idle())
+
+    def test_budget_evicts_far_chunks(self):
+        """Test cached tokens stay within the per-file budget."""
+        viewport = self.make(budget_bytes=1000 * TOKEN_BYTES)
+        while viewport.pending:
+            viewport._tick()
+        self.assertLessEqual(viewport.cached_bytes, 1000 * TOKEN_BYTES)
+        self.assertIsNotNone(self.highlighter.line_states[0])
+        self.assertIsNone(self.highlighter.line_states[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
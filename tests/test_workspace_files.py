@@ -0,0 +1,143 @@
+"""Tests for the shared workspace file enumeration."""
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from workspace_files import WorkspaceFiles, is_binary_data, parse_ignore, match_rules
+
+
+class TestIgnoreRules(unittest.TestCase):
+    """Test .gitignore pattern semantics."""
+
+    def ignored(self, patterns, path, is_dir=False):
+        return match_rules(parse_ignore(patterns, "/ws"), "/ws/" + path, is_dir)
+
+    def test_unanchored_patterns_match_names_at_any_depth(self):
+        """Test a pattern without a slash matches the name anywhere."""
+        self.assertTrue(self.ignored("*.log", "a/b/debug.log"))
+        self.assertIsNone(self.ignored("*.log", "a/log.txt"))
+
+    def test_anchored_and_directory_patterns(self):
+        """Test leading or inner slashes anchor, trailing slashes mean directories."""
+        self.assertTrue(self.ignored("/build", "build", is_dir=True))
+        self.assertIsNone(self.ignored("/build", "src/build", is_dir=True))
+        self.assertTrue(self.ignored("docs/*.html", "docs/index.html"))
+        self.assertIsNone(self.ignored("docs/*.html", "docs/api/index.html"))
+        self.assertTrue(self.ignored("out/", "x/out", is_dir=True))
+        self.assertIsNone(self.ignored("out/", "x/out", is_dir=False))
+
+    def test_double_star_and_negation(self):
+        """Test ** spans directories and the last matching rule wins."""
+        self.assertTrue(self.ignored("**/gen/*.py", "gen/a.py"))
+        self.assertTrue(self.ignored("**/gen/*.py", "pkg/sub/gen/a.py"))
+        self.assertTrue(self.ignored("a/**/z", "a/b/c/z"))
+        self.assertFalse(self.ignored("*.log\n!keep.log", "keep.log"))
+        self.assertTrue(self.ignored("!keep.log\n*.log", "keep.log"))
+
+    def test_comments_and_escapes(self):
+        """Test comments are skipped and \\# matches a literal #."""
+        self.assertIsNone(self.ignored("# *.py", "a.py"))
+        self.assertTrue(self.ignored("\\#notes", "#notes"))
+
+
+class TestWorkspaceFiles(unittest.TestCase):
+    """Test walking, filtering and caching a workspace."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for name, content in {
+            ".gitignore": "*.log\nbuild/\n",
+            "main.py": "print(1)\n",
+            "notes": "plain text\n",
+            "debug.log": "log\n",
+            "image.dat": b"\x89PNG\0\0data",
+            "build/out.py": "x\n",
+            "node_modules/dep.js": "x\n",
+            "pkg/.ignore": "secret.py\n",
+            "pkg/mod.py": "y\n",
+            "pkg/secret.py": "z\n",
+            ".hidden/cfg.py": "h\n",
+        }.items():
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(content, bytes):
+                path.write_bytes(content)
+            else:
+                path.write_text(content)
+        self.files = WorkspaceFiles(self.root, include=[], exclude=["node_modules", ".git"],
+                                    use_ignore_files=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def names(self, paths):
+        return sorted(os.path.relpath(path, self.root).replace(os.sep, "/") for path in paths)
+
+    def test_walk_honours_ignore_files_and_excludes(self):
+        """Test .gitignore, nested .ignore and exclude globs are applied."""
+        self.assertEqual(self.names(entry.path for entry in self.files.walk()), [
+            ".gitignore", ".hidden/cfg.py", "image.dat", "main.py", "notes", "pkg/.ignore", "pkg/mod.py",
+        ])
+
+    def test_iter_files_skips_binary(self):
+        """Test binary files are sniffed out and extensionless text kept."""
+        found = self.names(path for path, _ in self.files.iter_files())
+        self.assertNotIn("image.dat", found)
+        self.assertIn("notes", found)
+
+    def test_include_globs(self):
+        """Test include globs restrict files but not folders."""
+        files = WorkspaceFiles(self.root, include=["*.py"], exclude=[], use_ignore_files=False)
+        self.assertEqual(self.names(entry.path for entry in files.walk()), [
+            ".hidden/cfg.py", "build/out.py", "main.py", "pkg/mod.py", "pkg/secret.py",
+        ])
+
+    def test_list_dir_order_and_hidden(self):
+        """Test folders come first and hidden entries can be left out."""
+        entries = self.files.list_dir(self.root, hidden=False)
+        self.assertEqual([(entry.name, entry.is_dir) for entry in entries], [
+            ("pkg", True), ("image.dat", False), ("main.py", False), ("notes", False),
+        ])
+
+    def test_listing_cached_until_directory_changes(self):
+        """Test a listing is reused until the directory's mtime changes."""
+        first = self.files.list_dir(self.root / "pkg")
+        self.assertIs(self.files.list_dir(self.root / "pkg"), first)
+
+        (self.root / "pkg" / "new.py").write_text("")
+        os.utime(self.root / "pkg", ns=(1, 1))
+        self.assertIn("new.py", [entry.name for entry in self.files.list_dir(self.root / "pkg")])
+
+    def test_ignore_file_changes_apply(self):
+        """Test editing an ignore file changes the listing."""
+        (self.root / "pkg" / ".ignore").write_text("mod.py\n")
+        names = [entry.name for entry in self.files.list_dir(self.root / "pkg")]
+        self.assertIn("secret.py", names)
+        self.assertNotIn("mod.py", names)
+
+    def test_is_ignored(self):
+        """Test single paths, including paths inside ignored folders."""
+        self.assertTrue(self.files.is_ignored(self.root / "build" / "out.py"))
+        self.assertTrue(self.files.is_ignored(self.root / "node_modules" / "x" / "y.js", False))
+        self.assertTrue(self.files.is_ignored(self.root / "pkg" / "secret.py"))
+        self.assertFalse(self.files.is_ignored(self.root / "pkg" / "mod.py"))
+
+
+class TestBinarySniffing(unittest.TestCase):
+    """Test the binary heuristic."""
+
+    def test_is_binary_data(self):
+        """Test NUL bytes or many control characters mean binary."""
+        self.assertTrue(is_binary_data(b"abc\0def"))
+        self.assertTrue(is_binary_data(bytes(range(1, 32)) * 4))
+        self.assertFalse(is_binary_data("tab\tand ñ\r\n".encode("utf-8")))
+        self.assertFalse(is_binary_data(b""))
+
+
+if __name__ == "__main__":
+    unittest.main()
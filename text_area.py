@@ -1,9 +1,21 @@
+import re
 import customtkinter
 import tkinter
-import jedi
 from syntax_highlighter import SyntaxHighlighter
 from completion_popup import CompletionPopup
 from async_highlighter import AsyncHighlighter
+from incremental_highlighter import IncrementalHighlighter
+from document import Document
+from logger import logger
+from completion_worker import CompletionWorker, DetailWorker
+from completion_cache import CompletionCache
+
+# Keys that don't change the text or leave the word being completed
+NAVIGATION_KEYS = ("Up", "Down", "Prior", "Next", "Return", "Escape", "Control_L", "Control_R",
+                   "Shift_L", "Shift_R", "Alt_L", "Alt_R")
+
+_WORD = re.compile(r"\w*")
+_WORD_END = re.compile(r"\w*$")
 
 
 class CodeEditor(customtkinter.CTkTextbox):
@@ -13,6 +25,11 @@ class CodeEditor(customtkinter.CTkTextbox):
         self.line_numbers = None
         self.highlighter = SyntaxHighlighter(self)
         self.async_highlighter = AsyncHighlighter(delay_ms=300)
+        self.incremental_highlighter = IncrementalHighlighter(self, self.highlighter)
+        self.document = Document()
+        self.edit_listeners = [self._sync_document, self.incremental_highlighter.on_edit]
+        self.edit_version = 0
+        self._install_edit_proxy()
         self.bind("<<Modified>>", self.on_text_changed)
         self.bind("<KeyRelease>", self.on_key_release)
         self.bind("<Control-space>", lambda event: self.get_completions())
@@ -20,13 +37,112 @@ class CodeEditor(customtkinter.CTkTextbox):
         self.bind("<Down>", self.handle_popup_key_event)
         self.bind("<Return>", self.handle_popup_key_event)
         self.bind("<Escape>", self.handle_popup_key_event)
+        self.bind("<Prior>", self.handle_popup_key_event)
+        self.bind("<Next>", self.handle_popup_key_event)
         self.file_path = None
         self.completion_popup = None
+        self.completion_worker = CompletionWorker()
+        self.completion_cache = CompletionCache()
+        self.detail_worker = DetailWorker()
+        self.edit_listeners.append(self._track_completion_edit)
+
+    def _install_edit_proxy(self):
+        """Route the Tk text command through Python so edits can be observed."""
+        widget = self._textbox._w
+        self._orig_command = widget + "_orig"
+        self.tk.call("rename", widget, self._orig_command)
+        self.tk.createcommand(widget, self._edit_proxy)
+
+    def _edit_proxy(self, command, *args):
+        edits = []
+        if command in ("insert", "delete", "replace") and args:
+            try:
+                edits = self._describe_edit(command, args)
+            except (tkinter.TclError, IndexError):
+                edits = []
+
+        result = self.tk.call((self._orig_command, command) + args)
+
+        if edits:
+            self.edit_version += 1
+            for start, end, text in edits:
+                for listener in self.edit_listeners:
+                    try:
+                        listener(start, end, text)
+                    except Exception:
+                        pass
+        return result
+
+    def _describe_edit(self, command, args):
+        """Return (start, end, text) replacements for an edit before it runs."""
+        def call(*call_args):
+            return self.tk.call((self._orig_command,) + call_args)
+
+        last = str(call("index", "end-1c"))
+
+        def clamp(index):
+            index = str(call("index", index))
+            return last if self.tk.getboolean(call("compare", index, ">", last)) else index
+
+        if command == "insert":
+            start = clamp(args[0])
+            return [(start, start, "".join(str(chars) for chars in args[1::2]))]
+
+        if command == "replace":
+            return [(clamp(args[0]), clamp(args[1]), "".join(str(chars) for chars in args[2::2]))]
+
+        if len(args) == 1:
+            start = clamp(args[0])
+            end = clamp(f"{start}+1c")
+            ranges = [(start, end)]
+        else:
+            ranges = [(clamp(args[i]), clamp(args[i + 1])) for i in range(0, len(args) - 1, 2)]
+
+        edits = []
+        # Report later ranges first so earlier indices stay valid
+        for start, end in sorted(ranges, key=lambda r: tuple(map(int, r[0].split("."))), reverse=True):
+            if self.tk.getboolean(call("compare", start, "<", end)):
+                edits.append((start, end, ""))
+        return edits
+
+    def _sync_document(self, start, end, text):
+        if self.document is not None:
+            self.document.apply_edit(start, end, text)
+
+    def set_document(self, document):
+        """Attach the document that mirrors this widget; None to detach."""
+        self.document = document
+
+    def snapshot(self):
+        """Return a snapshot of the document shown in the widget."""
+        if self.document is None:
+            self.document = Document(self.get("1.0", "end-1c"))
+            return self.document.snapshot()
+
+        snapshot = self.document.snapshot()
+        try:
+            chars = int(self.tk.call(self._orig_command, "count", "-chars", "1.0", "end-1c") or 0)
+        except (tkinter.TclError, ValueError):
+            return snapshot
+
+        if chars != len(snapshot):
+            logger.warning("Document out of sync with editor widget, resyncing")
+            self.document.set_text(self.get("1.0", "end-1c"))
+            snapshot = self.document.snapshot()
+        return snapshot
+
+    def get_text(self):
+        """Return the whole buffer, built at most once per document version."""
+        return self.snapshot().text()
 
     def handle_popup_key_event(self, event):
         try:
-            if self.completion_popup and self.completion_popup.winfo_exists():
+            if self.completion_popup and self.completion_popup.winfo_exists() and self.completion_popup.visible:
                 self.completion_popup.handle_key_event(event)
+                if event.keysym in ("Return", "Escape"):
+                    # Accepted or dismissed, typing on must not reopen it
+                    self.completion_worker.cancel()
+                    self.completion_cache.clear()
                 return "break"
         except tkinter.TclError:
             self.completion_popup = None
@@ -34,22 +150,13 @@ class CodeEditor(customtkinter.CTkTextbox):
 
     def on_key_release(self, event):
         try:
-            if self.completion_popup and self.completion_popup.winfo_exists():
-                if event.keysym not in ["Up", "Down", "Return", "Escape",
-                                        "Control_L", "Control_R", "Shift_L", "Shift_R",
-                                        "Alt_L", "Alt_R", "period"]:
-                    try:
-                        self.completion_popup.hide()
-                        self.completion_popup.destroy()
-                    except tkinter.TclError:
-                        pass
-                    finally:
-                        self.completion_popup = None
-
             if event.keysym == 'period':
                 self.get_completions()
             elif event.keysym == 'space' and event.state & 0x4:
-                self.get_completions()
+                pass  # Control-space is bound on press
+            elif event.keysym not in NAVIGATION_KEYS:
+                # Typing inside the word re-filters the cached set, anything else closes it
+                self._refresh_completions()
         except Exception:
             pass
 
@@ -62,58 +169,148 @@ class CodeEditor(customtkinter.CTkTextbox):
                 self.line_numbers.redraw()
 
             if self.edit_modified():
-                self.highlight_text_async()
+                if not self.incremental_highlighter.has_baseline:
+                    self.highlight_text_async()
                 self.edit_modified(False)
         except tkinter.TclError:
             pass
 
     def highlight_text(self, *args):
+        self.async_highlighter.cancel()
+        self.incremental_highlighter.cancel()
         if self.file_path:
             self.highlighter.highlight(self.file_path)
+        else:
+            self.highlighter.reset()
     
     def highlight_text_async(self):
         """Async highlighting with debouncing."""
         if not self.file_path:
             return
         
-        text = self.get("1.0", "end-1c")
+        text = self.get_text()
+        version = self.edit_version
         self.async_highlighter.highlight_async(
             text,
             self.file_path,
-            self._apply_highlighting
+            lambda tokens, generation: self._apply_highlighting(tokens, generation, version)
         )
     
-    def _apply_highlighting(self, tokens):
+    def _apply_highlighting(self, tokens, generation, version):
         """Apply highlighting tokens in main thread."""
-        self.after(0, lambda: self.highlighter.apply_tokens(tokens))
+        def apply():
+            # Tokens lexed from an older buffer would misalign the line cache
+            if not self.async_highlighter.accept(generation, version == self.edit_version):
+                return
+            self.incremental_highlighter.cancel()
+            self.highlighter.apply_tokens(tokens, self.file_path)
+        try:
+            self.after(0, apply)
+        except (tkinter.TclError, RuntimeError):
+            pass
 
     def get_completions(self):
+        """Show completions for the word at the cursor.
+
+        Completions are computed at the start of the word, in the
+        background, and cached there; the popup shows them filtered by
+        what was typed since. A set already cached for this word is
+        reused without asking Jedi again.
+        """
+        try:
+            cursor = self.index(customtkinter.INSERT)
+            line, col = map(int, cursor.split('.'))
+            prefix = _WORD_END.search(self.get(f"{line}.0", cursor)).group()
+        except (tkinter.TclError, ValueError, AttributeError):
+            return None
+        trigger = (line, col - len(prefix))
+        if self.completion_cache.covers(trigger, self.edit_version):
+            self._refresh_completions()
+            return None
+
+        self.close_completions()
+        self.completion_cache.start(trigger, self.edit_version)
+
+        def deliver(chunk, generation, done):
+            # Worker thread: hand over to Tk
+            try:
+                self.after(0, lambda: self._show_completions(chunk, generation, trigger))
+            except (tkinter.TclError, RuntimeError):
+                pass
+
+        return self.completion_worker.request(self.get_text(), line, trigger[1], self.file_path, deliver,
+                                              self.edit_version)
+
+    def _show_completions(self, chunk, generation, trigger):
+        """Cache a chunk of results unless they were superseded or the word was left."""
+        if not self.completion_worker.is_current(generation) or self.completion_cache.trigger != trigger:
+            return
+        self.completion_cache.add(chunk)
+        self._refresh_completions()
+
+    def _completion_prefix(self):
+        """Text typed after the cached trigger, None if the cursor left that word."""
+        cache = self.completion_cache
+        if cache.trigger is None or cache.version != self.edit_version:
+            return None
+        line, column = cache.trigger
+        cursor = self.index(customtkinter.INSERT)
+        cursor_line, cursor_column = map(int, cursor.split('.'))
+        if cursor_line != line or cursor_column < column:
+            return None
+        prefix = self.get(f"{line}.{column}", cursor)
+        return prefix if _WORD.fullmatch(prefix) else None
+
+    def _refresh_completions(self):
+        """Filter the cached set by the typed prefix and update the popup in place."""
         try:
-            code = self.get("1.0", "end-1c")
-            cursor_pos = self.index(customtkinter.INSERT)
-            line, col = map(int, cursor_pos.split('.'))
-
-            script = jedi.Script(code)
-            completions = script.complete(line=line, column=col)
-
-            if self.completion_popup:
-                try:
-                    self.completion_popup.hide()
-                    self.completion_popup.destroy()
-                except tkinter.TclError:
-                    pass
-                finally:
-                    self.completion_popup = None
-
-            if completions:
-                self.completion_popup = CompletionPopup(self.master, self, completions)
+            prefix = self._completion_prefix()
+        except (tkinter.TclError, ValueError):
+            prefix = None
+        if prefix is None:
+            self.completion_worker.cancel()
+            self.completion_cache.clear()
+            self.close_completions()
+            return
+
+        matches = self.completion_cache.filter(prefix)
+        try:
+            if self.completion_popup and self.completion_popup.winfo_exists():
+                self.completion_popup.set_completions(matches)
+            elif matches:
+                line, column = self.completion_cache.trigger
+                self.completion_popup = CompletionPopup(self.master, self, matches, word_start=f"{line}.{column}",
+                                                        fetch_detail=self._fetch_detail)
                 self.completion_popup.show()
+        except tkinter.TclError:
+            self.completion_popup = None
 
-            return completions
-        except (tkinter.TclError, ValueError, AttributeError):
-            return []
-        except Exception:
-            return []
+    def _fetch_detail(self, completion, callback):
+        self.detail_worker.request(completion, self.file_path, callback)
+
+    def _track_completion_edit(self, start, end, text):
+        self.completion_cache.on_edit(start, end, text, self.edit_version)
+
+    def close_completions(self):
+        if self.completion_popup:
+            try:
+                self.completion_popup.hide()
+                self.completion_popup.destroy()
+            except tkinter.TclError:
+                pass
+            finally:
+                self.completion_popup = None
+
+    def destroy(self):
+        self.async_highlighter.shutdown()
+        self.completion_worker.shutdown()
+        self.detail_worker.shutdown()
+        self.incremental_highlighter.cancel()
+        try:
+            self.tk.deletecommand(self._textbox._w)
+        except tkinter.TclError:
+            pass
+        super().destroy()
 
     def yview(self, *args):
         try:
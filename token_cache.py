@@ -0,0 +1,179 @@
+"""Persistent, content-addressed cache of lexed token streams."""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pygments
+from pygments.token import string_to_tokentype
+
+from config import config
+from logger import logger
+
+FORMAT_VERSION = 1
+
+
+class TokenCache:
+    """Token states keyed by content hash, lexer and Pygments version.
+
+    Entries live in memory (a small LRU for tab switching) and on disk under
+    ~/.nanoeditor/cache/tokens, where the total size is bounded by evicting
+    the least recently used files.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = 64 * 1024 * 1024,
+                 memory_entries: int = 16) -> None:
+        self.cache_dir: Path = Path(cache_dir) if cache_dir else Path.home() / '.nanoeditor' / 'cache' / 'tokens'
+        self.max_bytes: int = max_bytes
+        self.memory_entries: int = memory_entries
+        self._memory: "OrderedDict[str, list]" = OrderedDict()
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, lexer) -> str:
+        """Return the cache key for text lexed with lexer."""
+        digest = hashlib.sha256()
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        digest.update(f"\0{type(lexer).__name__}\0{pygments.__version__}\0{FORMAT_VERSION}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[list]:
+        """Return cached line states, or None on a miss."""
+        with self._lock:
+            states = self._memory.get(key)
+            if states is not None:
+                self._memory.move_to_end(key)
+                return list(states)
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                states = decode(json.load(f))
+            os.utime(path)  # Mark as recently used for LRU eviction
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Discarding token cache entry {key}: {e}")
+            self._remove(path)
+            return None
+
+        self._remember(key, states)
+        return list(states)
+
+    def put(self, key: str, states: list) -> None:
+        """Store line states in memory and write them to disk in the background."""
+        if not states or any(state is None for state in states):
+            return
+
+        states = list(states)
+        self._remember(key, states)
+        threading.Thread(target=self._write, args=(key, states), daemon=True).start()
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = None
+        for path in self._entries():
+            self._remove(path)
+
+    def _remember(self, key: str, states: list) -> None:
+        with self._lock:
+            self._memory[key] = states
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _entries(self) -> List[Path]:
+        try:
+            return [Path(entry.path) for entry in os.scandir(self.cache_dir)
+                    if entry.name.endswith('.json')]
+        except OSError:
+            return []
+
+    def _remove(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def _write(self, key: str, states: list) -> None:
+        path = self._path(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                os.utime(path)
+                return
+
+            data = json.dumps(encode(states), separators=(',', ':'))
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Cannot write token cache entry: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache fits its budget."""
+        with self._lock:
+            if self._disk_bytes is not None and self._disk_bytes <= self.max_bytes:
+                return
+
+            entries = []
+            for path in self._entries():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+            self._disk_bytes = total
+
+
+def encode(states: list) -> Dict:
+    """Encode line states as compact JSON-friendly data."""
+    types: Dict = {}
+    lines = []
+    for tokens, stable in states:
+        line = [1 if stable else 0]
+        for start, end, ttype in tokens:
+            index = types.setdefault(ttype, len(types))
+            line.extend((start, end, index))
+        lines.append(line)
+    return {"v": FORMAT_VERSION, "types": [str(t) for t in types], "lines": lines}
+
+
+def decode(data: Dict) -> list:
+    """Rebuild line states from encode() output."""
+    if data["v"] != FORMAT_VERSION:
+        raise ValueError("Unsupported token cache format")
+
+    types = [string_to_tokentype(name) for name in data["types"]]
+    states = []
+    for line in data["lines"]:
+        tokens = tuple((line[i], line[i + 1], types[line[i + 2]]) for i in range(1, len(line), 3))
+        states.append((tokens, bool(line[0])))
+    return states
+
+
+# Global token cache instance
+token_cache = TokenCache(max_bytes=config.get_int('SYNTAX_DISK_CACHE_MB', 64) * 1024 * 1024)
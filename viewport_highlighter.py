@@ -0,0 +1,186 @@
+"""Viewport-first highlighting for files too large to lex in one pass."""
+import tkinter
+from typing import Dict, Set, Tuple
+
+from incremental_highlighter import find_restart_line, lex_tokens, split_tokens_by_line
+
+# Rough memory cost of one cached (start_col, end_col, token_type) tuple
+TOKEN_BYTES = 100
+
+
+class ViewportHighlighter:
+    """Highlight the visible lines first, then the rest of the file in idle chunks.
+
+    Chunks are lexed in order of their distance from the viewport. Cached
+    tokens are kept within a per-file memory budget; when it is exceeded the
+    chunks farthest from the viewport drop their tokens but keep their tags.
+    """
+
+    def __init__(self, text_widget, highlighter, chunk_lines: int = 500,
+                 budget_bytes: int = 32 * 1024 * 1024, lookback: int = 200,
+                 idle_ms: int = 10) -> None:
+        self.text_widget = text_widget
+        self.highlighter = highlighter
+        self.chunk_lines: int = chunk_lines
+        self.budget_bytes: int = budget_bytes
+        self.lookback: int = lookback
+        self.idle_ms: int = idle_ms
+        self.active: bool = False
+        self.pending: Set[int] = set()
+        self.chunk_tokens: Dict[int, int] = {}
+        self._after_id = None
+
+    def start(self, lexer, line_count: int) -> None:
+        """Begin viewport-first highlighting of the whole widget."""
+        self.stop()
+        self.highlighter.lexer = lexer
+        self.highlighter.line_states = [None] * line_count
+        self.active = True
+        self.pending = set(range(self._chunk_of(line_count) + 1))
+        self.highlight_visible()
+        self.schedule()
+
+    def stop(self) -> None:
+        """Stop background filling and forget the cached token accounting."""
+        self._cancel()
+        self.active = False
+        self.pending = set()
+        self.chunk_tokens = {}
+
+    def requeue(self, line: int) -> None:
+        """Lex the chunk containing line again, e.g. after an edit reached it."""
+        if not self.active:
+            return
+        self.pending.add(self._chunk_of(line))
+        self.schedule()
+
+    def visible_lines(self) -> Tuple[int, int]:
+        """Return the first and last line shown in the widget."""
+        first = self.text_widget.index("@0,0")
+        last = self.text_widget.index(f"@0,{self.text_widget.winfo_height()}")
+        return int(first.split(".")[0]), int(last.split(".")[0])
+
+    def highlight_visible(self) -> None:
+        """Lex and tag the lines currently on screen."""
+        try:
+            first, last = self.visible_lines()
+            self.highlight_range(first, last)
+        except tkinter.TclError:
+            pass
+
+    def highlight_range(self, first: int, last: int) -> None:
+        """Lex lines first..last, warming up on the preceding context."""
+        cache = self.highlighter.line_states
+        if cache is None or self.highlighter.lexer is None:
+            return
+
+        last = min(last, len(cache))
+        if first > last:
+            return
+
+        start = find_restart_line(cache, first, self.lookback)
+        text = self.text_widget.get(f"{start}.0", f"{last}.end")
+        # Warm-up lines only provide context, keep whatever they had cached
+        states = split_tokens_by_line(lex_tokens(self.highlighter.lexer, text))[first - start:]
+        cache[first - 1:first - 1 + len(states)] = states
+        self.highlighter.apply_line_states(first, states)
+
+        for chunk in range(self._chunk_of(first), self._chunk_of(last) + 1):
+            self._count_chunk(chunk)
+        self._enforce_budget()
+
+    def schedule(self) -> None:
+        """Lex the next chunk once the UI is idle."""
+        if self._after_id is None and self.active and self.pending:
+            try:
+                self._after_id = self.text_widget.after(self.idle_ms, self._on_timer)
+            except tkinter.TclError:
+                self._after_id = None
+
+    def _on_timer(self) -> None:
+        try:
+            self._after_id = self.text_widget.after_idle(self._tick)
+        except tkinter.TclError:
+            self._after_id = None
+
+    def _tick(self) -> None:
+        self._after_id = None
+        if not self.active or not self.pending:
+            return
+
+        try:
+            first, last = self.visible_lines()
+        except tkinter.TclError:
+            return
+
+        chunk = self._nearest_pending(first, last)
+        self.pending.discard(chunk)
+        chunk_first = chunk * self.chunk_lines + 1
+        try:
+            self.highlight_range(chunk_first, chunk_first + self.chunk_lines - 1)
+        except tkinter.TclError:
+            return
+        self.schedule()
+
+    def _cancel(self) -> None:
+        if self._after_id is not None:
+            try:
+                self.text_widget.after_cancel(self._after_id)
+            except tkinter.TclError:
+                pass
+            self._after_id = None
+
+    def _chunk_of(self, line: int) -> int:
+        return (line - 1) // self.chunk_lines
+
+    def _nearest_pending(self, first: int, last: int) -> int:
+        low, high = self._chunk_of(first), self._chunk_of(last)
+
+        def distance(chunk: int) -> int:
+            if chunk < low:
+                return low - chunk
+            return max(0, chunk - high)
+
+        return min(self.pending, key=lambda chunk: (distance(chunk), chunk))
+
+    def _count_chunk(self, chunk: int) -> None:
+        cache = self.highlighter.line_states
+        lines = cache[chunk * self.chunk_lines:(chunk + 1) * self.chunk_lines]
+        count = sum(len(state[0]) for state in lines if state is not None)
+        if count:
+            self.chunk_tokens[chunk] = count
+        else:
+            self.chunk_tokens.pop(chunk, None)
+
+    def _enforce_budget(self) -> None:
+        """Evict cached tokens of the chunks farthest from the viewport."""
+        total = sum(self.chunk_tokens.values()) * TOKEN_BYTES
+        if total <= self.budget_bytes:
+            return
+
+        try:
+            first, last = self.visible_lines()
+        except tkinter.TclError:
+            return
+        visible = set(range(self._chunk_of(first), self._chunk_of(last) + 1))
+        center = (first + last) // 2
+
+        cache = self.highlighter.line_states
+        for chunk in sorted(self.chunk_tokens, key=lambda c: abs(c * self.chunk_lines - center), reverse=True):
+            if total <= self.budget_bytes:
+                break
+            if chunk in visible:
+                continue
+            total -= self.chunk_tokens.pop(chunk) * TOKEN_BYTES
+            start = chunk * self.chunk_lines
+            end = min(len(cache), start + self.chunk_lines)
+            cache[start:end] = [None] * (end - start)
+
+    @property
+    def cached_bytes(self) -> int:
+        """Estimated memory held by cached tokens."""
+        return sum(self.chunk_tokens.values()) * TOKEN_BYTES
+
+    def is_idle(self) -> bool:
+        """True when no chunks are left to highlight."""
+        return not self.pending
@@ -0,0 +1,364 @@
+"""Shared workspace file enumeration: ignore rules, globs and binary sniffing.
+
+The file tree, project search, the trigram index and the file watcher
+all list the workspace through one WorkspaceFiles per root, so they agree
+on what is part of the workspace and share its directory listing cache.
+"""
+import fnmatch
+import os
+import re
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import config
+
+# Excluded unless FILES_EXCLUDE says otherwise
+DEFAULT_EXCLUDE = ('.git', '__pycache__', 'node_modules', 'venv', 'env', '.nanoeditor')
+
+# Ignore files read in every directory, later ones taking precedence
+IGNORE_FILES = ('.gitignore', '.ignore')
+
+# Extensions decided without reading the file
+TEXT_EXTENSIONS = {'.py', '.js', '.ts', '.java', '.cpp', '.c', '.h', '.go', '.rs', '.rb',
+                   '.php', '.html', '.css', '.txt', '.md', '.json', '.xml', '.yml', '.yaml',
+                   '.toml', '.cfg', '.ini', '.sh', '.sql', '.jsx', '.tsx'}
+BINARY_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.ico', '.bmp', '.webp', '.pdf', '.zip',
+                     '.gz', '.tar', '.bz2', '.xz', '.7z', '.jar', '.pyc', '.pyo', '.so', '.o',
+                     '.a', '.dll', '.exe', '.dylib', '.class', '.woff', '.woff2', '.ttf',
+                     '.otf', '.mp3', '.mp4', '.wav', '.db', '.sqlite', '.bin'}
+
+SNIFF_BYTES = 8192
+# Bytes that don't occur in text, besides NUL (which always means binary)
+_CONTROL = bytes(set(range(32)) - {7, 8, 9, 10, 12, 13, 27})
+
+
+class FileEntry(NamedTuple):
+    name: str
+    path: str
+    is_dir: bool
+
+
+def is_binary_data(data: bytes) -> bool:
+    """Guess from a file's first bytes: NUL, or mostly control characters."""
+    if not data:
+        return False
+    if b'\0' in data:
+        return True
+    return len(data) - len(data.translate(None, _CONTROL)) > len(data) * 0.3
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob to a regex over '/'-separated paths."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class IgnoreRule(NamedTuple):
+    base: str       # Directory the rule's file is in
+    regex: "re.Pattern"
+    anchored: bool  # Matches the path relative to base, not just the name
+    dir_only: bool
+    negated: bool
+
+
+def parse_ignore(text: str, base: str) -> List[IgnoreRule]:
+    """Parse .gitignore syntax into rules relative to base."""
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        line = line.lstrip('/')
+        rules.append(IgnoreRule(base, re.compile(_translate(line) + r'\Z', re.DOTALL),
+                                anchored, dir_only, negated))
+    return rules
+
+
+def match_rules(rules, path: str, is_dir: bool) -> Optional[bool]:
+    """True if ignored, False if re-included, None if no rule matches. Last match wins."""
+    name = os.path.basename(path)
+    for rule in reversed(rules):
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.anchored:
+            subject = _relative(path, rule.base)
+            if subject is None:
+                continue
+        else:
+            subject = name
+        if rule.regex.match(subject):
+            return not rule.negated
+    return None
+
+
+def _relative(path: str, base: str) -> Optional[str]:
+    """path relative to base with '/' separators, None if it is not below base."""
+    if not path.startswith(base) or path[len(base):len(base) + 1] != os.sep:
+        return None
+    relative = path[len(base) + 1:]
+    return relative if os.sep == '/' else relative.replace(os.sep, '/')
+
+
+def _compile_globs(globs: List[str]) -> Optional["re.Pattern"]:
+    """One regex matching any of the fnmatch globs, None if there are none."""
+    if not globs:
+        return None
+    return re.compile('|'.join(f'(?:{fnmatch.translate(glob)})' for glob in globs))
+
+
+def _split_globs(value: str) -> List[str]:
+    return [glob.strip() for glob in value.split(',') if glob.strip()]
+
+
+class WorkspaceFiles:
+    """Enumerate a workspace with os.scandir, honouring ignore rules and globs.
+
+    Directory listings are cached with the directory's mtime and the
+    ignore rules in force, so repeated walks only stat each directory.
+    Binary sniffing results are cached per file (mtime, size).
+    """
+
+    def __init__(self, root, include=None, exclude=None, use_ignore_files=None) -> None:
+        self.root = os.path.abspath(str(root))
+        self.include = include if include is not None else _split_globs(config.get('FILES_INCLUDE', ''))
+        self.exclude = exclude if exclude is not None else _split_globs(
+            config.get('FILES_EXCLUDE', ','.join(DEFAULT_EXCLUDE)))
+        self._exclude = _compile_globs(self.exclude)
+        self._include = _compile_globs(self.include)
+        self.use_ignore_files = (use_ignore_files if use_ignore_files is not None
+                                 else config.get_bool('FILES_USE_GITIGNORE', True))
+        self._lock = threading.RLock()
+        self._listings: Dict[str, Tuple[int, tuple, List[FileEntry]]] = {}
+        self._own_rules: Dict[str, Tuple[tuple, List[IgnoreRule]]] = {}
+        self._text: Dict[str, Tuple[int, int, bool]] = {}
+
+    # Rules
+
+    def _dir_rules(self, directory: str) -> List[IgnoreRule]:
+        """Rules from the ignore files in one directory, cached by their mtimes."""
+        names = IGNORE_FILES
+        if directory == self.root:
+            names = (os.path.join('.git', 'info', 'exclude'),) + names
+        signature = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(directory, name))
+                signature.append((name, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                continue
+        signature = tuple(signature)
+        cached = self._own_rules.get(directory)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        rules = []
+        for name, _, _ in signature:
+            try:
+                with open(os.path.join(directory, name), 'r', encoding='utf-8', errors='replace') as f:
+                    rules.extend(parse_ignore(f.read(), directory))
+            except OSError:
+                continue
+        self._own_rules[directory] = (signature, rules)
+        return rules
+
+    def rules_for(self, directory: str) -> tuple:
+        """All ignore rules in force inside directory, outermost first."""
+        if not self.use_ignore_files:
+            return ()
+        directory = os.path.abspath(directory)
+        chain = []
+        current = directory
+        while True:
+            chain.append(current)
+            if current == self.root or not current.startswith(self.root + os.sep):
+                break
+            current = os.path.dirname(current)
+        rules = []
+        for path in reversed(chain):
+            rules.extend(self._dir_rules(path))
+        return tuple(rules)
+
+    def _excluded(self, name: str, path: str, is_dir: bool, rules) -> bool:
+        relative = _relative(path, self.root) or name
+        if self._exclude and (self._exclude.match(name) or self._exclude.match(relative)):
+            return True
+        if rules and match_rules(rules, path, is_dir):
+            return True
+        if not is_dir and self._include:
+            return not (self._include.match(name) or self._include.match(relative))
+        return False
+
+    def is_ignored(self, path: str, is_dir: Optional[bool] = None) -> bool:
+        """Whether path, or a directory above it, is left out of the workspace."""
+        path = os.path.abspath(str(path))
+        if path == self.root or not path.startswith(self.root + os.sep):
+            return False
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        parent = os.path.dirname(path)
+        if parent != self.root and self.is_ignored(parent, True):
+            return True
+        return self._excluded(os.path.basename(path), path, is_dir, self.rules_for(parent))
+
+    # Listing
+
+    def list_dir(self, directory: str, hidden: bool = True) -> List[FileEntry]:
+        """Entries of one directory, folders first, each group sorted by name.
+
+        Raises OSError if the directory can't be read.
+        """
+        directory = os.path.abspath(str(directory))
+        entries = self._listing(directory, self.rules_for(directory))
+        if not hidden:
+            entries = [entry for entry in entries if not entry.name.startswith('.')]
+        return entries
+
+    def _listing(self, directory: str, rules: tuple) -> List[FileEntry]:
+        with self._lock:
+            mtime = os.stat(directory).st_mtime_ns
+            cached = self._listings.get(directory)
+            if cached and cached[0] == mtime and cached[1] == rules:
+                return cached[2]
+            entries = self._scan(directory, rules)
+            self._listings[directory] = (mtime, rules, entries)
+            return entries
+
+    def _scan(self, directory: str, rules) -> List[FileEntry]:
+        folders = []
+        files = []
+        with os.scandir(directory) as scanned:
+            for entry in scanned:
+                try:
+                    is_dir = entry.is_dir()
+                    if not is_dir and not entry.is_file():
+                        continue  # Sockets, broken links...
+                    # Don't follow links to directories, they can loop
+                    if is_dir and entry.is_symlink():
+                        continue
+                except OSError:
+                    continue
+                if self._excluded(entry.name, entry.path, is_dir, rules):
+                    continue
+                (folders if is_dir else files).append(FileEntry(entry.name, entry.path, is_dir))
+        folders.sort()
+        files.sort()
+        return folders + files
+
+    def walk(self, directory: Optional[str] = None) -> Iterator[FileEntry]:
+        """Yield every file entry under directory (the root by default)."""
+        start = os.path.abspath(str(directory)) if directory else self.root
+        # Each directory's rules extend its parent's, so ancestors are read once
+        stack = [(start, self.rules_for(start))]
+        while stack:
+            current, rules = stack.pop()
+            try:
+                entries = self._listing(current, rules)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir:
+                    child_rules = rules + tuple(self._dir_rules(entry.path)) if self.use_ignore_files else ()
+                    stack.append((entry.path, child_rules))
+                else:
+                    yield entry
+
+    def iter_files(self, directory: Optional[str] = None,
+                   text_only: bool = True) -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield (path, stat) for workspace files, by default only text ones."""
+        for entry in self.walk(directory):
+            try:
+                stat = os.stat(entry.path)
+            except OSError:
+                continue
+            if text_only and not self.is_text(entry.path, stat):
+                continue
+            yield entry.path, stat
+
+    def is_text(self, path: str, stat: Optional[os.stat_result] = None) -> bool:
+        """Whether a file looks like text, by extension or by sniffing its start."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension in TEXT_EXTENSIONS:
+            return True
+        if extension in BINARY_EXTENSIONS:
+            return False
+        try:
+            stat = stat or os.stat(path)
+        except OSError:
+            return False
+        cached = self._text.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        try:
+            with open(path, 'rb') as f:
+                text = not is_binary_data(f.read(SNIFF_BYTES))
+        except OSError:
+            return False
+        self._text[path] = (stat.st_mtime_ns, stat.st_size, text)
+        return text
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Forget cached listings for path and below (everything if None)."""
+        with self._lock:
+            if path is None:
+                self._listings.clear()
+                self._text.clear()
+                return
+            path = os.path.abspath(str(path))
+            prefix = path + os.sep
+            for key in [key for key in self._listings if key == path or key.startswith(prefix)]:
+                del self._listings[key]
+            self._text.pop(path, None)
+
+
+_workspaces: Dict[str, WorkspaceFiles] = {}
+_workspaces_lock = threading.Lock()
+
+
+def get_workspace_files(root) -> WorkspaceFiles:
+    """Return the shared enumeration service for a workspace root."""
+    key = os.path.abspath(str(root))
+    with _workspaces_lock:
+        if key not in _workspaces:
+            _workspaces[key] = WorkspaceFiles(key)
+        return _workspaces[key]